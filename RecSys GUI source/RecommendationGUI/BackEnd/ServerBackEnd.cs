@@ -0,0 +1,116 @@
+﻿using Newtonsoft.Json;
+using RecommendationGUI.Models;
+using RecommendationGUI.Models.StudentFeatures;
+using RecommendationGUI.Utils;
+using System;
+using System.Collections.Generic;
+using System.Net.Http;
+using System.Text;
+
+namespace RecommendationGUI.BackEnd;
+
+/// <summary>
+/// Connects front end to a running python recommendation server ("server.py"),
+/// so the recommendation system isn't rebuilt on every request.
+/// </summary>
+public class ServerBackEnd : IBackEnd
+{
+    /// <summary>
+    /// HTTP client used for all server requests.
+    /// </summary>
+    private static readonly HttpClient _client = new();
+
+    /// <summary>
+    /// Base URL of recommendation server (e.g. "http://localhost:8765").
+    /// </summary>
+    private readonly string _baseUrl;
+
+    /// <summary>
+    /// Initializes server back end.
+    /// </summary>
+    /// <param name="baseUrl">Base URL of recommendation server.</param>
+    public ServerBackEnd(string baseUrl)
+    {
+        _baseUrl = baseUrl.TrimEnd('/');
+    }
+
+    /// <summary>
+    /// Sends a request to the server and parses its JSON response.
+    /// </summary>
+    /// <typeparam name="T">Response type (to be parsed from JSON).</typeparam>
+    /// <param name="request">Request to send.</param>
+    /// <returns>Server's response.</returns>
+    /// <exception cref="BackEndException">In case of a backend error.</exception>
+    private static T RetreiveFromServer<T>(HttpRequestMessage request)
+    {
+        string json;
+        HttpResponseMessage response;
+        try
+        {
+            response = _client.Send(request);
+            json = response.Content.ReadAsStringAsync().GetAwaiter().GetResult();
+        }
+        catch (HttpRequestException e)
+        {
+            throw new BackEndException("Recommendation server is unreachable.", e);
+        }
+
+        if (!response.IsSuccessStatusCode)
+            throw new BackEndException(JsonUtils.DeserializeJson<ServerError>(json).Error ?? "Unknown error.");
+
+        return JsonUtils.DeserializeJson<T>(json)!;
+    }
+
+    public List<Course> GetAllCourses()
+    {
+        List<Course> res = [];
+        var serverOutput = RetreiveFromServer<CoursesCliJsonOutput>(new(HttpMethod.Get, $"{_baseUrl}/courses"));
+        foreach (var (course, isEvening) in serverOutput.Courses)
+        {
+            res.Add(new(
+                id: course.ID,
+                name: course.Name,
+                time: isEvening ? DaytimeEveningAttendance.Evening : DaytimeEveningAttendance.Daytime
+            ));
+        }
+        return res;
+    }
+
+    public Tuple<float, List<Recommendation>, List<Recommendation>>
+        Recommend(Student student, Course orgCourse, int numActionsRec = 5, int numCoursesRec = 5)
+    {
+        // same args as the CLI receives, sent as a JSON object
+        var argsDict = student.ToCliArgsDict(orgCourse);
+        argsDict[CliArgs.NumActionsRec] = numActionsRec;
+        argsDict[CliArgs.NumCoursesRec] = numCoursesRec;
+
+        HttpRequestMessage request = new(HttpMethod.Post, $"{_baseUrl}/recommend")
+        {
+            Content = new StringContent(JsonConvert.SerializeObject(argsDict), Encoding.UTF8, "application/json")
+        };
+        var serverOutput = RetreiveFromServer<RecsCliJsonOutput>(request);
+
+        // retreive action recommendations list
+        List<Recommendation> actionsRec = [];
+        foreach (var (description, improveRate) in serverOutput.ActionsRec)
+            actionsRec.Add(new(description, improveRate));
+
+        // retreive course recommendations list
+        List<Recommendation> coursesRec = [];
+        foreach (var (description, improveRate) in serverOutput.CoursesRec)
+            coursesRec.Add(new(description, improveRate));
+
+        return Tuple.Create(serverOutput.OrgChance, actionsRec, coursesRec);
+    }
+
+    /// <summary>
+    /// Used for parsing server errors from JSON.
+    /// </summary>
+    private struct ServerError
+    {
+        /// <summary>
+        /// Error message.
+        /// </summary>
+        public string? Error { get; set; }
+    }
+}
@@ -1,4 +1,5 @@
 ﻿using RecommendationGUI.BackEnd;
+using System;
 
 namespace RecommendationGUI.Utils;
 
@@ -7,10 +8,17 @@ namespace RecommendationGUI.Utils;
 /// </summary>
 public static class BackendUtils
 {
+    /// <summary>
+    /// Environment variable holding recommendation server URL (if set, server is used instead of running scripts).
+    /// </summary>
+    private static readonly string SERVER_URL_VARIABLE = "RECSYS_SERVER_URL";
+
     /// <summary>
     /// `IBackEnd` instance used by application.
     /// </summary>
-    private static readonly IBackEnd _backend = new PythonBackEnd();
+    private static readonly IBackEnd _backend = Environment.GetEnvironmentVariable(SERVER_URL_VARIABLE) is string url
+        ? new ServerBackEnd(url)
+        : new PythonBackEnd();
 
     /// <summary>
     /// Retreives `IBackEnd` instance used by application.
@@ -0,0 +1,108 @@
+"""
+Holds `ChancePredictor` class wrapping a trained graduation chance model.
+Used by recommendation system.
+"""
+
+
+from typing import Callable, Optional, Any
+import pandas as pd
+import numpy as np
+import profiling
+
+
+# most rows scored by compiled model at once, larger batches are scored by the model itself
+# (the compiled model has lower per-call overhead, the model's native kernel has lower per-row cost)
+COMPILED_MAX_ROWS: int = 256
+
+
+class ChancePredictor:
+    """
+    Student graduation chance predictor.
+    Callable on a single student (series), and can also score a whole dataframe of students in one model call.
+    """
+    def __init__(self, load_model: Callable[[], Any], fingerprint: Optional[str] = None,
+                 load_compiled: Optional[Callable[[], Any]] = None) -> None:
+        """
+        Initializes a chance predictor instance.
+        :param load_model: A function that loads (or trains) the model, called on first prediction.
+        :param fingerprint: Fingerprint identifying the model version, `None` if unknown.
+        :param load_compiled: A function that loads a compiled version of the model (with `predict_positive`, as
+                              `forest.CompiledForest` has) for low latency scoring of single students and small
+                              batches, called on first such prediction. `None` to always use the model.
+        """
+        self.__load_model: Callable[[], Any] = load_model
+        self.__model: Optional[Any] = None
+        self.__load_compiled: Optional[Callable[[], Any]] = load_compiled
+        self.__compiled: Optional[Any] = None
+        self.__fingerprint: Optional[str] = fingerprint
+
+    @property
+    def model(self) -> Any:
+        """
+        Underlying model (loaded on first access).
+        """
+        if self.__model is None:
+            with profiling.span("load_model"):
+                self.__model = self.__load_model()
+        return self.__model
+
+    @property
+    def compiled(self) -> Optional[Any]:
+        """
+        Compiled model (loaded on first access), `None` if predictor has none.
+        """
+        if self.__compiled is None and self.__load_compiled is not None:
+            with profiling.span("load_compiled_model"):
+                self.__compiled = self.__load_compiled()
+        return self.__compiled
+
+    @property
+    def fingerprint(self) -> Optional[str]:
+        """
+        Fingerprint identifying the model version, `None` if unknown.
+        """
+        return self.__fingerprint
+
+    def __call__(self, student: pd.Series) -> float:
+        """
+        Predicts a single student's chance.
+        :param student: Representative student vector (series).
+        :return: Predicted chance.
+        """
+        profiling.count("predictor_calls")
+        profiling.count("predictor_rows")
+        if self.compiled is not None:
+            return float(self.compiled.predict_positive(student)[0])
+        return float(self.model.predict_proba(pd.DataFrame([student]))[0, 1])
+
+    def predict_batch(self, students: pd.DataFrame) -> np.ndarray:
+        """
+        Predicts chances of all students in a dataframe, in a single model call.
+        :param students: Students' dataframe (each row is a representative student vector).
+        :return: Predicted chances, ordered as `students` rows.
+        """
+        if students.empty:
+            return np.empty(0, dtype=float)
+        profiling.count("predictor_calls")
+        profiling.count("predictor_rows", len(students))
+        if len(students) <= COMPILED_MAX_ROWS and self.compiled is not None:
+            return self.compiled.predict_positive(students).astype(float)
+        return self.model.predict_proba(students)[:, 1].astype(float)
+
+
+def predict_batch(chance_predictor: Callable[[pd.Series], float], students: pd.DataFrame) -> np.ndarray:
+    """
+    Predicts chances of all students in a dataframe, using a batched call if predictor supports it
+    (has `predict_batch`, as `ChancePredictor` does).
+    :param chance_predictor: A function that receives a student, and predicts their chance of graduating.
+    :param students: Students' dataframe.
+    :return: Predicted chances, ordered as `students` rows.
+    """
+    batch_func: Optional[Callable[[pd.DataFrame], np.ndarray]] = getattr(chance_predictor, "predict_batch", None)
+    if batch_func is not None:
+        return batch_func(students)
+    if students.empty:
+        return np.empty(0, dtype=float)
+    profiling.count("predictor_calls", len(students))
+    profiling.count("predictor_rows", len(students))
+    return students.apply(chance_predictor, axis=1).to_numpy(dtype=float) # plain callable, one call per row
@@ -11,7 +11,10 @@ import json
 class Course:
     """
     Represents a course.
+    Courses are immutable, so a single instance of each course is shared by everything that refers to it.
     """
+    __slots__ = ("__id", "__name")
+
     def __init__(self, id: int, name: str) -> None:
         """
         Initializes a course instance.
@@ -48,6 +51,21 @@ class Course:
         :return Debug representation of course.
         """
         return f"Course(id={self.id}, name='{self.name}')"
+    
+    def __eq__(self, other: Any) -> bool:
+        """
+        Checks if equals another course.
+        :param other: Object to compare to.
+        :return: `True` if `other` is a course with same ID and name, otherwise `False`.
+        """
+        return isinstance(other, Course) and (self.id, self.name) == (other.id, other.name)
+    
+    def __hash__(self) -> int:
+        """
+        Gets hash of course.
+        :return: Hash of course.
+        """
+        return hash((self.id, self.name))
 
 
 class CourseEncoder(json.JSONEncoder):
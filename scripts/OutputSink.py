@@ -0,0 +1,120 @@
+"""
+Holds output sinks, used for writing recommendation system CLI results.
+"""
+
+
+from typing import Optional, Type, TextIO, Dict, Any, List
+import json
+import sys
+
+
+# supported formats of JSON output
+FORMAT_JSON: str = "json"
+FORMAT_JSONL: str = "jsonl"
+JSON_FORMATS: List[str] = [FORMAT_JSON, FORMAT_JSONL]
+
+# size of output files' write buffer (in bytes)
+BUFFER_SIZE: int = 1 << 16
+
+
+class OutputSink:
+    """
+    Text output sink - a single buffered handle, to a file or to stdout, held open for a whole run.
+    """
+    def __init__(self, path: Optional[str] = None) -> None:
+        """
+        Initializes output sink, overwriting output file if exists.
+        :param path: Path of output file, `None` for stdout.
+        """
+        self.__file: TextIO = sys.stdout if path is None else open(path, "w", buffering=BUFFER_SIZE)
+        self.__owns_file: bool = path is not None # stdout is flushed, but never closed
+
+    def write(self, text: str) -> None:
+        """
+        Writes text.
+        :param text: Text to write.
+        """
+        self.__file.write(text)
+
+    def write_line(self, text: str = "") -> None:
+        """
+        Writes a line of text.
+        :param text: Text of line to write (without line break).
+        """
+        self.__file.write(text + "\n")
+
+    def flush(self) -> None:
+        """
+        Flushes buffered output.
+        """
+        self.__file.flush()
+
+    def close(self) -> None:
+        """
+        Flushes and closes output.
+        """
+        if self.__owns_file:
+            self.__file.close()
+        else:
+            self.__file.flush()
+
+    def __enter__(self) -> 'OutputSink':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class JsonRecordWriter:
+    """
+    Streams JSON records to an output sink, in a given format:
+    "json" - a single JSON value (an array of all records if `as_array`, otherwise a single record),
+    "jsonl" - JSON Lines, one record per line.
+    Output is valid once the writer is closed, without rewriting anything already written.
+    """
+    def __init__(self, sink: OutputSink, output_format: str = FORMAT_JSON, as_array: bool = True,
+                 encoder: Optional[Type[json.JSONEncoder]] = None) -> None:
+        """
+        Initializes JSON record writer.
+        :param sink: Output sink to write to (closed with the writer).
+        :param output_format: Output format, one of `JSON_FORMATS`.
+        :param as_array: `True` to write records as an array (in "json" format), `False` to write a single record.
+        :param encoder: JSON encoder type to use, `None` for default.
+        """
+        if output_format not in JSON_FORMATS:
+            raise ValueError(f"Unsupported JSON output format: \"{output_format}\"")
+        self.__sink: OutputSink = sink
+        self.__is_array: bool = FORMAT_JSON == output_format and as_array
+        self.__is_lines: bool = FORMAT_JSONL == output_format
+        self.__encoder: Optional[Type[json.JSONEncoder]] = encoder
+        self.__count: int = 0 # amount of written records
+        if self.__is_array:
+            self.__sink.write("[") # begin array
+
+    def write(self, record: Dict[str, Any]) -> None:
+        """
+        Writes a record.
+        :param record: Record to write (JSON-serializable).
+        """
+        if not self.__is_array and not self.__is_lines and 0 < self.__count:
+            raise ValueError("Only a single record may be written when not writing an array")
+        if self.__is_array and 0 < self.__count:
+            self.__sink.write(",") # separate from previous record
+        self.__sink.write(json.dumps(record, cls=self.__encoder))
+        if self.__is_lines:
+            self.__sink.write("\n")
+        self.__count += 1
+
+    def close(self) -> None:
+        """
+        Finishes output (closing array if needed) and closes sink.
+        """
+        if self.__is_array:
+            self.__sink.write("]") # close array
+        self.__sink.close()
+
+    def __enter__(self) -> 'JsonRecordWriter':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
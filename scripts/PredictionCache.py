@@ -0,0 +1,199 @@
+"""
+Holds `PredictionCache` class, a bounded LRU cache of graduation chance predictions in front of a predictor.
+Used by recommendation system CLI.
+"""
+
+
+from typing import Callable, Optional, List, Dict, Any
+from collections import OrderedDict
+import pandas as pd
+import numpy as np
+import hashlib
+import ChancePredictor
+import profiling
+import utils
+
+
+# size (in bytes) of cache keys - digests of predictor fingerprint, feature names and feature values
+KEY_SIZE: int = 16
+
+# amount of predictions cached when a cache file is given without a size
+DEFAULT_MAX_SIZE: int = 100000
+
+
+class PredictionCache:
+    """
+    Memoizing wrapper of a student graduation chance predictor, callable (and batch-predicting) just like it.
+    Predictions are keyed by a digest of the predictor's fingerprint and the student's ordered features, and the least
+    recently used ones are evicted once the cache is full. The cache can be persisted to disk, so later runs skip
+    predictions already made (entries of other predictor versions never match, as their keys differ).
+    """
+    def __init__(self, chance_predictor: Callable[[pd.Series], float], max_size: int,
+                 path: Optional[str] = None) -> None:
+        """
+        Initializes a prediction cache instance (loading persisted predictions, if any).
+        :param chance_predictor: A function that receives a student, and predicts their chance of graduating.
+                                 Predictor must have a `fingerprint` (as `ChancePredictor` has) if cache is persisted.
+        :param max_size: Amount of predictions kept (at most).
+        :param path: Path of file the cache is persisted at (see `save`), `None` to keep it in memory only.
+        """
+        if max_size < 1:
+            raise ValueError(f"Invalid prediction cache size: {max_size}")
+        self.__fingerprint: Optional[str] = getattr(chance_predictor, "fingerprint", None)
+        if path is not None and self.__fingerprint is None:
+            raise ValueError("Only predictions of a fingerprinted predictor may be persisted")
+        self.__chance_predictor: Callable[[pd.Series], float] = chance_predictor
+        self.__max_size: int = max_size
+        self.__path: Optional[str] = path
+        self.__entries: OrderedDict[bytes, float] = OrderedDict() # least recently used first
+        self.__hits: int = 0
+        self.__misses: int = 0
+        self.__evictions: int = 0
+        if path is not None and utils.file_exists(path):
+            self.__load(path)
+
+    @property
+    def fingerprint(self) -> Optional[str]:
+        """
+        Fingerprint of wrapped predictor (so utility matrices caches are keyed the same), `None` if unknown.
+        """
+        return self.__fingerprint
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """
+        Statistics of cache: "hits" (students served without predicting), "misses" (students predicted), "evictions"
+        (all since created) and current "size".
+        """
+        return {"hits": self.__hits, "misses": self.__misses, "evictions": self.__evictions,
+                "size": len(self.__entries)}
+
+    def __call__(self, student: pd.Series) -> float:
+        """
+        Predicts a single student's chance (or gets it from cache).
+        :param student: Representative student vector (series).
+        :return: Predicted chance.
+        """
+        key: bytes = self.__keys(student.index.tolist(), np.atleast_2d(student.to_numpy(dtype=float)))[0]
+        chance: Optional[float] = self.__get(key)
+        if chance is None:
+            chance = float(self.__chance_predictor(student))
+            self.__put(key, chance)
+        return chance
+
+    def predict_batch(self, students: pd.DataFrame) -> np.ndarray:
+        """
+        Predicts chances of all students in a dataframe, only students missing from cache are predicted (in a single
+        batched predictor call when supported).
+        :param students: Students' dataframe.
+        :return: Predicted chances, ordered as `students` rows.
+        """
+        keys: List[bytes] = self.__keys(students.columns.tolist(), students.to_numpy(dtype=float))
+        chances: np.ndarray = np.empty(len(keys), dtype=float)
+        missing: Dict[bytes, List[int]] = dict() # positions of each missing student (repeated students share a key)
+        for i, key in enumerate(keys):
+            if key in missing: # repeated in batch, predicted once (so a hit)
+                missing[key].append(i)
+                self.__count_hit()
+                continue
+            chance: Optional[float] = self.__get(key)
+            if chance is None:
+                missing[key] = [i]
+            else:
+                chances[i] = chance
+        if 0 < len(missing):
+            first_positions: List[int] = [positions[0] for positions in missing.values()]
+            predicted: np.ndarray = ChancePredictor.predict_batch(self.__chance_predictor,
+                                                                  students.iloc[first_positions])
+            for (key, positions), chance in zip(missing.items(), predicted):
+                chances[positions] = chance
+                self.__put(key, float(chance))
+        return chances
+
+    def save(self) -> None:
+        """
+        Persists cache to its file (atomically), least recently used predictions first.
+        """
+        if self.__path is None:
+            return
+        keys: np.ndarray = np.frombuffer(b"".join(self.__entries.keys()), dtype=np.uint8).reshape(-1, KEY_SIZE)
+        chances: np.ndarray = np.fromiter(self.__entries.values(), dtype=float, count=len(self.__entries))
+        def write(tmp_path: str) -> None:
+            with open(tmp_path, "wb") as file:
+                np.savez(file, keys=keys, chances=chances)
+        utils.atomic_write(self.__path, write)
+
+    def __load(self, path: str) -> None:
+        """
+        Loads persisted predictions (most recently used ones, if more than cache size).
+        :param path: Path of persisted cache.
+        """
+        with np.load(path) as saved:
+            keys: bytes = saved["keys"][-self.__max_size:].tobytes() # a row of bytes per key
+            chances: np.ndarray = saved["chances"][-self.__max_size:]
+        self.__entries.update(zip((keys[i:i + KEY_SIZE] for i in range(0, len(keys), KEY_SIZE)), chances.tolist()))
+
+    def __keys(self, feature_names: List[Any], matrix: np.ndarray) -> List[bytes]:
+        """
+        Calculates cache keys of students.
+        :param feature_names: Names of features, ordered as matrix columns.
+        :param matrix: Students' features matrix, a row per student.
+        :return: Key of each student, ordered as matrix rows.
+        """
+        prefix = hashlib.blake2b(digest_size=KEY_SIZE)
+        prefix.update(str(self.__fingerprint).encode())
+        prefix.update("\0".join(map(str, feature_names)).encode())
+        keys: List[bytes] = list()
+        for row in np.ascontiguousarray(matrix, dtype=np.float64):
+            digest = prefix.copy()
+            digest.update(row.tobytes())
+            keys.append(digest.digest())
+        return keys
+
+    def __get(self, key: bytes) -> Optional[float]:
+        """
+        Gets a cached prediction (marking it as most recently used), counting a hit or a miss.
+        :param key: Cache key of student.
+        :return: Cached prediction, `None` if missing.
+        """
+        chance: Optional[float] = self.__entries.get(key)
+        if chance is None:
+            self.__misses += 1
+            profiling.count("prediction_cache_misses")
+        else:
+            self.__count_hit()
+            self.__entries.move_to_end(key)
+        return chance
+
+    def __count_hit(self) -> None:
+        """
+        Counts a student served without predicting.
+        """
+        self.__hits += 1
+        profiling.count("prediction_cache_hits")
+
+    def __put(self, key: bytes, chance: float) -> None:
+        """
+        Caches a prediction, evicting least recently used predictions if cache is full.
+        :param key: Cache key of student.
+        :param chance: Predicted chance.
+        """
+        self.__entries[key] = chance
+        while self.__max_size < len(self.__entries):
+            self.__entries.popitem(last=False)
+            self.__evictions += 1
+
+
+def with_cache(chance_predictor: Callable[[pd.Series], float], cache_size: int = 0,
+               cache_path: Optional[str] = None) -> Callable[[pd.Series], float]:
+    """
+    Wraps a predictor with a prediction cache, if requested.
+    :param chance_predictor: A function that receives a student, and predicts their chance of graduating.
+    :param cache_size: Amount of predictions cached (at most), `0` for no cache (or for `DEFAULT_MAX_SIZE`, if
+                       persisted).
+    :param cache_path: Path of file the cache is persisted at, `None` to keep it in memory only.
+    :return: Cached predictor, or `chance_predictor` itself if no cache is requested.
+    """
+    if 0 == cache_size and cache_path is None:
+        return chance_predictor
+    return PredictionCache(chance_predictor, cache_size or DEFAULT_MAX_SIZE, cache_path)
@@ -4,12 +4,24 @@ Used by recommendation system.
 """
 
 
-from typing import TypeVar, Optional, Callable, Iterable, Tuple, Dict, List
-from sklearn.metrics.pairwise import cosine_similarity
-from StudentAction import StudentAction
+from typing import TypeVar, Optional, Callable, Tuple, Dict, List, Any
+from StudentAction import StudentAction, AVG_COURSE_UNITS
+from forest import CompiledForest
 from Course import Course
 import pandas as pd
+import numpy as np
+import ChancePredictor
+import course_manifest
+import snapshot
+import hashlib
+import warnings
+import pickle
+import json
+import neighbors
+import profiling
+import parallel
 import src_data
+import what_if
 import utils
 
 
@@ -24,17 +36,31 @@ FloatSeries = pd.Series
 # pair of an item and its score
 ItemScorePair = Tuple[T, float]
 
-# assumed average curricular units per course, used for estimation
-AVG_COURSE_UNITS: int = 4
+
+# array element type of cached utility matrices (when cached as memory-mapped arrays) - same precision as pickled ones,
+# so scores (and order of tied items) don't depend on cache backend
+UTILITY_DTYPE: str = "float64"
+
+# maximal amount of student-by-graduate similarities held in memory at once when recommending for many students
+SIMILARITY_BLOCK_ELEMENTS: int = 1 << 22
 
 
 # path to CSV of default student dataset
 DEFAULT_DATASET_PATH: str = "../data/cleaned_data.csv"
 
+def __cosine_similarity(student1: pd.Series, student2: pd.Series) -> float:
+    """
+    Calculates cosine similarity between two students.
+    :param student1: First student's representative vector (series).
+    :param student2: Second student's representative vector (series).
+    :return: Cosine similarity of students.
+    """
+    from sklearn.metrics.pairwise import cosine_similarity # slow to import, and only needed when called directly
+    return cosine_similarity(student1.values.reshape(1, -1), student2.values.reshape(1, -1))[0, 0]
+
+
 # default student similarity function used by recommendation system
-DEFAULT_SIMILARITY_FUNC: Callable[[pd.Series, pd.Series], float] = \
-        lambda student1, student2: cosine_similarity(
-            student1.values.reshape(1, -1), student2.values.reshape(1, -1))[0, 0] # type: ignore
+DEFAULT_SIMILARITY_FUNC: Callable[[pd.Series, pd.Series], float] = __cosine_similarity
 
 
 class RecSys:
@@ -46,7 +72,12 @@ class RecSys:
                  similarity_func: Callable[[pd.Series, pd.Series], float] = DEFAULT_SIMILARITY_FUNC,
                  k: int = 5,
                  actions_utility_cache_name: Optional[str] = None,
-                 courses_utility_cache_name: Optional[str] = None) -> None:
+                 courses_utility_cache_name: Optional[str] = None,
+                 org_chances_cache_name: Optional[str] = None,
+                 ann_lists: int = 0,
+                 ann_probe: int = 8,
+                 ann_cache_name: Optional[str] = None,
+                 build_workers: Optional[int] = None) -> None:
         """
         Initalizes new recommendation sysem.
         :param primary_data: Primary students data.
@@ -55,25 +86,101 @@ class RecSys:
         :param k: K parameter of CF (take K most similar users).
         :param actions_utility_cache_name: Name to use for actions utility matrix cache, `None` to not use cache.
         :param courses_utility_cache_name: Name to use for courses utility matrix cache, `None` to not use cache.
+        :param org_chances_cache_name: Name to use for cache of graduates' original predicted chances (shared by both
+                                       utility matrices), `None` to not use cache.
+        :param ann_lists: Amount of clusters of an approximate nearest-neighbour (IVF) index over graduates,
+                          `0` for exact search. Only used with default similarity function.
+        :param ann_probe: Amount of ANN index clusters probed per student, more probes raise recall but cost latency.
+        :param ann_cache_name: Name to use for ANN index cache, `None` to not use cache.
+        :param build_workers: Amount of worker processes building utility matrix columns, `None` for default
+                              (environment variable RECSYS_BUILD_WORKERS, or amount of CPUs).
+        Cached utility matrices are rebuilt whenever the predictor changes, and updated (only rows of added graduates are
+        computed, rows of removed ones are dropped) whenever the dataset changes. Predictors are identified by
+        their `fingerprint` attribute (as `ChancePredictor` has), so plain callables can't invalidate the cache.
+        Graduates' chances (and the predictor's model) are only needed when utility rows are computed, so a warm start
+        makes no predictions.
         """
+        # content hash of default dataset file, if built from it (so snapshots can tell when it changed)
+        self.__dataset_source: Optional[str] = None
         if primary_data is None:
+            self.__dataset_source = course_manifest.source_hash(DEFAULT_DATASET_PATH)
             primary_data = src_data.PrimaryData.read_csv(DEFAULT_DATASET_PATH) # use default dataset
+            # keep course manifest (read on start-up by `get_all_courses`) up to date with the cache
+            course_manifest.get_courses(DEFAULT_DATASET_PATH, primary_data.get_all_courses)
 
         self.__chance_predictor: Callable[[pd.Series], float] = chance_predictor
         self.__similarity_func: Callable[[pd.Series, pd.Series], float] = similarity_func
         self.__k: int = k
         self.__graduates_df: pd.DataFrame = primary_data.get_graduates_df() # DF of graduate students
-        self.__courses_df: pd.DataFrame = primary_data.get_courses_df() # DF of courses
-        self.__org_chances: FloatSeries = self.__graduates_df.apply(chance_predictor, axis=1) # original predicted graduate chances
-        self.__actions_utility_df: pd.DataFrame = RecSys.__get_actions_utility_df(
-            actions_utility_cache_name,
-            self.__graduates_df, chance_predictor, self.__org_chances
+        self.__courses: Dict[int, Course] = primary_data.get_courses_by_id() # courses by ID, shared by all results
+        # row-normalized graduates matrix, so default (cosine) similarity of a query is a single matrix-vector product
+        self.__graduates_matrix: Optional[np.ndarray] = \
+            neighbors.normalize_rows(self.__graduates_df.to_numpy(dtype=float)) \
+            if similarity_func is DEFAULT_SIMILARITY_FUNC else None
+        self.__ann_index: Optional[neighbors.IvfIndex] = None # approximate nearest-neighbour index, if requested
+        if self.__graduates_matrix is not None and 0 < ann_lists:
+            self.__ann_index = RecSys.__get_ann_index(ann_cache_name, primary_data.fingerprint,
+                                                      self.__graduates_matrix, ann_lists, ann_probe)
+        # utility matrix rows are keyed by graduates' content, so cached rows stay valid when graduates are added or
+        # removed, and only rows of new graduates are computed
+        graduate_keys: pd.Index = src_data.row_keys(self.__graduates_df)
+        # identity of everything (other than graduates) utility matrices are generated from, cache entries are rebuilt
+        # when it changes
+        cache_manifest: Dict[str, Any] = {
+            "columns": self.__graduates_df.columns.tolist(),
+            "predictor": getattr(chance_predictor, "fingerprint", None)
+        }
+        # identity of this system's content, equal for systems that recommend the same (e.g. built from the same cache)
+        self.__identity: str = hashlib.sha256(json.dumps({
+            **cache_manifest,
+            "data": primary_data.fingerprint,
+            "similarity": None if similarity_func is DEFAULT_SIMILARITY_FUNC
+                          else f"{similarity_func.__module__}.{similarity_func.__qualname__}",
+            "k": k,
+            "ann": [ann_lists, ann_probe] if self.__ann_index is not None else None
+        }, sort_keys=True).encode()).hexdigest()[:16]
+        get_org_chances: Callable[[pd.Index], FloatSeries] = RecSys.__org_chances_getter(
+            org_chances_cache_name, cache_manifest, self.__graduates_df, graduate_keys, chance_predictor
         )
-        self.__courses_utility_df: pd.DataFrame = RecSys.__get_courses_utility_df(
-            courses_utility_cache_name,
-            self.__graduates_df, chance_predictor, self.__org_chances,
-            courses=map(int, self.__courses_df[src_data.C_STUD_COURSE])
+        keyed_actions_utility_df: pd.DataFrame = RecSys.__get_actions_utility_df(
+            actions_utility_cache_name, cache_manifest,
+            self.__graduates_df, graduate_keys, chance_predictor, get_org_chances, build_workers
         )
+        keyed_courses_utility_df: pd.DataFrame = RecSys.__get_courses_utility_df(
+            courses_utility_cache_name, cache_manifest,
+            self.__graduates_df, graduate_keys, chance_predictor, get_org_chances,
+            courses=list(self.__courses.keys()),
+            build_workers=build_workers
+        )
+        # utility matrices as graduate-by-item arrays (aligned with graduates' rows) - kept apart rather than combined,
+        # so memory-mapped ones aren't copied - the item represented by each of their (consecutive) columns, and
+        # columns of actions and of courses
+        actions: List[StudentAction] = [StudentAction(column) for column in keyed_actions_utility_df.columns]
+        courses: List[Course] = [self.__courses[int(column)] for column in keyed_courses_utility_df.columns]
+        self.__items_utility: List[np.ndarray] = [
+            RecSys.__aligned_values(keyed_actions_utility_df, graduate_keys),
+            RecSys.__aligned_values(keyed_courses_utility_df, graduate_keys)
+        ]
+        self.__items: List[Any] = actions + courses
+        self.__action_columns: np.ndarray = np.arange(len(actions))
+        self.__course_columns: np.ndarray = np.arange(len(actions), len(self.__items))
+
+    @property
+    def identity(self) -> str:
+        """
+        Identity of recommendation system - a hash of its dataset, predictor (fingerprint) and settings.
+        Changes whenever the system would recommend differently, so results can be cached by it.
+        """
+        return self.__identity
+
+    def warm_up(self) -> None:
+        """
+        Loads predictor's model (and compiled model) now, rather than on first prediction - e.g. before serving
+        requests, so they're all warm (and concurrent first requests don't race to load it).
+        Predictors without models (plain callables) are left as is.
+        """
+        getattr(self.__chance_predictor, "model", None)
+        getattr(self.__chance_predictor, "compiled", None)
 
     def predict_chance(self, student: pd.Series) -> float:
         """
@@ -83,17 +190,83 @@ class RecSys:
         """
         return self.__chance_predictor(student)
 
-    def __calc_k_similar(self, student: pd.Series) -> Tuple[FloatSeries, pd.Index]:
+    def predict_chances(self, students: pd.DataFrame) -> FloatSeries:
         """
-        Given a representative student vector (series), calculates similarity between said student and all students in
-        graduates DF and locates `k` most similar students (same `k` from constructor).
-        :param student: Representative student vector (series).
-        :return: Similarity scores (`FloatSeries`), indices of similar students in graduates DF.
+        Predicts graduation chances of multiple students, in a single batched predictor call when supported.
+        :param students: Students' dataframe.
+        :return: Predicted graduation chances, indexed as `students`.
         """
-        similarity_scores: FloatSeries = self.__graduates_df.apply(lambda row: self.__similarity_func(row, student), axis=1)
-        similar_indices: pd.Index = similarity_scores.nlargest(self.__k).index
-        return similarity_scores, similar_indices
-    
+        return pd.Series(ChancePredictor.predict_batch(self.__chance_predictor, students), index=students.index)
+
+    def __k_nearest(self, students: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Locates `k` most similar graduates (same `k` from constructor) of each student.
+        :param students: Students' dataframe (each row is a representative student vector).
+        :return: Positions of similar graduates in graduates DF (row per student), similarity of each of them.
+        """
+        if self.__graduates_matrix is None: # custom similarity function, compare each student with each graduate
+            positions: List[np.ndarray] = list()
+            similarities: List[np.ndarray] = list()
+            for _, student in students.iterrows():
+                similarity_scores: np.ndarray = self.__graduates_df.apply(
+                    lambda row: self.__similarity_func(row, student), axis=1
+                ).to_numpy(dtype=float)
+                positions.append(neighbors.top_k_indices(similarity_scores, self.__k))
+                similarities.append(similarity_scores[positions[-1]])
+            k: int = min(self.__k, len(self.__graduates_df))
+            return np.array(positions, dtype=int).reshape(-1, k), np.array(similarities, dtype=float).reshape(-1, k)
+
+        queries: np.ndarray = neighbors.normalize_rows(students[self.__graduates_df.columns].to_numpy(dtype=float))
+        if self.__ann_index is not None:
+            return self.__ann_index.k_nearest(queries, self.__k)
+        return neighbors.k_nearest(self.__graduates_matrix, queries, self.__k, SIMILARITY_BLOCK_ELEMENTS)
+
+    def __score_items(self, students: pd.DataFrame) -> np.ndarray:
+        """
+        Predicts scores of all items (actions and courses) for each student: the similarity-weighted average of
+        similar graduates' utility rows - accumulated over the `k` similar graduates of all students at once.
+        :param students: Students' dataframe (each row is a representative student vector).
+        :return: Matrix of item scores (row per student, column per item).
+        """
+        with profiling.span("similarity_search", rows=len(students)):
+            similar_positions, similarities = self.__k_nearest(students)
+
+        def weighted_sum(utility: np.ndarray) -> np.ndarray:
+            # added in order of similarity (rather than by a product whose summation order depends on the matrix's
+            # memory layout), so scores - and order of tied items - are the same for pickled and memory-mapped
+            # matrices
+            sums: np.ndarray = np.zeros((len(similar_positions), utility.shape[1]))
+            for neighbour in range(similar_positions.shape[1]):
+                sums += similarities[:, [neighbour]] * utility[similar_positions[:, neighbour]]
+            return sums
+
+        with profiling.span("scoring", rows=len(students)):
+            weighted_sums: np.ndarray = np.hstack([weighted_sum(utility) for utility in self.__items_utility])
+            total_similarities: np.ndarray = similarities.sum(axis=1, keepdims=True)
+            scores: np.ndarray = np.divide(weighted_sums, total_similarities,
+                                           out=np.zeros_like(weighted_sums), where=0 != total_similarities)
+        profiling.count("rows_scored", len(students))
+        return scores
+
+    def __top_items(self, scores: np.ndarray, columns: np.ndarray, count: int) -> List[List[ItemScorePair[Any]]]:
+        """
+        Given items' scores of students, gets `count` items with the highest positive score of each student
+        (using a partial selection, rather than sorting all items).
+        :param scores: Matrix of item scores (row per student, column per item).
+        :param columns: Columns of items to choose from.
+        :param count: Amount of items to choose (max).
+        :return: For each student, chosen items and their scores, ordered by descending score (ties by column order).
+        """
+        with profiling.span("select_items", rows=len(scores)): # top-N selection, and lookup of chosen items
+            candidate_scores: np.ndarray = scores[:, columns]
+            top: np.ndarray = neighbors.top_k_indices(candidate_scores, count)
+            top_scores: np.ndarray = np.take_along_axis(candidate_scores, top, axis=1)
+            return [
+                [(self.__items[columns[column]], float(score)) for column, score in zip(student_top, student_scores)
+                 if 0 < score] # only positive scores are recommended
+                for student_top, student_scores in zip(top, top_scores)
+            ]
+
     def recommend_actions(self, student: pd.Series, rec_count: int) -> List[ItemScorePair[StudentAction]]:
         """
         Given a representative student vector (series), recommends actions to increase graduation chances.
@@ -101,23 +274,7 @@ class RecSys:
         :param rec_count: Amount of actions to recommend (max).
         :return: List of recommended actions and their scores.
         """
-        similarity_scores, similar_indices = self.__calc_k_similar(student)
-        return self.__recommend_actions(rec_count, similarity_scores, similar_indices)
-    
-    def __recommend_actions(self, rec_count: int,
-                            similarity_scores: FloatSeries,
-                            similar_indices: pd.Index) -> List[ItemScorePair[StudentAction]]:
-        """
-        Given a student's similarity to graduates, recommends actions to increase graduation chances.
-        :param rec_count: Amount of actions to recommend (max).
-        :param similarity_scores: Similarity scores between `student` and every graduate.
-        :param similar_indices: Indices of `k` most similar graduates.
-        :return: List of recommended actions and said actions' scores.
-        """
-        action_scores: Dict[StudentAction, float] = RecSys.__predict_scores(
-            self.__actions_utility_df, similar_indices, similarity_scores, StudentAction
-        )
-        return RecSys.__get_items_max_score(action_scores, rec_count)
+        return self.__top_items(self.__score_items(pd.DataFrame([student])), self.__action_columns, rec_count)[0]
     
     def recommend_courses(self, student: pd.Series, rec_count: int) -> List[ItemScorePair[Course]]:
         """
@@ -126,24 +283,7 @@ class RecSys:
         :param rec_count: Amount of courses to recommend (max).
         :return: List of recommended courses and their scores.
         """
-        similarity_scores, similar_indices = self.__calc_k_similar(student)
-        return self.__recommend_courses(rec_count, similarity_scores, similar_indices)
-    
-    def __recommend_courses(self, rec_count: int,
-                            similarity_scores: FloatSeries,
-                            similar_indices: pd.Index) -> List[ItemScorePair[Course]]:
-        """
-        Given a student's similarity to graduates, recommends coueses to increase graduation chances.
-        :param rec_count: Amount of courses to recommend (max).
-        :param similarity_scores: Similarity scores between `student` and every graduate.
-        :param similar_indices: Indices of `k` most similar graduates.
-        :return: List of recommended courses and their scores.
-        """
-        course_scores: Dict[int, float] = RecSys.__predict_scores(
-            self.__courses_utility_df, similar_indices, similarity_scores, int
-        )
-        recommended_courses: List[ItemScorePair[int]] = RecSys.__get_items_max_score(course_scores, rec_count)
-        return [(self.__get_course_by_id(id), score) for id, score in recommended_courses]
+        return self.__top_items(self.__score_items(pd.DataFrame([student])), self.__course_columns, rec_count)[0]
 
     def recommend(self, student: pd.Series,
                   actions_rec_count: int = 5,
@@ -157,149 +297,309 @@ class RecSys:
         :return: List of recommended actions and their scores, 
                  list of recommended courses and their scores.
         """
-        similarity_scores, similar_indices = self.__calc_k_similar(student)
-
-        return self.__recommend_actions(actions_rec_count, similarity_scores, similar_indices), \
-               self.__recommend_courses(courses_rec_count, similarity_scores, similar_indices)
+        return self.recommend_many(pd.DataFrame([student]), actions_rec_count, courses_rec_count)[0]
     
-    def __get_course_by_id(self, course_id: int) -> Course:
+    def recommend_many(self, students: pd.DataFrame,
+                       actions_rec_count: int = 5,
+                       courses_rec_count: int = 5) -> List[Tuple[List[ItemScorePair[StudentAction]],
+                                                                 List[ItemScorePair[Course]]]]:
+        """
+        Recommends actions and courses for every student in a dataframe, in a single pass:
+        similarities are computed in memory-bounded blocks, and all items are scored with a product per utility matrix.
+        :param students: Students' dataframe (each row is a representative student vector).
+        :param actions_rec_count: Amount of actions to recommend for each student (max).
+        :param courses_rec_count: Amount of courses to recommend for each student (max).
+        :return: For each student (ordered as `students` rows), list of recommended actions and their scores,
+                 list of recommended courses and their scores.
+        """
+        scores: np.ndarray = self.__score_items(students)
+        return list(zip(self.__top_items(scores, self.__action_columns, actions_rec_count),
+                        self.__top_items(scores, self.__course_columns, courses_rec_count)))
+
+    def save_snapshot(self, path: str) -> None:
         """
-        Gets a course by its ID.
-        :param course_id: ID of course.
-        :return: Course with ID `course_id`.
+        Saves the fully built recommendation system as a single-file snapshot (see `snapshot` module): predictor model
+        (and its compiled forest, if it has one), graduates, utility matrices, courses and ANN index.
+        Predictor must have a `model` (as `ChancePredictor` has), a custom similarity function must be picklable.
+        :param path: Path of snapshot file.
         """
-        row: pd.DataFrame = self.__courses_df[self.__courses_df[src_data.C_COURSE_ID] == course_id]
-        if row.empty:
-            raise ValueError(f"No course {course_id}")
-        assert 1 == len(row) # course ID should be unique
+        model: Optional[Any] = getattr(self.__chance_predictor, "model", None)
+        if model is None:
+            raise ValueError("Only a recommendation system whose predictor has a model can be saved as a snapshot")
+        header: Dict[str, Any] = {
+            "identity": self.__identity,
+            "k": self.__k,
+            "columns": self.__graduates_df.columns.tolist(),
+            "index_name": self.__graduates_df.index.name,
+            "predictor_fingerprint": getattr(self.__chance_predictor, "fingerprint", None),
+            "dataset_source": self.__dataset_source,
+            "courses": [[int(course.id), course.name] for course in self.__courses.values()],
+            "actions": [self.__items[column].id for column in self.__action_columns],
+            "item_courses": [int(self.__items[column].id) for column in self.__course_columns]
+        }
+        arrays: Dict[str, np.ndarray] = {
+            "graduates": self.__graduates_df.to_numpy(dtype=float),
+            "graduates_index": self.__graduates_df.index.to_numpy(),
+            "actions_utility": self.__items_utility[0],
+            "courses_utility": self.__items_utility[1],
+            "model": RecSys.__pickled(model)
+        }
+        compiled: Optional[CompiledForest] = getattr(self.__chance_predictor, "compiled", None)
+        if compiled is not None:
+            header["forest_feature_names"] = compiled.feature_names
+            arrays.update({f"forest.{name}": array for name, array in compiled.arrays.items()})
+        if self.__graduates_matrix is None:
+            arrays["similarity"] = RecSys.__pickled(self.__similarity_func)
+        else:
+            arrays["graduates_matrix"] = self.__graduates_matrix
+        if self.__ann_index is not None:
+            header["ann_probe"] = self.__ann_index.n_probe
+            arrays.update({f"ann.{name}": array for name, array in self.__ann_index.arrays.items()})
+        with profiling.span("snapshot_write"):
+            snapshot.write_bundle(path, header, arrays)
 
-        course_name: str = row[src_data.C_COURSE_NAME].values[0]
-        
-        return Course(id=course_id, name=course_name)
-    
     @staticmethod
-    def __get_items_max_score(scores: Dict[T, float], count: int) -> List[ItemScorePair[T]]:
-        """
-        Given a dictionary of scores, gets `count` items with the highest positive score.
-        :param scores: A dictionary of scores.
-        :param count: Amount of items to return.
-        :return: `count` items with maximum score in `scores` (key and value).
-        """
-        sorted_by_score: List[Tuple[T, float]] = sorted(scores.items(), key=lambda item: item[1], reverse=True)
-        trim_end: int = count
-        for i in range(count):
-            if sorted_by_score[i][1] <= 0: # if non-positive score
-                trim_end = i # trim before non-positive score
-                break
-        return sorted_by_score[:trim_end]
-        
+    def load_snapshot(path: str) -> 'RecSys':
+        """
+        Loads a recommendation system saved by `save_snapshot`. Arrays are mapped into memory rather than copied, and
+        nothing is rebuilt or predicted - the predictor loads its compiled forest (or model) on first prediction.
+        Warns if the snapshot was built from the default dataset and the dataset file has changed since.
+        :param path: Path of snapshot file.
+        :return: Loaded recommendation system.
+        """
+        with profiling.span("snapshot_read"):
+            header, arrays = snapshot.read_bundle(path)
+        dataset_source: Optional[str] = header.get("dataset_source")
+        if dataset_source is not None and utils.file_exists(DEFAULT_DATASET_PATH) and \
+                dataset_source != course_manifest.source_hash(DEFAULT_DATASET_PATH):
+            warnings.warn(f"Snapshot \"{path}\" is stale, \"{DEFAULT_DATASET_PATH}\" changed since it was built "
+                          f"(rebuild it by running build_snapshot.py)")
+        forest_arrays: Dict[str, np.ndarray] = {name.split(".", 1)[1]: array for name, array in arrays.items()
+                                                if name.startswith("forest.")}
+        load_compiled: Optional[Callable[[], CompiledForest]] = None
+        if 0 < len(forest_arrays):
+            load_compiled = lambda: CompiledForest(forest_arrays, header["forest_feature_names"])
+
+        rec_sys: RecSys = RecSys.__new__(RecSys)
+        rec_sys.__chance_predictor = ChancePredictor.ChancePredictor(
+            lambda: pickle.loads(arrays["model"].tobytes()), fingerprint=header["predictor_fingerprint"],
+            load_compiled=load_compiled
+        )
+        rec_sys.__similarity_func = pickle.loads(arrays["similarity"].tobytes()) if "similarity" in arrays \
+            else DEFAULT_SIMILARITY_FUNC
+        rec_sys.__k = header["k"]
+        rec_sys.__dataset_source = dataset_source
+        rec_sys.__graduates_df = pd.DataFrame(arrays["graduates"], columns=header["columns"], copy=False,
+                                              index=pd.Index(arrays["graduates_index"], name=header["index_name"]))
+        rec_sys.__courses = {course_id: Course(course_id, name) for course_id, name in header["courses"]}
+        rec_sys.__graduates_matrix = arrays.get("graduates_matrix")
+        rec_sys.__ann_index = None
+        if "ann_probe" in header:
+            rec_sys.__ann_index = neighbors.IvfIndex.from_arrays(
+                {name.split(".", 1)[1]: array for name, array in arrays.items() if name.startswith("ann.")},
+                rec_sys.__graduates_matrix, header["ann_probe"]
+            )
+        rec_sys.__identity = header["identity"]
+        rec_sys.__items_utility = [arrays["actions_utility"], arrays["courses_utility"]]
+        rec_sys.__items = [StudentAction(action_id) for action_id in header["actions"]] + \
+            [rec_sys.__courses[course_id] for course_id in header["item_courses"]]
+        rec_sys.__action_columns = np.arange(len(header["actions"]))
+        rec_sys.__course_columns = np.arange(len(header["actions"]), len(rec_sys.__items))
+        return rec_sys
+
     @staticmethod
-    def __predict_scores(utility_df: pd.DataFrame,
-                         similar_indices: pd.Index,
-                         similarity_scores: FloatSeries,
-                         item_type: Callable[[str], T]) -> Dict[T, float]:
-        """
-        Predicts recommendation score based on utility dataframe.
-        :param utility_df: Utility dataframe.
-        :param simialr_indices: Indices of users most similar to user we're predicting for.
-        :param similarity_scores: Score of similarity between each user and the user we're predicting for.
-        :param item_type: Type of recommended item (utility columns).
-        :return: A dictionary of item scores.
-        """
-        total_similarity: float = similarity_scores[similar_indices].sum()
-        scores: Dict[T, float] = dict()
-        for column in utility_df.columns:
-            utility_values: FloatSeries = utility_df.loc[similar_indices, column] # similar graduates utility values
-            actions_weighted_sum: float = (similarity_scores[similar_indices] * utility_values).sum()
-            scores[item_type(column)] = actions_weighted_sum / total_similarity if 0 != total_similarity else 0
-        return scores
-    
+    def __get_ann_index(cache_name: Optional[str], data_fingerprint: str, graduates_matrix: np.ndarray,
+                        n_lists: int, n_probe: int) -> neighbors.IvfIndex:
+        """
+        Gets approximate nearest-neighbour index over graduates, built once and reused from cache.
+        :param cache_name: Name to use for cache, `None` to not use cache.
+        :param data_fingerprint: Fingerprint of dataset graduates are taken from.
+        :param graduates_matrix: Row-normalized graduates matrix.
+        :param n_lists: Amount of index clusters.
+        :param n_probe: Amount of clusters probed per query.
+        :return: ANN index.
+        """
+        def gen_func() -> neighbors.IvfIndex:
+            return neighbors.IvfIndex(graduates_matrix, n_lists, n_probe)
+        if cache_name is None:
+            return gen_func()
+        index_path: str = utils.cache_path(cache_name, "npz")
+        return utils.get_cached_entry(gen_func, cache_name, {"data": data_fingerprint, "lists": n_lists},
+                                      read_func=lambda: neighbors.IvfIndex.load(index_path, graduates_matrix, n_probe),
+                                      write_func=lambda index: utils.atomic_write(index_path, index.save))
+
+    @staticmethod
+    def __pickled(obj: Any) -> np.ndarray:
+        """
+        Pickles an object into a byte array (to store in a snapshot).
+        :param obj: Object to pickle.
+        :return: Array of pickled bytes.
+        """
+        return np.frombuffer(pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL), dtype=np.uint8)
+
+    @staticmethod
+    def __aligned_values(df: pd.DataFrame, index: pd.Index) -> np.ndarray:
+        """
+        Gets values of a dataframe with rows ordered by `index`, without copying them if already ordered so
+        (e.g. keeps memory-mapped utility matrices shared).
+        :param df: Dataframe to get its values.
+        :param index: Row order of values.
+        :return: Values of `df` ordered by `index`.
+        """
+        return df.to_numpy() if df.index.equals(index) else df.loc[index].to_numpy()
+
+    @staticmethod
+    def __org_chances_getter(cache_name: Optional[str],
+                             cache_manifest: Dict[str, Any],
+                             graduates_df: pd.DataFrame,
+                             graduate_keys: pd.Index,
+                             chance_predictor: Callable[[pd.Series], float]) -> Callable[[pd.Index], FloatSeries]:
+        """
+        Gets a function that gets graduates' original predicted chances. Chances of all graduates are read from cache
+        (only predicting those of new keys) on the function's first call, so nothing is read or predicted unless
+        utility rows are computed.
+        :param cache_name: Name to use for cache, `None` to not use cache.
+        :param cache_manifest: Identity of graduates' columns and predictor (same as of utility matrices), cache is
+                               rebuilt if it changes.
+        :param graduates_df: Graduate students dataframe.
+        :param graduate_keys: Row key of each graduate.
+        :param chance_predictor: A function that receives a student, and predicts their chance of graduating.
+        :return: A function that receives unique row keys, and gets their graduates' chances (indexed by key).
+        """
+        org_chances: List[FloatSeries] = list() # chances of all graduates, once got
+
+        def gen_rows(keys: pd.Index) -> pd.DataFrame:
+            rows_df: pd.DataFrame = RecSys.__rows_of_keys(graduates_df, graduate_keys, keys)
+            with profiling.span("org_chances", rows=len(rows_df)):
+                return pd.DataFrame({"org_chance": ChancePredictor.predict_batch(chance_predictor, rows_df)},
+                                    index=rows_df.index)
+
+        def get_org_chances(keys: pd.Index) -> FloatSeries:
+            if 0 == len(org_chances):
+                keyed_df: pd.DataFrame = gen_rows(graduate_keys.unique()) if cache_name is None else \
+                    utils.get_incremental_cached_dataframe(gen_rows, cache_name, graduate_keys, cache_manifest,
+                                                           dtype="float64")
+                org_chances.append(keyed_df["org_chance"])
+            return org_chances[0].loc[keys]
+        return get_org_chances
+
     @staticmethod
     def __get_actions_utility_df(cache_name: Optional[str],
+                                 cache_manifest: Dict[str, Any],
                                  graduates_df: pd.DataFrame,
+                                 graduate_keys: pd.Index,
                                  chance_predictor: Callable[[pd.Series], float],
-                                 org_chances: FloatSeries) -> pd.DataFrame:
+                                 get_org_chances: Callable[[pd.Index], FloatSeries],
+                                 build_workers: Optional[int] = None) -> pd.DataFrame:
         """
         Gets actions utility dataframe - each row represents a student, each column an action.
         :param cache_name: Name to use for cache, `None` to not use cache.
+        :param cache_manifest: Identity of graduates' columns and predictor, cache is rebuilt if it changes.
         :param graduates_df: Graduate students dataframe.
+        :param graduate_keys: Row key of each graduate (see `src_data.row_keys`), only rows of keys missing from cache
+                              are computed.
         :param chance_predictor: A function that receives a student, and predicts their chance of graduating.
-        :param org_chances: Predicted graduation chances for original graduate samples in `graduates_df`.
-        :return: Actions utility dataframe.
-        """
-        def gen_func() -> pd.DataFrame:
-            cmp_df: pd.DataFrame = graduates_df.copy()
-
-            def calc_improve_add_course_type(course_time: int) -> FloatSeries:
-                # calculate improve effectiveness if adding `course_time` courses (V_DAY or V_NIGHT)
-                cmp_df[src_data.C_STUD_COURSE_TIME] = course_time # compare original with course time set to `course_time`
-                new_chances: FloatSeries = cmp_df.apply(chance_predictor, axis=1) # chances after adding `course_time` courses
-                improvement: FloatSeries = org_chances.combine(new_chances, utils.calc_improve) # calculate improve effectiveness
-                improvement[graduates_df[src_data.C_STUD_COURSE_TIME] == course_time] = utils.NO_IMPROVE # if was already `course_time`, no improvement
-                return improvement
-            add_day_improve: FloatSeries = calc_improve_add_course_type(src_data.V_DAY) # improve effectiveness of adding day courses
-            add_night_improve: FloatSeries = calc_improve_add_course_type(src_data.V_NIGHT) # improve effectiveness of adding night courses
-
-            def calc_improve_reduce_units(units: int) -> FloatSeries:
-                # calculate improve effectiveness if reducing `units` curricular units
-                total_units: pd.Series = (graduates_df[src_data.C_STUD_UNITS_SEM1] + graduates_df[src_data.C_STUD_UNITS_SEM2])
-                reduced_df: pd.DataFrame = graduates_df.copy() # DF with reduced units to use for comperation
-                # reduce half points from each semester, then compare:
-                mask = total_units >= units
-                reduced_df.loc[mask, src_data.C_STUD_UNITS_SEM1] = (
-                    graduates_df.loc[mask, src_data.C_STUD_UNITS_SEM1] - units / 2
-                ).clip(lower=0)
-                reduced_df.loc[mask, src_data.C_STUD_UNITS_SEM2] = (
-                    graduates_df.loc[mask, src_data.C_STUD_UNITS_SEM2] - units / 2
-                ).clip(lower=0)
-                new_chances: FloatSeries = reduced_df.apply(chance_predictor, axis=1)
-                improvement: FloatSeries = org_chances.combine(new_chances, utils.calc_improve) # calculate improve effectiveness
-                improvement[(graduates_df[src_data.C_STUD_UNITS_SEM1] + graduates_df[src_data.C_STUD_UNITS_SEM2])
-                            < units] = utils.NO_IMPROVE # if couldn't reduce (not enough units), no improvement
-                return improvement
-            # for i=1..3, calculate improve effectiveness of reducing i average courses:
-            reduce1_improve: FloatSeries = calc_improve_reduce_units(1 * AVG_COURSE_UNITS)
-            reduce2_improve: FloatSeries = calc_improve_reduce_units(2 * AVG_COURSE_UNITS)
-            reduce3_improve: FloatSeries = calc_improve_reduce_units(3 * AVG_COURSE_UNITS)
-            
-            return pd.DataFrame({
-                StudentAction.ADD_DAY_COURSES.id: add_day_improve,
-                StudentAction.ADD_NIGHT_COURSES.id: add_night_improve,
-                StudentAction.REDUCE1.id: reduce1_improve,
-                StudentAction.REDUCE2.id: reduce2_improve,
-                StudentAction.REDUCE3.id: reduce3_improve
-            })
-
-        return gen_func() if cache_name is None else utils.get_cached_dataframe(gen_func, cache_name)
+        :param get_org_chances: A function that gets graduates' original predicted chances, by row keys.
+        :param build_workers: Amount of workers building columns in parallel, `None` for default.
+        :return: Actions utility dataframe, indexed by row keys.
+        """
+        actions: List[StudentAction] = [StudentAction.ADD_DAY_COURSES, StudentAction.ADD_NIGHT_COURSES,
+                                        StudentAction.REDUCE1, StudentAction.REDUCE2, StudentAction.REDUCE3]
+
+        def gen_rows(keys: pd.Index) -> pd.DataFrame:
+            rows_df: pd.DataFrame = RecSys.__rows_of_keys(graduates_df, graduate_keys, keys)
+            org_chances: FloatSeries = get_org_chances(keys) # original predicted chances of (new) graduates
+
+            def build_column(action: StudentAction) -> FloatSeries:
+                with profiling.span("utility_column", item=action.id):
+                    return what_if.improvements(rows_df, [action], chance_predictor, org_chances.to_numpy())[action.id]
+
+            columns: List[FloatSeries] = parallel.map_ordered(build_column, actions,
+                                                              build_workers, "Building actions utility")
+            return pd.DataFrame({action.id: column for action, column in zip(actions, columns)})
+
+        manifest: Dict[str, Any] = {
+            **cache_manifest,
+            "actions": [action.id for action in actions],
+            "avg_course_units": AVG_COURSE_UNITS
+        }
+        return RecSys.__get_keyed_utility_df(gen_rows, cache_name, manifest, graduate_keys)
 
     @staticmethod
     def __get_courses_utility_df(cache_name: Optional[str],
+                                 cache_manifest: Dict[str, Any],
                                  graduates_df: pd.DataFrame,
+                                 graduate_keys: pd.Index,
                                  chance_predictor: Callable[[pd.Series], float],
-                                 org_chances: FloatSeries,
-                                 courses: Iterable[int]) -> pd.DataFrame:
+                                 get_org_chances: Callable[[pd.Index], FloatSeries],
+                                 courses: List[int],
+                                 build_workers: Optional[int] = None) -> pd.DataFrame:
         """
         Gets curses utility dataframe - each row represents a student, each column a course.
         :param cache_name: Name to use for cache, `None` to not use cache.
+        :param cache_manifest: Identity of graduates' columns and predictor, cache is rebuilt if it changes.
         :param graduates_df: Graduate students dataframe.
+        :param graduate_keys: Row key of each graduate (see `src_data.row_keys`), only rows of keys missing from cache
+                              are computed.
         :param chance_predictor: A function that receives a student, and predicts their chance of graduating.
-        :param org_chances: Predicted graduation chances for original graduate samples in `graduates_df`.
+        :param get_org_chances: A function that gets graduates' original predicted chances, by row keys.
         :param courses: All available courses (IDs).
-        :return: Courses utility dataframe.
+        :param build_workers: Amount of workers building columns in parallel, `None` for default.
+        :return: Courses utility dataframe, indexed by row keys.
         """
-        cmp_df: pd.DataFrame = graduates_df.copy()
-        
-        def gen_func() -> pd.DataFrame:
+        def gen_rows(keys: pd.Index) -> pd.DataFrame:
+            rows_df: pd.DataFrame = RecSys.__rows_of_keys(graduates_df, graduate_keys, keys)
+            org_chances: FloatSeries = get_org_chances(keys) # original predicted chances of (new) graduates
+
             def calc_improve_with_course(course: int) -> FloatSeries:
                 # calculate improve effectiveness if enrolling in course `course`
+                cmp_df: pd.DataFrame = rows_df.copy()
                 cmp_df[src_data.C_STUD_COURSE] = course # compare original with course set to `course`
-                new_chances: FloatSeries = cmp_df.apply(chance_predictor, axis=1) # chances after enrolling in course `course`
-                improvement: FloatSeries = org_chances.combine(new_chances, utils.calc_improve) # calculate improve effectiveness
-                improvement[graduates_df[src_data.C_STUD_COURSE] == course] = utils.NO_IMPROVE # if was already `course`, no improvement
+                new_chances: FloatSeries = pd.Series( # chances after enrolling in course `course`
+                    ChancePredictor.predict_batch(chance_predictor, cmp_df), index=cmp_df.index
+                )
+                improvement: FloatSeries = utils.calc_improve(org_chances, new_chances) # calculate improve effectiveness
+                improvement[rows_df[src_data.C_STUD_COURSE] == course] = utils.NO_IMPROVE # if was already `course`, no improvement
                 return improvement
-            # calculate improvement of each course:
-            courses_improve: Dict[int, FloatSeries] = {
-                cid: calc_improve_with_course(cid) for cid in courses
-            }
-            return pd.DataFrame(courses_improve)
-        return gen_func() if cache_name is None else utils.get_cached_dataframe(gen_func, cache_name)
+
+            def build_column(course: int) -> FloatSeries:
+                with profiling.span("utility_column", item=course):
+                    return calc_improve_with_course(course)
+
+            # calculate improvement of each course (in parallel, columns are independent):
+            columns: List[FloatSeries] = parallel.map_ordered(build_column, courses,
+                                                              build_workers, "Building courses utility")
+            return pd.DataFrame(dict(zip(courses, columns)))
+
+        manifest: Dict[str, Any] = {**cache_manifest, "courses": courses}
+        return RecSys.__get_keyed_utility_df(gen_rows, cache_name, manifest, graduate_keys)
+
+    @staticmethod
+    def __get_keyed_utility_df(gen_rows: Callable[[pd.Index], pd.DataFrame],
+                               cache_name: Optional[str],
+                               manifest: Dict[str, Any],
+                               graduate_keys: pd.Index) -> pd.DataFrame:
+        """
+        Gets a utility dataframe indexed by graduates' row keys, from cache (only computing rows of new keys) if used.
+        :param gen_rows: A function that receives unique row keys, and computes their utility rows.
+        :param cache_name: Name to use for cache, `None` to not use cache.
+        :param manifest: Identity of everything (other than graduates) the utility dataframe is generated from.
+        :param graduate_keys: Row key of each graduate.
+        :return: Utility dataframe, indexed by row keys.
+        """
+        if cache_name is None:
+            return gen_rows(graduate_keys.unique())
+        return utils.get_incremental_cached_dataframe(gen_rows, cache_name, graduate_keys, manifest,
+                                                      dtype=UTILITY_DTYPE)
+
+    @staticmethod
+    def __rows_of_keys(graduates_df: pd.DataFrame, graduate_keys: pd.Index, keys: pd.Index) -> pd.DataFrame:
+        """
+        Gets graduates' rows of given row keys.
+        :param graduates_df: Graduate students dataframe.
+        :param graduate_keys: Row key of each graduate.
+        :param keys: Unique row keys to get rows of.
+        :return: Rows of `keys` (one per key, identical graduates share a key), indexed by key.
+        """
+        keyed_df: pd.DataFrame = graduates_df.set_axis(graduate_keys, axis=0)
+        return keyed_df[~keyed_df.index.duplicated()].loc[keys]
@@ -0,0 +1,122 @@
+"""
+Holds `ResultCache` class, a bounded, expiring cache of recommendation results.
+Used by recommendation system (single-student recommendations, server).
+"""
+
+
+from typing import Callable, Hashable, TypeVar, Optional, Tuple, Dict, Any
+from collections import OrderedDict
+import threading
+import profiling
+import time
+
+
+T = TypeVar('T') # used for generics later
+
+
+class ResultCache:
+    """
+    Cache of results (e.g. a student's recommendations), shared by threads.
+    Results are dropped once older than the TTL, and the least recently used ones are evicted once the cache is full.
+    Entries belong to the recommendation system they were computed by (its `identity`), so all of them are dropped as
+    soon as a result of another system is requested - e.g. once the system is rebuilt after its data, utility matrices
+    cache or predictor model changed.
+    Cached results are shared between callers, and mustn't be modified.
+    """
+    def __init__(self, max_size: int, ttl: float, clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        Initializes a result cache instance.
+        :param max_size: Amount of results kept (at most).
+        :param ttl: Time (in seconds) a result is kept for.
+        :param clock: A function returning current time (in seconds).
+        """
+        if max_size < 1:
+            raise ValueError(f"Invalid result cache size: {max_size}")
+        if ttl <= 0:
+            raise ValueError(f"Invalid result cache TTL: {ttl}")
+        self.__max_size: int = max_size
+        self.__ttl: float = ttl
+        self.__clock: Callable[[], float] = clock
+        self.__identity: Optional[str] = None # identity of system entries were computed by
+        self.__entries: OrderedDict[Hashable, Tuple[float, Any]] = OrderedDict() # expiry time and result, LRU first
+        self.__lock: threading.Lock = threading.Lock()
+        self.__hits: int = 0
+        self.__misses: int = 0
+        self.__evictions: int = 0
+        self.__expirations: int = 0
+        self.__invalidations: int = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """
+        Statistics of cache: "hits", "misses", "evictions" (of full cache), "expirations" (of TTL), "invalidations"
+        (of all entries, on system change) - all since created, and current "size".
+        """
+        with self.__lock:
+            return {"hits": self.__hits, "misses": self.__misses, "evictions": self.__evictions,
+                    "expirations": self.__expirations, "invalidations": self.__invalidations,
+                    "size": len(self.__entries)}
+
+    def get_or_compute(self, identity: str, key: Hashable, compute_func: Callable[[], T]) -> T:
+        """
+        Gets a cached result, computing (and caching) it if missing or expired.
+        Result is computed outside the lock, so concurrent requests of other keys aren't blocked.
+        :param identity: Identity of system computing the result (e.g. `RecSys.identity`).
+        :param key: Key of result, within system (e.g. student vector and recommendation counts).
+        :param compute_func: A function that computes the result.
+        :return: Result.
+        """
+        with self.__lock:
+            result: Optional[Tuple[float, Any]] = self.__get(identity, key)
+        if result is not None:
+            return result[1]
+        value: T = compute_func()
+        with self.__lock:
+            if identity == self.__identity: # system wasn't replaced while computing
+                self.__put(key, value)
+        return value
+
+    def clear(self) -> None:
+        """
+        Drops all cached results.
+        """
+        with self.__lock:
+            self.__entries.clear()
+
+    def __get(self, identity: str, key: Hashable) -> Optional[Tuple[float, Any]]:
+        """
+        Gets a cached entry (marking it as most recently used), counting a hit or a miss. Lock must be held.
+        :param identity: Identity of system computing the result.
+        :param key: Key of result.
+        :return: Expiry time and result, `None` if missing or expired.
+        """
+        if identity != self.__identity: # results of another system, all stale
+            if 0 < len(self.__entries):
+                self.__invalidations += 1
+            self.__entries.clear()
+            self.__identity = identity
+        entry: Optional[Tuple[float, Any]] = self.__entries.get(key)
+        if entry is not None and entry[0] <= self.__clock():
+            del self.__entries[key]
+            self.__expirations += 1
+            entry = None
+        if entry is None:
+            self.__misses += 1
+            profiling.count("result_cache_misses")
+        else:
+            self.__hits += 1
+            profiling.count("result_cache_hits")
+            self.__entries.move_to_end(key)
+        return entry
+
+    def __put(self, key: Hashable, value: Any) -> None:
+        """
+        Caches a result, evicting least recently used results if cache is full. Lock must be held.
+        :param key: Key of result.
+        :param value: Result.
+        """
+        self.__entries[key] = (self.__clock() + self.__ttl, value)
+        self.__entries.move_to_end(key)
+        while self.__max_size < len(self.__entries):
+            self.__entries.popitem(last=False)
+            self.__evictions += 1
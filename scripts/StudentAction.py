@@ -6,6 +6,7 @@ Used in recommendation system.
 
 from typing import Callable, Tuple, Dict
 import pandas as pd
+import numpy as np
 import src_data
 
 
@@ -20,43 +21,76 @@ __ACT_REDUCE2: str = "reduce2"
 __ACT_REDUCE3: str = "reduce3"
 
 
-def set_student_course_time(student: pd.Series, course_time: int) -> pd.Series:
-    student[src_data.C_STUD_COURSE] = course_time
-    return student
+# transform of students by an action - receives students' dataframe, returns a new (transformed) dataframe
+Transform = Callable[[pd.DataFrame], pd.DataFrame]
 
-def reduce_student_units(student: pd.Series, units: int) -> pd.Series:
-    total_units: pd.Series = (student[src_data.C_STUD_UNITS_SEM1] + student[src_data.C_STUD_UNITS_SEM2])
-    if total_units >= units:
-        student.loc[src_data.C_STUD_UNITS_SEM1] = (
-            student.loc[src_data.C_STUD_UNITS_SEM1] - units / 2
-        )
-        student.loc[src_data.C_STUD_UNITS_SEM2] = (
-            student.loc[src_data.C_STUD_UNITS_SEM2] - units / 2
-        )
-    return student
+# applicability of an action - receives students' dataframe, returns whether the action changes each student
+Applicability = Callable[[pd.DataFrame], np.ndarray]
 
 
-# maps student action ID to description and apply function
-_STUDENT_ACTIONS: Dict[str, Tuple[str, Callable[[pd.Series], pd.Series]]] = {
+def set_course_time(students: pd.DataFrame, course_time: int) -> pd.DataFrame:
+    """
+    Sets students' course time.
+    :param students: Students' dataframe (not modified).
+    :param course_time: Course time to set (`src_data.V_DAY` or `src_data.V_NIGHT`).
+    :return: New dataframe of students, with course time set.
+    """
+    changed: pd.DataFrame = students.copy()
+    changed[src_data.C_STUD_COURSE_TIME] = course_time
+    return changed
+
+
+def reduce_units(students: pd.DataFrame, units: int) -> pd.DataFrame:
+    """
+    Reduces students' curricular units, half from each semester (but not below zero).
+    Students with less than `units` units in total are left as they are.
+    :param students: Students' dataframe (not modified).
+    :param units: Amount of units to reduce.
+    :return: New dataframe of students, with units reduced.
+    """
+    reduced: pd.DataFrame = students.copy()
+    mask: pd.Series = has_units(students, units)
+    for column in (src_data.C_STUD_UNITS_SEM1, src_data.C_STUD_UNITS_SEM2):
+        reduced.loc[mask, column] = (students.loc[mask, column] - units / 2).clip(lower=0)
+    return reduced
+
+
+def has_units(students: pd.DataFrame, units: int) -> pd.Series:
+    """
+    Checks which students have at least a given amount of curricular units (in both semesters).
+    :param students: Students' dataframe.
+    :param units: Amount of units.
+    :return: Whether each student has at least `units` units.
+    """
+    return (students[src_data.C_STUD_UNITS_SEM1] + students[src_data.C_STUD_UNITS_SEM2]) >= units
+
+
+# maps student action ID to description, transform, and applicability (students the action changes)
+_STUDENT_ACTIONS: Dict[str, Tuple[str, Transform, Applicability]] = {
     __ACT_ADD_DAY_COURSES: (
         "Prioritize daytime courses",
-        lambda student: set_student_course_time(student, src_data.V_DAY)
+        lambda students: set_course_time(students, src_data.V_DAY),
+        lambda students: (students[src_data.C_STUD_COURSE_TIME] != src_data.V_DAY).to_numpy()
     ),
     __ACT_ADD_NIGHT_COURSES: (
         "Prioritize nighttime courses",
-        lambda student: set_student_course_time(student, src_data.V_NIGHT)
+        lambda students: set_course_time(students, src_data.V_NIGHT),
+        lambda students: (students[src_data.C_STUD_COURSE_TIME] != src_data.V_NIGHT).to_numpy()
     ),
     __ACT_REDUCE1: (
         "Reduce one course from next semester",
-        lambda student: reduce_student_units(student, AVG_COURSE_UNITS)
+        lambda students: reduce_units(students, AVG_COURSE_UNITS),
+        lambda students: has_units(students, AVG_COURSE_UNITS).to_numpy()
     ),
     __ACT_REDUCE2: (
         "Reduce two courses from next semester",
-        lambda student: reduce_student_units(student, 2 * AVG_COURSE_UNITS)
+        lambda students: reduce_units(students, 2 * AVG_COURSE_UNITS),
+        lambda students: has_units(students, 2 * AVG_COURSE_UNITS).to_numpy()
     ),
     __ACT_REDUCE3: (
         "Reduce three courses from next semester",
-        lambda student: reduce_student_units(student, 3 * AVG_COURSE_UNITS)
+        lambda students: reduce_units(students, 3 * AVG_COURSE_UNITS),
+        lambda students: has_units(students, 3 * AVG_COURSE_UNITS).to_numpy()
     )
 }
 
@@ -77,10 +111,11 @@ class StudentAction:
         :param id: ID of action.
         :param description: Action description.
         """
-        description, apply = _STUDENT_ACTIONS[id]
+        description, transform, applicability = _STUDENT_ACTIONS[id]
         self.__id: str = id
         self.__description: str = description
-        self.__apply: Callable[[pd.Series], pd.Series] = apply
+        self.__transform: Transform = transform
+        self.__applicability: Applicability = applicability
 
     @property
     def id(self) -> str:
@@ -99,10 +134,26 @@ class StudentAction:
     def apply(self, student: pd.Series) -> pd.Series:
         """
         Applies action on student.
-        :param student: Student to apply action on.
-        :return: Student with applied action.
+        :param student: Student to apply action on (not modified).
+        :return: New student vector, with applied action.
+        """
+        return self.transform(pd.DataFrame([student])).iloc[0]
+
+    def transform(self, students: pd.DataFrame) -> pd.DataFrame:
+        """
+        Applies action on all students of a dataframe at once.
+        :param students: Students' dataframe (not modified).
+        :return: New dataframe of students, with applied action.
+        """
+        return self.__transform(students)
+
+    def applicable(self, students: pd.DataFrame) -> np.ndarray:
+        """
+        Checks which students an action changes (e.g. prioritizing daytime courses doesn't change daytime students).
+        :param students: Students' dataframe.
+        :return: Whether action changes each student, ordered as `students` rows.
         """
-        return self.__apply(student)
+        return self.__applicability(students)
     
     def __str__(self) -> str:
         """
@@ -7,12 +7,24 @@ Used for evaluating the recommendation system and its base predictor.
 from sklearn.metrics import accuracy_score, classification_report
 from sklearn.model_selection import train_test_split
 from sklearn.linear_model import LogisticRegression
-from typing import Optional, Callable
+from typing import Dict, Any
 import pandas as pd
 import numpy as np
+from ChancePredictor import ChancePredictor
+import model_store
 import src_data
 
 
+# path of CSV the baseline predictor is trained on
+DATA_PATH: str = "../data/cleaned_data.csv"
+
+# name of baseline model in model store
+MODEL_NAME: str = "baseline_logistic_regression"
+
+# all training settings, model is retrained whenever any of them changes
+TRAIN_PARAMS: Dict[str, Any] = {"model": {}, "test_size": 0.2, "split_random_state": 435}
+
+
 def __train_baseline_model() -> LogisticRegression:
     """
     Trains student graduation chance baseline predictor.
@@ -21,7 +33,7 @@ def __train_baseline_model() -> LogisticRegression:
     print("\nBaseline training started\n")
 
     # retreive data from CSV
-    data: src_data.PrimaryData = src_data.PrimaryData.read_csv("../data/cleaned_data.csv")
+    data: src_data.PrimaryData = src_data.PrimaryData.read_csv(DATA_PATH)
     X, y = data.get_students_df_and_labels()
 
     # only work on students we know if graduated or dropped out
@@ -32,10 +44,11 @@ def __train_baseline_model() -> LogisticRegression:
     y = y.map({"Graduate": 1, "Dropout": 0})
 
     # split into train and test for chance estimation model (used for generating utility matrices later)
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=435)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=TRAIN_PARAMS["test_size"],
+                                                        random_state=TRAIN_PARAMS["split_random_state"])
 
     # initialize and train chace estimation model
-    model: LogisticRegression = LogisticRegression()
+    model: LogisticRegression = LogisticRegression(**TRAIN_PARAMS["model"])
     model.fit(X_train, y_train.to_numpy())
 
     y_pred = model.predict(X_test)
@@ -44,18 +57,34 @@ def __train_baseline_model() -> LogisticRegression:
     print("Accuracy:", accuracy_score(y_test, y_pred))
     print("\nClassification Report:\n", classification_report(y_test, y_pred))
 
+    print("\nBaseline training ended\n")
     return model
 
 
-def get_predictor() -> Callable[[pd.Series], float]:
+def model_fingerprint() -> str:
+    """
+    Gets fingerprint of baseline model, identifying its stored version.
+    :return: Baseline model fingerprint.
+    """
+    return model_store.fingerprint(DATA_PATH, TRAIN_PARAMS)
+
+
+def train_and_publish() -> str:
+    """
+    Trains baseline model and publishes it to the model store.
+    :return: Path of published model artifact.
+    """
+    return model_store.publish_model(MODEL_NAME, model_fingerprint(), __train_baseline_model(), TRAIN_PARAMS)
+
+
+def get_predictor(allow_train: bool = True) -> ChancePredictor:
     """
-    Gets a student graduation chance predictor, which is trained on first predict call.
-    :return: Trained predictor, in the form of a callable.
+    Gets a student graduation chance predictor, which is loaded from the model store on first predict call
+    (and trained, if not stored yet).
+    :param allow_train: `False` to never train on missing model (for serving processes).
+    :return: Trained predictor, callable on a single student and supporting batched prediction.
     """
-    model: Optional[LogisticRegression] = None
-    def func(student: pd.Series) -> float:
-        nonlocal model
-        if model is None:
-            model = __train_baseline_model()
-        return float(model.predict_proba(pd.DataFrame([student]))[0, 1])
-    return func
+    model_fp: str = model_fingerprint()
+    def load_model() -> LogisticRegression:
+        return model_store.get_model(MODEL_NAME, model_fp, TRAIN_PARAMS, __train_baseline_model, allow_train)
+    return ChancePredictor(load_model, fingerprint=model_fp)
@@ -0,0 +1,249 @@
+"""
+Benchmarks the recommendation stack (recommendation system, predictor and cache), on the bundled dataset and on
+synthetically scaled datasets (each student repeated with a small jitter of admission grade, so rows stay distinct).
+Results are written as JSON, so runs can be compared across commits (see "--compare").
+Measured for each scale:
+- construction of recommendation system with an empty cache, and with a warm cache,
+- utility matrices build time (uncached construction, less warm construction),
+- warm single-student recommendation latency (p50/p95/p99, as `recommendation.recommend`),
+- batch throughput of CSV mode (chunked read, batched prediction and recommendation),
+- predictor latency of a single row, and per row of a batch,
+- peak RSS of the process (scales run in ascending order, so it's the peak of the largest scale so far).
+Usage:
+python benchmark.py
+[--scales <Comma-separated amounts of times dataset is repeated, default is 1,4>]
+[--queries <Amount of single-student recommendations measured, default is 200>]
+[--input <CSV of students recommended in queries and batch mode, default is ../data/enrolled.csv>]
+[--chunk-size <Number of rows read and recommended at once in batch mode, default is 1000>]
+[--output-json <Path of output JSON file, results are only printed if not provided>]
+[--compare <Path of JSON results of a previous run, to print relative change of each result>]
+"""
+
+
+from typing import Callable, Optional, Dict, List, Any
+from src_data import PrimaryData
+from RecSys import RecSys, DEFAULT_DATASET_PATH
+import pandas as pd
+import numpy as np
+import recommendation
+import predictor
+import platform
+import resource
+import subprocess
+import tempfile
+import sklearn
+import json
+import time
+import os
+import utils
+import cli
+
+
+FIELD_SCALES: cli.InputField = cli.InputField(str, "Comma-separated amounts of times dataset is repeated", "--scales",
+                                              default="1,4")
+FIELD_QUERIES: cli.InputField = cli.InputField(int, "Amount of single-student recommendations measured", "--queries",
+                                               default=200)
+FIELD_INPUT: cli.InputField = cli.InputField(str, "CSV of students recommended", "--input",
+                                             default="../data/enrolled.csv")
+FIELD_CHUNK_SIZE: cli.InputField = cli.InputField(int, "Number of rows read and recommended at once in batch mode",
+                                                  "--chunk-size", default=1000)
+FIELD_OUTPUT_JSON: cli.InputField = cli.InputField(str, "Path of output JSON file", "--output-json")
+FIELD_COMPARE: cli.InputField = cli.InputField(str, "Path of JSON results of a previous run", "--compare")
+BENCHMARK_INPUT_FIELDS: List[cli.InputField] = [FIELD_SCALES, FIELD_QUERIES, FIELD_INPUT, FIELD_CHUNK_SIZE,
+                                                FIELD_OUTPUT_JSON, FIELD_COMPARE]
+
+# column jittered in repeated students, and maximal jitter
+C_JITTER: str = "Admission grade"
+JITTER: float = 0.01
+SEED: int = 0
+
+# cache names of utility matrices
+ACTIONS_UTILITY_CACHE_NAME: str = "actions_utility"
+COURSES_UTILITY_CACHE_NAME: str = "courses_utility"
+
+# cache name of graduates' original predicted chances
+ORG_CHANCES_CACHE_NAME: str = "org_chances"
+
+
+def scaled_df(df: pd.DataFrame, scale: int, rng: np.random.Generator) -> pd.DataFrame:
+    """
+    Scales a dataset up synthetically.
+    :param df: Dataset (students and target labels).
+    :param scale: Amount of times dataset is repeated (first copy is left as is).
+    :param rng: Random generator of jitter.
+    :return: Scaled dataset.
+    """
+    copies: List[pd.DataFrame] = [df]
+    for _ in range(scale - 1):
+        copy: pd.DataFrame = df.copy()
+        copy[C_JITTER] = copy[C_JITTER] + rng.uniform(-JITTER, JITTER, len(copy))
+        copies.append(copy)
+    return pd.concat(copies, ignore_index=True)
+
+
+def timed(func: Callable[[], Any]) -> float:
+    """
+    Times a function call.
+    :param func: Function to call.
+    :return: Wall time of call (in seconds).
+    """
+    start: float = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def peak_rss_mb() -> float:
+    """
+    Gets peak resident set size of this process.
+    :return: Peak RSS (in MB).
+    """
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 # reported in KB on Linux
+
+
+def benchmark_scale(df: pd.DataFrame, students: pd.DataFrame, n_queries: int, input_csv_path: str, chunk_size: int,
+                    chance_predictor: Callable[[pd.Series], float]) -> Dict[str, float]:
+    """
+    Benchmarks the recommendation stack on a dataset, with a fresh (temporary) cache.
+    :param df: Dataset (students and target labels) recommendation system is built on.
+    :param students: Students recommended in single-student queries.
+    :param n_queries: Amount of single-student recommendations measured.
+    :param input_csv_path: CSV of students recommended in batch mode.
+    :param chunk_size: Number of rows read and recommended at once in batch mode.
+    :param chance_predictor: Predictor used by recommendation system (already loaded).
+    :return: Benchmark results.
+    """
+    def construct(cached: bool = True) -> RecSys:
+        return RecSys(chance_predictor=chance_predictor, primary_data=PrimaryData(df),
+                      actions_utility_cache_name=ACTIONS_UTILITY_CACHE_NAME if cached else None,
+                      courses_utility_cache_name=COURSES_UTILITY_CACHE_NAME if cached else None,
+                      org_chances_cache_name=ORG_CHANCES_CACHE_NAME if cached else None)
+
+    org_cache_root: str = utils.CACHE_ROOT
+    try:
+        with tempfile.TemporaryDirectory() as cache_root:
+            utils.CACHE_ROOT = cache_root
+            construct_cold: float = timed(construct)
+            construct_warm: float = timed(construct)
+            construct_uncached: float = timed(lambda: construct(cached=False))
+            rec_sys: RecSys = construct()
+    finally:
+        utils.CACHE_ROOT = org_cache_root
+
+    query_dicts: List[dict] = [row.to_dict() for _, row in students.head(n_queries).iterrows()]
+    query_times: np.ndarray = np.array([
+        timed(lambda: recommendation.recommend(student_dict, 5, 5, rec_sys)) for student_dict in query_dicts
+    ])
+
+    def recommend_csv() -> int:
+        count: int = 0
+        for chunk in pd.read_csv(input_csv_path, chunksize=chunk_size):
+            chunk = chunk.drop(columns=["Target"])
+            rec_sys.predict_chances(chunk)
+            count += len(rec_sys.recommend_many(chunk))
+        return count
+    batch_rows: int = recommend_csv() # warm up (and count rows)
+    batch_time: float = timed(recommend_csv)
+
+    single_predict_times: np.ndarray = np.array([
+        timed(lambda: chance_predictor(row)) for _, row in students.head(n_queries).iterrows()
+    ])
+    batch_predict_time: float = timed(lambda: rec_sys.predict_chances(students))
+
+    return {
+        "graduates": int((df["Target"] == "Graduate").sum()),
+        "construct_cold_s": construct_cold,
+        "construct_warm_s": construct_warm,
+        "utility_build_s": construct_uncached - construct_warm,
+        "recommend_p50_ms": 1000 * float(np.percentile(query_times, 50)),
+        "recommend_p95_ms": 1000 * float(np.percentile(query_times, 95)),
+        "recommend_p99_ms": 1000 * float(np.percentile(query_times, 99)),
+        "batch_rows_per_s": batch_rows / batch_time,
+        "predict_single_ms": 1000 * float(np.median(single_predict_times)),
+        "predict_batch_row_ms": 1000 * batch_predict_time / len(students),
+        "peak_rss_mb": peak_rss_mb()
+    }
+
+
+def metadata() -> Dict[str, Any]:
+    """
+    Gets metadata identifying a benchmark run (commit and environment).
+    :return: Metadata of run.
+    """
+    try:
+        commit: Optional[str] = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                               check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {"commit": commit, "time": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+            "numpy": np.__version__, "pandas": pd.__version__, "sklearn": sklearn.__version__,
+            "cpus": os.cpu_count()}
+
+
+def benchmark(scales: List[int], n_queries: int, input_csv_path: str, chunk_size: int) -> Dict[str, Any]:
+    """
+    Benchmarks the recommendation stack on the bundled dataset scaled by each scale.
+    :param scales: Amounts of times dataset is repeated.
+    :param n_queries: Amount of single-student recommendations measured.
+    :param input_csv_path: CSV of students recommended in queries and batch mode.
+    :param chunk_size: Number of rows read and recommended at once in batch mode.
+    :return: Benchmark results (metadata, and results of each scale).
+    """
+    rng: np.random.Generator = np.random.default_rng(SEED)
+    df: pd.DataFrame = pd.read_csv(DEFAULT_DATASET_PATH)
+    students: pd.DataFrame = pd.read_csv(input_csv_path).drop(columns=["Target"])
+    chance_predictor = predictor.get_predictor()
+    chance_predictor.model, chance_predictor.compiled # load models ahead, so they aren't measured
+
+    results: Dict[str, Dict[str, float]] = dict()
+    for scale in sorted(scales): # ascending, so peak RSS is of current scale
+        results[str(scale)] = benchmark_scale(scaled_df(df, scale, rng), students, n_queries, input_csv_path,
+                                              chunk_size, chance_predictor)
+    return {"meta": metadata(), "scales": results}
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    """
+    Prints relative change of each result from a baseline run.
+    :param results: Results of this run.
+    :param baseline: Results of baseline run.
+    """
+    print(f"\nCompared with {baseline['meta'].get('commit')}:")
+    for scale, scale_results in results["scales"].items():
+        for name, value in scale_results.items():
+            base_value: Optional[float] = baseline["scales"].get(scale, {}).get(name)
+            if base_value: # skip missing (and zero) results
+                print(f"scale {scale:>3} {name:>22}: {base_value:12.3f} -> {value:12.3f} "
+                      f"({100 * (value - base_value) / base_value:+.1f}%)")
+
+
+def main() -> None:
+    """
+    Main function to be called when running as main module.
+    Runs benchmark and outputs results.
+    """
+    bench_dict, = cli.parse_args(BENCHMARK_INPUT_FIELDS)
+    results: Dict[str, Any] = benchmark(
+        [int(scale) for scale in bench_dict[FIELD_SCALES.field_name].split(",")],
+        bench_dict[FIELD_QUERIES.field_name],
+        bench_dict[FIELD_INPUT.field_name],
+        bench_dict[FIELD_CHUNK_SIZE.field_name]
+    )
+
+    for scale, scale_results in results["scales"].items():
+        print(f"Scale {scale}:")
+        for name, value in scale_results.items():
+            print(f"{name:>22}: {value:.3f}")
+
+    output_json_path: Optional[str] = bench_dict[FIELD_OUTPUT_JSON.field_name]
+    if output_json_path is not None:
+        with open(output_json_path, "w") as file:
+            json.dump(results, file, indent=4)
+
+    compare_json_path: Optional[str] = bench_dict[FIELD_COMPARE.field_name]
+    if compare_json_path is not None:
+        with open(compare_json_path, "r") as file:
+            compare(results, json.load(file))
+
+
+if __name__ == "__main__":
+    main()
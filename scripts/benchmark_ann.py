@@ -0,0 +1,119 @@
+"""
+Benchmarks approximate nearest-neighbour (IVF) search of graduates against exact search.
+Graduates are synthetically scaled up (each graduate repeated with small multiplicative noise), so recall and latency
+can be measured at sizes larger than the dataset.
+Usage:
+python benchmark_ann.py
+[--scale <Amount of times graduates are repeated, default is 100>]
+[--lists <Amount of index clusters, default is 256>]
+[--probes <Comma-separated amounts of clusters probed per query, default is 1,4,8,16>]
+[--k <Amount of nearest neighbours, default is 5>]
+[--queries <Amount of queries, default is 200>]
+[--output-json <Path of output JSON file, results are only printed if not provided>]
+"""
+
+
+from typing import Dict, List, Any
+from src_data import PrimaryData
+import neighbors
+import numpy as np
+import RecSys
+import json
+import time
+import cli
+
+
+FIELD_SCALE: cli.InputField = cli.InputField(int, "Amount of times graduates are repeated", "--scale", default=100)
+FIELD_LISTS: cli.InputField = cli.InputField(int, "Amount of index clusters", "--lists", default=256)
+FIELD_PROBES: cli.InputField = cli.InputField(str, "Comma-separated amounts of clusters probed per query", "--probes",
+                                              default="1,4,8,16")
+FIELD_K: cli.InputField = cli.InputField(int, "Amount of nearest neighbours", "--k", default=5)
+FIELD_QUERIES: cli.InputField = cli.InputField(int, "Amount of queries", "--queries", default=200)
+FIELD_OUTPUT_JSON: cli.InputField = cli.InputField(str, "Path of output JSON file", "--output-json")
+BENCHMARK_INPUT_FIELDS: List[cli.InputField] = [FIELD_SCALE, FIELD_LISTS, FIELD_PROBES, FIELD_K, FIELD_QUERIES,
+                                                FIELD_OUTPUT_JSON]
+
+# relative noise applied to repeated graduates
+NOISE: float = 0.05
+SEED: int = 0
+
+
+def scaled_matrix(graduates: np.ndarray, scale: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Scales graduates matrix up synthetically.
+    :param graduates: Graduates matrix.
+    :param scale: Amount of times graduates are repeated.
+    :param rng: Random generator of noise.
+    :return: Row-normalized scaled matrix.
+    """
+    matrix: np.ndarray = np.tile(graduates, (scale, 1))
+    matrix *= rng.normal(1, NOISE, matrix.shape)
+    return neighbors.normalize_rows(matrix)
+
+
+def benchmark(scale: int, n_lists: int, probes: List[int], k: int, n_queries: int) -> Dict[str, Any]:
+    """
+    Benchmarks IVF search against exact search.
+    :param scale: Amount of times graduates are repeated.
+    :param n_lists: Amount of index clusters.
+    :param probes: Amounts of clusters probed per query to measure.
+    :param k: Amount of nearest neighbours.
+    :param n_queries: Amount of queries (sampled rows with added noise).
+    :return: Benchmark results.
+    """
+    rng: np.random.Generator = np.random.default_rng(SEED)
+    graduates: np.ndarray = PrimaryData.read_csv(RecSys.DEFAULT_DATASET_PATH).get_graduates_df().to_numpy(dtype=float)
+    matrix: np.ndarray = scaled_matrix(graduates, scale, rng)
+    queries: np.ndarray = neighbors.normalize_rows(
+        matrix[rng.choice(len(matrix), n_queries, replace=False)] * rng.normal(1, NOISE, (n_queries, matrix.shape[1]))
+    )
+
+    start: float = time.perf_counter()
+    exact_positions, _ = neighbors.k_nearest(matrix, queries, k, RecSys.SIMILARITY_BLOCK_ELEMENTS)
+    exact_time: float = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index: neighbors.IvfIndex = neighbors.IvfIndex(matrix, n_lists)
+    build_time: float = time.perf_counter() - start
+
+    results: List[Dict[str, float]] = list()
+    for n_probe in probes:
+        start = time.perf_counter()
+        positions, _ = index.k_nearest(queries, k, n_probe)
+        ann_time: float = time.perf_counter() - start
+        recall: float = float(np.mean([len(np.intersect1d(found, exact)) / max(1, k)
+                                       for found, exact in zip(positions, exact_positions)]))
+        results.append({"probes": n_probe, "recall": recall, "latency_ms": 1000 * ann_time / n_queries,
+                        "speedup": exact_time / ann_time})
+    return {"rows": len(matrix), "lists": n_lists, "k": k, "queries": n_queries, "build_s": build_time,
+            "exact_latency_ms": 1000 * exact_time / n_queries, "ann": results}
+
+
+def main() -> None:
+    """
+    Main function to be called when running as main module.
+    Runs benchmark and outputs results.
+    """
+    bench_dict, = cli.parse_args(BENCHMARK_INPUT_FIELDS)
+    results: Dict[str, Any] = benchmark(
+        bench_dict[FIELD_SCALE.field_name],
+        bench_dict[FIELD_LISTS.field_name],
+        [int(n_probe) for n_probe in bench_dict[FIELD_PROBES.field_name].split(",")],
+        bench_dict[FIELD_K.field_name],
+        bench_dict[FIELD_QUERIES.field_name]
+    )
+
+    print(f"Rows: {results['rows']}, index build: {results['build_s']:.2f}s, "
+          f"exact search: {results['exact_latency_ms']:.2f}ms/query")
+    for result in results["ann"]:
+        print(f"Probes: {result['probes']:>4}, recall@{results['k']}: {100 * result['recall']:.1f}%, "
+              f"latency: {result['latency_ms']:.2f}ms/query, speedup: {result['speedup']:.1f}x")
+
+    output_json_path: str = bench_dict[FIELD_OUTPUT_JSON.field_name]
+    if output_json_path is not None:
+        with open(output_json_path, "w") as file:
+            json.dump(results, file, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmarks start-up time of CLI entry points, each run as a fresh process (as the GUI runs them).
+Reports median wall time of each entry point, its overhead over a bare interpreter start-up, and whether it imported
+heavy modules (pandas, sklearn).
+Usage:
+python benchmark_startup.py
+[--repeats <Amount of runs of each entry point, default is 10>]
+[--output-json <Path of output JSON file, results are only printed if not provided>]
+"""
+
+
+from typing import Dict, List, Any
+import statistics
+import subprocess
+import tempfile
+import json
+import time
+import sys
+import os
+import cli
+
+
+FIELD_REPEATS: cli.InputField = cli.InputField(int, "Amount of runs of each entry point", "--repeats", default=10)
+FIELD_OUTPUT_JSON: cli.InputField = cli.InputField(str, "Path of output JSON file", "--output-json")
+BENCHMARK_INPUT_FIELDS: List[cli.InputField] = [FIELD_REPEATS, FIELD_OUTPUT_JSON]
+
+# modules that entry points should import only when needed
+HEAVY_MODULES: List[str] = ["pandas", "sklearn"]
+
+
+def run_time(args: List[str]) -> float:
+    """
+    Runs a python process to completion.
+    :param args: Arguments of python interpreter.
+    :return: Wall time of process (in seconds).
+    """
+    start: float = time.perf_counter()
+    subprocess.run([sys.executable] + args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - start
+
+
+def imported_heavy_modules(args: List[str]) -> List[str]:
+    """
+    Finds which heavy modules a python process imports.
+    :param args: Arguments of python interpreter.
+    :return: Imported heavy modules (of `HEAVY_MODULES`).
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime"] + args, stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE, text=True, check=True)
+    imported: set = {line.rsplit("|", 1)[-1].strip() for line in result.stderr.splitlines()}
+    return [module for module in HEAVY_MODULES if module in imported]
+
+
+def benchmark(repeats: int) -> Dict[str, Any]:
+    """
+    Benchmarks start-up of entry points.
+    :param repeats: Amount of runs of each entry point.
+    :return: Benchmark results.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        entry_points: Dict[str, List[str]] = {
+            "interpreter": ["-c", "pass"],
+            "get_all_courses": ["get_all_courses.py", "--output-json", os.path.join(tmp_dir, "courses.json")],
+            "recommendation --help": ["recommendation.py", "--help"]
+        }
+        run_time(entry_points["get_all_courses"]) # make sure course manifest exists
+
+        results: Dict[str, Any] = dict()
+        for name, args in entry_points.items():
+            median: float = statistics.median(run_time(args) for _ in range(repeats))
+            results[name] = {"median_ms": 1000 * median, "heavy_modules": imported_heavy_modules(args)}
+    for result in results.values():
+        result["overhead_ms"] = result["median_ms"] - results["interpreter"]["median_ms"]
+    return results
+
+
+def main() -> None:
+    """
+    Main function to be called when running as main module.
+    Runs benchmark and outputs results.
+    """
+    bench_dict, = cli.parse_args(BENCHMARK_INPUT_FIELDS)
+    results: Dict[str, Any] = benchmark(bench_dict[FIELD_REPEATS.field_name])
+
+    for name, result in results.items():
+        heavy_modules: str = ", ".join(result["heavy_modules"]) or "none"
+        print(f"{name:>22}: {result['median_ms']:.1f}ms (+{result['overhead_ms']:.1f}ms over interpreter), "
+              f"heavy modules imported: {heavy_modules}")
+
+    output_json_path: str = bench_dict[FIELD_OUTPUT_JSON.field_name]
+    if output_json_path is not None:
+        with open(output_json_path, "w") as file:
+            json.dump(results, file, indent=4)
+
+
+if __name__ == "__main__":
+    main()
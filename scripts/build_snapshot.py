@@ -0,0 +1,43 @@
+"""
+Builds the default recommendation system and saves it as a single-file snapshot.
+Execute this script after training the predictor (or changing the dataset), so that CLI runs given "--snapshot" map the
+fully built system into memory instead of building it (and importing sklearn).
+Usage:
+python build_snapshot.py
+[--output <Snapshot file path, default is "../cache/recsys.snapshot">]
+"""
+
+
+from typing import List
+from RecSys import RecSys
+import recommendation
+import predictor
+import snapshot
+import cli
+
+
+FIELD_OUTPUT: cli.InputField = cli.InputField(str, "Snapshot file", "--output", default=snapshot.DEFAULT_PATH)
+SNAPSHOT_INPUT_FIELDS: List[cli.InputField] = [FIELD_OUTPUT]
+
+
+def main() -> None:
+    """
+    Main function to be called when running as main module.
+    Builds and saves recommendation system snapshot.
+    """
+    snapshot_dict, = cli.parse_args(SNAPSHOT_INPUT_FIELDS)
+    output_path: str = snapshot_dict[FIELD_OUTPUT.field_name]
+    chance_predictor = predictor.get_predictor()
+    rec_sys: RecSys = RecSys(
+        chance_predictor=chance_predictor,
+        actions_utility_cache_name=recommendation.ACTIONS_UTILITY_CACHE_NAME,
+        courses_utility_cache_name=recommendation.COURSESS_UTILITY_CACHE_NAME,
+        org_chances_cache_name=recommendation.ORG_CHANCES_CACHE_NAME
+    )
+    chance_predictor.compiled # compile forest (if not stored yet), so it's saved in snapshot
+    rec_sys.save_snapshot(output_path)
+    print(f"Saved recommendation system snapshot ({rec_sys.identity}) at \"{output_path}\"")
+
+
+if __name__ == "__main__":
+    main()
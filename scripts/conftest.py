@@ -0,0 +1,66 @@
+"""
+Shared fixtures of tests.
+"""
+
+
+from typing import Callable, Optional, Tuple, List
+from src_data import PrimaryData
+from RecSys import RecSys
+import pandas as pd
+import numpy as np
+import pytest
+import src_data
+import utils
+
+
+# sample of dataset small recommendation systems are built on
+SAMPLE_ROWS: int = 300
+
+
+class StubPredictor:
+    """
+    Deterministic predictor of a student's chance by their course, attendance time and credited units only, so many
+    items share (exactly) the same utility and their scores tie. Counts predicted rows.
+    """
+    def __init__(self, fingerprint: Optional[str] = "stub") -> None:
+        self.fingerprint: Optional[str] = fingerprint
+        self.rows: int = 0
+
+    def __call__(self, student: pd.Series) -> float:
+        return float(self.predict_batch(pd.DataFrame([student]))[0])
+
+    def predict_batch(self, students: pd.DataFrame) -> np.ndarray:
+        self.rows += len(students)
+        return (0.1 * (students[src_data.C_STUD_COURSE] % 5) +
+                0.05 * students[src_data.C_STUD_UNITS_SEM1].clip(upper=4) +
+                0.05 * (src_data.V_NIGHT == students[src_data.C_STUD_COURSE_TIME])).to_numpy(dtype=float)
+
+
+def students_sample(rows: int) -> pd.DataFrame:
+    return pd.read_csv("../data/enrolled.csv").drop(columns=["Target"]).head(rows)
+
+
+def assert_same_recommendations(expected: List[Tuple[list, list]], actual: List[Tuple[list, list]]) -> None:
+    """
+    Asserts students' recommendations are the same items (by representation, e.g. of systems built apart), in the same
+    order, with (nearly) the same scores.
+    """
+    assert [[[repr(item) for item, _ in items] for items in recs] for recs in expected] == \
+        [[[repr(item) for item, _ in items] for items in recs] for recs in actual]
+    assert np.allclose([score for recs in expected for items in recs for _, score in items],
+                       [score for recs in actual for items in recs for _, score in items], rtol=0, atol=1e-12)
+
+
+@pytest.fixture
+def build_rec_sys(tmp_path, monkeypatch) -> Callable[..., RecSys]:
+    """
+    Gets a function building small recommendation systems (on a sample of the dataset, with a stub predictor by
+    default), whose cache entries are kept in a temporary cache root.
+    """
+    monkeypatch.setattr(utils, "CACHE_ROOT", str(tmp_path / "cache"))
+
+    def build(chance_predictor: Optional[StubPredictor] = None, rows: int = SAMPLE_ROWS, **kwargs) -> RecSys:
+        primary_data: PrimaryData = PrimaryData(pd.read_csv("../data/cleaned_data.csv").head(rows))
+        return RecSys(StubPredictor() if chance_predictor is None else chance_predictor,
+                      primary_data=primary_data, build_workers=1, **kwargs)
+    return build
@@ -0,0 +1,87 @@
+"""
+Holds the course manifest - a small JSON list of all available courses, generated with the cache.
+Reading it needs neither pandas nor the dataset, so listing courses (e.g. by the GUI, on launch) starts fast.
+Used by recommendation system (CLI, GUI).
+"""
+
+
+from typing import Callable, Optional, Tuple, List, Dict, Any
+from Course import Course
+import hashlib
+import json
+import os
+
+
+# path of course manifest, under cache root (same as `utils.CACHE_ROOT`, which isn't imported since it imports pandas)
+MANIFEST_PATH: str = os.path.join(os.environ.get("RECSYS_CACHE_DIR", "../cache"), "courses.json")
+
+
+# a course and whether it's an evening course
+CourseEntry = Tuple[Course, bool]
+
+
+def source_hash(data_path: str) -> str:
+    """
+    Calculates content hash of a dataset file (a few milliseconds, far cheaper than parsing it).
+    :param data_path: Path of dataset CSV.
+    :return: Hex digest of dataset file content.
+    """
+    with open(data_path, "rb") as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+def read_courses(data_path: str, manifest_path: str = MANIFEST_PATH) -> Optional[List[CourseEntry]]:
+    """
+    Reads courses from course manifest.
+    :param data_path: Path of dataset CSV the manifest must have been generated from.
+    :param manifest_path: Path of course manifest.
+    :return: List of (course, is_evening), or `None` if manifest is missing, unreadable or outdated.
+    """
+    try:
+        with open(manifest_path, "r") as file:
+            manifest: Dict[str, Any] = json.load(file)
+        if manifest.get("source") != source_hash(data_path):
+            return None # dataset changed since manifest was generated
+        courses: Dict[int, Course] = dict() # a single (shared) instance of each course
+        return [
+            (courses.setdefault(entry["ID"], Course(id=entry["ID"], name=entry["Name"])), entry["Evening"])
+            for entry in manifest["Courses"]
+        ]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def write_courses(data_path: str, courses: List[CourseEntry], manifest_path: str = MANIFEST_PATH) -> None:
+    """
+    Writes courses to course manifest (atomically).
+    :param data_path: Path of dataset CSV courses were taken from.
+    :param courses: List of (course, is_evening).
+    :param manifest_path: Path of course manifest.
+    """
+    import utils # imported only when generating, since it imports pandas
+
+    def write(path: str) -> None:
+        with open(path, "w") as file:
+            json.dump({
+                "source": source_hash(data_path),
+                "Courses": [{"ID": course.id, "Name": course.name, "Evening": is_evening}
+                            for course, is_evening in courses]
+            }, file, indent=4)
+    utils.create_folder_if_missing(os.path.dirname(manifest_path))
+    utils.atomic_write(manifest_path, write)
+
+
+def get_courses(data_path: str, gen_func: Callable[[], List[CourseEntry]],
+                manifest_path: str = MANIFEST_PATH) -> List[CourseEntry]:
+    """
+    Gets courses from course manifest, (re)generating it if missing or outdated.
+    :param data_path: Path of dataset CSV courses are taken from.
+    :param gen_func: A function that gets courses from the dataset, called only if manifest can't be used.
+    :param manifest_path: Path of course manifest.
+    :return: List of (course, is_evening).
+    """
+    courses: Optional[List[CourseEntry]] = read_courses(data_path, manifest_path)
+    if courses is None:
+        courses = gen_func()
+        write_courses(data_path, courses, manifest_path)
+    return courses
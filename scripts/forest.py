@@ -0,0 +1,251 @@
+"""
+Holds a compiled random forest - a fitted sklearn forest classifier flattened into compact numpy arrays, evaluated by
+a vectorized traversal kernel.
+Scoring skips sklearn's per-call validation and column alignment, so a single row costs tens of microseconds rather
+than milliseconds, and loading the arrays is faster than unpickling the estimator.
+Used by recommendation system predictor.
+"""
+
+
+from typing import Optional, Dict, List, Any
+import pandas as pd
+import numpy as np
+
+
+# marks a leaf in features array
+LEAF: int = -1
+
+
+class CompiledForest:
+    """
+    Random forest classifier (binary) compiled into flat arrays, all trees' nodes concatenated:
+    split feature (`LEAF` for leaves), threshold, left and right children (leaves point to themselves, so traversal
+    needs no branching) and positive class probability (of leaves). A row goes right when its value (as float32, as in
+    sklearn) is above the threshold.
+    """
+    def __init__(self, arrays: Dict[str, np.ndarray], feature_names: Optional[List[str]] = None) -> None:
+        """
+        Initializes a compiled forest from its arrays (see `from_sklearn` and `load`).
+        :param arrays: Flat arrays of forest: "feature", "threshold", "left", "right", "value", "roots", "depth".
+        :param feature_names: Names of features (columns), in order, `None` if unknown.
+        """
+        self.__feature: np.ndarray = arrays["feature"]
+        self.__threshold: np.ndarray = arrays["threshold"]
+        self.__left: np.ndarray = arrays["left"]
+        self.__right: np.ndarray = arrays["right"]
+        self.__value: np.ndarray = arrays["value"]
+        self.__roots: np.ndarray = arrays["roots"]
+        self.__depth: int = int(arrays["depth"])
+        self.__split_feature: np.ndarray = np.maximum(self.__feature, 0).astype(np.intp) # any feature, for leaves
+        self.__children: np.ndarray = np.column_stack([self.__left, self.__right]).ravel().astype(np.intp) # interleaved
+        self.__is_leaf: np.ndarray = LEAF == self.__feature
+        self.__feature_names: Optional[List[str]] = feature_names
+        self.__feature_index: Optional[pd.Index] = None if feature_names is None else pd.Index(feature_names)
+
+    @staticmethod
+    def from_sklearn(model: Any, float32_thresholds: bool = False, prune: bool = True) -> 'CompiledForest':
+        """
+        Compiles a fitted sklearn forest classifier (of two classes).
+        :param model: Fitted forest classifier (e.g. `RandomForestClassifier`).
+        :param float32_thresholds: `True` to store thresholds as float32 (halving their size). Thresholds are rounded
+                                   down, so comparisons with float32 values are unchanged.
+        :param prune: `True` to collapse subtrees whose leaves all have the same value into a single leaf, and drop
+                      nodes left unreachable.
+        :return: Compiled forest.
+        """
+        features: List[np.ndarray] = list()
+        thresholds: List[np.ndarray] = list()
+        lefts: List[np.ndarray] = list()
+        rights: List[np.ndarray] = list()
+        values: List[np.ndarray] = list()
+        roots: List[int] = list()
+        depth: int = 0
+        offset: int = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            feature: np.ndarray = np.where(tree.children_left < 0, LEAF, tree.feature).astype(np.int32)
+            left: np.ndarray = tree.children_left.astype(np.int64)
+            right: np.ndarray = tree.children_right.astype(np.int64)
+            value: np.ndarray = tree.value[:, 0, 1] / tree.value[:, 0, :].sum(axis=1) # positive class probability
+            if prune:
+                feature, left, right, value, kept = CompiledForest.__prune(feature, left, right, value)
+                threshold: np.ndarray = tree.threshold[kept]
+            else:
+                threshold = tree.threshold.copy()
+            is_leaf: np.ndarray = LEAF == feature
+            nodes: np.ndarray = np.arange(len(feature))
+            left = np.where(is_leaf, nodes, left) + offset # leaves point to themselves
+            right = np.where(is_leaf, nodes, right) + offset
+            features.append(feature)
+            thresholds.append(threshold)
+            lefts.append(left)
+            rights.append(right)
+            values.append(value)
+            roots.append(offset)
+            depth = max(depth, CompiledForest.__tree_depth(feature, left - offset, right - offset))
+            offset += len(feature)
+
+        all_thresholds: np.ndarray = np.concatenate(thresholds)
+        if float32_thresholds:
+            rounded: np.ndarray = all_thresholds.astype(np.float32)
+            above: np.ndarray = rounded > all_thresholds # round down, so no float32 value crosses a threshold
+            rounded[above] = np.nextafter(rounded[above], np.float32(-np.inf))
+            all_thresholds = rounded
+        index_dtype = np.int32 if offset < np.iinfo(np.int32).max else np.int64
+        arrays: Dict[str, np.ndarray] = {
+            "feature": np.concatenate(features),
+            "threshold": all_thresholds,
+            "left": np.concatenate(lefts).astype(index_dtype),
+            "right": np.concatenate(rights).astype(index_dtype),
+            "value": np.concatenate(values),
+            "roots": np.array(roots, dtype=index_dtype),
+            "depth": np.array(depth)
+        }
+        feature_names: Optional[np.ndarray] = getattr(model, "feature_names_in_", None)
+        return CompiledForest(arrays, None if feature_names is None else [str(name) for name in feature_names])
+
+    @staticmethod
+    def load(path: str) -> 'CompiledForest':
+        """
+        Loads a forest saved by `save`.
+        :param path: Path of saved forest.
+        :return: Loaded forest.
+        """
+        with np.load(path) as saved:
+            arrays: Dict[str, np.ndarray] = {name: saved[name] for name in saved.files}
+        feature_names: Optional[np.ndarray] = arrays.pop("feature_names", None)
+        return CompiledForest(arrays, None if feature_names is None else feature_names.tolist())
+
+    def save(self, path: str) -> None:
+        """
+        Saves forest.
+        :param path: Path to save forest at.
+        """
+        arrays: Dict[str, np.ndarray] = self.arrays
+        if self.__feature_names is not None:
+            arrays["feature_names"] = np.array(self.__feature_names)
+        with open(path, "wb") as file:
+            np.savez(file, **arrays)
+
+    @property
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """
+        Flat arrays of forest, by name (see `__init__`).
+        """
+        return {
+            "feature": self.__feature, "threshold": self.__threshold, "left": self.__left, "right": self.__right,
+            "value": self.__value, "roots": self.__roots, "depth": np.array(self.__depth)
+        }
+
+    @property
+    def feature_names(self) -> Optional[List[str]]:
+        """
+        Names of features (columns), in order, `None` if unknown.
+        """
+        return self.__feature_names
+
+    @property
+    def node_count(self) -> int:
+        """
+        Amount of nodes (of all trees).
+        """
+        return len(self.__feature)
+
+    def predict_proba(self, students: Any) -> np.ndarray:
+        """
+        Predicts class probabilities (same as sklearn's `predict_proba`).
+        :param students: Students' dataframe (columns are matched by name, if feature names are known), a matrix of
+                         rows, or a single row (series or vector).
+        :return: Probabilities matrix - a row per student, columns are negative and positive class probabilities.
+        """
+        positive: np.ndarray = self.predict_positive(students)
+        return np.column_stack([1 - positive, positive])
+
+    def predict_positive(self, students: Any) -> np.ndarray:
+        """
+        Predicts positive class probability of each row, traversing all trees of all rows at once.
+        :param students: See `predict_proba`.
+        :return: Positive class probabilities, ordered as rows.
+        """
+        matrix: np.ndarray = self.__to_matrix(students)
+        n_rows, n_features = matrix.shape
+        n_trees: int = len(self.__roots)
+        if 1 == n_rows: # descend all trees a level per step, leaves just stay in place
+            row: np.ndarray = matrix[0]
+            nodes: np.ndarray = self.__roots.astype(np.intp)
+            for _ in range(self.__depth):
+                nodes = self.__children[2 * nodes + (row[self.__split_feature[nodes]] > self.__threshold[nodes])]
+            return np.array([self.__value[nodes].mean()])
+
+        # node each (row, tree) pair is at, and offset of its row in flattened matrix
+        nodes = np.tile(self.__roots.astype(np.intp), n_rows)
+        row_offsets: np.ndarray = np.repeat(np.arange(n_rows, dtype=np.intp) * n_features, n_trees)
+        values: np.ndarray = matrix.ravel()
+        active: np.ndarray = np.flatnonzero(~self.__is_leaf[nodes]) # pairs yet to reach a leaf
+        while 0 < len(active): # descend a level per step, only pairs still traversing
+            current: np.ndarray = nodes[active]
+            split_values: np.ndarray = values[row_offsets[active] + self.__split_feature[current]]
+            current = self.__children[2 * current + (split_values > self.__threshold[current])]
+            nodes[active] = current
+            active = active[~self.__is_leaf[current]]
+        return self.__value[nodes].reshape(n_rows, n_trees).mean(axis=1)
+
+    def __to_matrix(self, students: Any) -> np.ndarray:
+        """
+        Converts students to a float32 matrix of features (as sklearn does), ordered as in training.
+        :param students: See `predict_proba`.
+        :return: Features matrix.
+        """
+        if self.__feature_index is not None:
+            if isinstance(students, pd.Series) and not students.index.equals(self.__feature_index):
+                students = students.reindex(self.__feature_index) # align entries by name
+            elif isinstance(students, pd.DataFrame) and not students.columns.equals(self.__feature_index):
+                students = students[self.__feature_names] # align columns by name
+        return np.atleast_2d(np.asarray(students, dtype=np.float32))
+
+    @staticmethod
+    def __prune(feature: np.ndarray, left: np.ndarray, right: np.ndarray, value: np.ndarray) -> tuple:
+        """
+        Collapses subtrees whose leaves all have the same value into leaves, and drops unreachable nodes.
+        :param feature: Split feature of each node (`LEAF` for leaves).
+        :param left: Left child of each node.
+        :param right: Right child of each node.
+        :param value: Value of each node (only leaves' values are used).
+        :return: Pruned feature, left, right and value arrays (children renumbered), original index of kept nodes.
+        """
+        feature, value = feature.copy(), value.copy()
+        for node in range(len(feature) - 1, -1, -1): # children always follow their parent, so visit bottom-up
+            if LEAF != feature[node] and LEAF == feature[left[node]] == feature[right[node]] \
+                    and value[left[node]] == value[right[node]]:
+                feature[node] = LEAF
+                value[node] = value[left[node]]
+
+        kept: List[int] = list()
+        stack: List[int] = [0]
+        while stack: # collect reachable nodes, in pre-order (so children still follow their parent)
+            node: int = stack.pop()
+            kept.append(node)
+            if LEAF != feature[node]:
+                stack.extend((right[node], left[node]))
+        kept_nodes: np.ndarray = np.array(kept)
+        renumber: np.ndarray = np.full(len(feature), -1, dtype=np.int64)
+        renumber[kept_nodes] = np.arange(len(kept_nodes))
+        is_leaf: np.ndarray = LEAF == feature[kept_nodes]
+        new_left: np.ndarray = np.where(is_leaf, -1, renumber[left[kept_nodes]])
+        new_right: np.ndarray = np.where(is_leaf, -1, renumber[right[kept_nodes]])
+        return feature[kept_nodes], new_left, new_right, value[kept_nodes], kept_nodes
+
+    @staticmethod
+    def __tree_depth(feature: np.ndarray, left: np.ndarray, right: np.ndarray) -> int:
+        """
+        Calculates depth of a tree (amount of splits on its longest path).
+        :param feature: Split feature of each node (`LEAF` for leaves).
+        :param left: Left child of each node.
+        :param right: Right child of each node.
+        :return: Depth of tree.
+        """
+        depths: np.ndarray = np.zeros(len(feature), dtype=np.int64)
+        for node in range(len(feature)): # parents precede children
+            if LEAF != feature[node]:
+                depths[left[node]] = depths[right[node]] = depths[node] + 1
+        return int(depths.max())
@@ -1,16 +1,22 @@
 """
 Holds utilities for getting all available courses.
 Used by recommendation system (CLI, GUI).
+Courses are read from the course manifest (see `course_manifest`), so listing them imports neither pandas nor the
+dataset, unless the manifest has to be (re)generated.
 """
 
 
 from typing import Optional, Tuple, List
 from Course import Course, CourseEncoder
-import src_data
-import utils
+import course_manifest
+import json
 import cli
 
 
+# path of dataset courses are taken from
+DATA_PATH: str = "../data/cleaned_data.csv"
+
+
 FIELD_OUTPUT_JSON: cli.InputField = cli.InputField(str, "Output JSON", "--output-json")
 IO_INPUT_FIELDS: List[cli.InputField] = [FIELD_OUTPUT_JSON]
 
@@ -18,7 +24,10 @@ IO_INPUT_FIELDS: List[cli.InputField] = [FIELD_OUTPUT_JSON]
 def main() -> None:
     io_dict, = cli.parse_args(IO_INPUT_FIELDS)
     output_json_path: Optional[str] = io_dict[FIELD_OUTPUT_JSON.field_name]
-    utils.append_output_json(output_json_path, {"Courses": get_all_courses()}, CourseEncoder)
+    courses: List[Tuple[Course, bool]] = get_all_courses()
+    if output_json_path is not None:
+        with open(output_json_path, "a") as file: # appended, as `utils.append_output_json` (which imports pandas)
+            json.dump({"Courses": courses}, file, cls=CourseEncoder)
 
 
 def get_all_courses() -> List[Tuple[Course, bool]]:
@@ -26,9 +35,11 @@ def get_all_courses() -> List[Tuple[Course, bool]]:
     Gets all available courses.
     :return: List of (course, is_evening).
     """
-    data: src_data.PrimaryData = src_data.PrimaryData.read_csv("../data/cleaned_data.csv")
-    return data.get_all_courses()
+    def gen_func() -> List[Tuple[Course, bool]]:
+        import src_data # imported only when manifest is (re)generated, since it imports pandas
+        return src_data.PrimaryData.read_csv(DATA_PATH).get_all_courses()
+    return course_manifest.get_courses(DATA_PATH, gen_func)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
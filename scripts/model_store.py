@@ -0,0 +1,171 @@
+"""
+Holds on-disk store of trained predictor models.
+Models are saved as versioned artifacts, keyed by a fingerprint of their training data, hyperparameters and sklearn
+version, so they are trained once and loaded by every later process.
+Used by recommendation system predictors.
+"""
+
+
+from typing import Callable, Optional, Dict, Any
+from forest import CompiledForest
+import hashlib
+import pickle
+import json
+import sklearn
+import utils
+
+
+# directory of stored models
+MODELS_DIR: str = "../models"
+
+
+class ModelNotPublishedException(Exception):
+    """Exception thrown when a model is required but was never trained and published."""
+    def __init__(self, name: str, fingerprint: str) -> None:
+        """
+        Initializes model-not-published exception instance.
+        :param name: Name of missing model.
+        :param fingerprint: Fingerprint of missing model.
+        """
+        super().__init__(f"Model \"{name}\" ({fingerprint}) was not published, run train_model.py first")
+
+
+def file_hash(path: str) -> str:
+    """
+    Calculates content hash of a file.
+    :param path: Path of file to hash.
+    :return: Hex digest of file content.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def fingerprint(data_path: str, params: Dict[str, Any]) -> str:
+    """
+    Calculates fingerprint of a model, which changes whenever the model would train differently.
+    :param data_path: Path of training data CSV.
+    :param params: Hyperparameters (and any other training settings) of model.
+    :return: Model fingerprint.
+    """
+    digest = hashlib.sha256()
+    digest.update(file_hash(data_path).encode())
+    digest.update(json.dumps(params, sort_keys=True).encode())
+    digest.update(sklearn.__version__.encode())
+    return digest.hexdigest()[:16]
+
+
+def artifact_path(name: str, model_fingerprint: str, extension: str) -> str:
+    """
+    Gets path of a stored artifact of a model.
+    :param name: Model name.
+    :param model_fingerprint: Model fingerprint.
+    :param extension: Extension of artifact.
+    :return: Path of artifact.
+    """
+    return f"{MODELS_DIR}/{name}-{model_fingerprint}.{extension}"
+
+
+def model_path(name: str, model_fingerprint: str) -> str:
+    """
+    Gets path of a stored model artifact.
+    :param name: Model name.
+    :param model_fingerprint: Model fingerprint.
+    :return: Path of model artifact.
+    """
+    return artifact_path(name, model_fingerprint, "pkl")
+
+
+def compiled_forest_path(name: str, model_fingerprint: str) -> str:
+    """
+    Gets path of a stored compiled forest (see `forest.CompiledForest`) of a model.
+    :param name: Model name.
+    :param model_fingerprint: Model fingerprint.
+    :return: Path of compiled forest artifact.
+    """
+    return artifact_path(name, model_fingerprint, "forest.npz")
+
+
+def load_model(name: str, model_fingerprint: str) -> Optional[Any]:
+    """
+    Loads a stored model.
+    :param name: Model name.
+    :param model_fingerprint: Model fingerprint.
+    :return: Loaded model, or `None` if not stored.
+    """
+    path: str = model_path(name, model_fingerprint)
+    if not utils.file_exists(path):
+        return None
+    with open(path, "rb") as file:
+        return pickle.load(file)
+
+
+def publish_model(name: str, model_fingerprint: str, model: Any, params: Dict[str, Any]) -> str:
+    """
+    Saves a trained model to the store (atomically, so concurrent readers never see a partial artifact).
+    :param name: Model name.
+    :param model_fingerprint: Model fingerprint.
+    :param model: Trained model.
+    :param params: Hyperparameters of model, saved as metadata next to the artifact.
+    :return: Path of saved model artifact.
+    """
+    utils.create_folder_if_missing(MODELS_DIR)
+    path: str = model_path(name, model_fingerprint)
+    def write(tmp_path: str) -> None:
+        with open(tmp_path, "wb") as file:
+            pickle.dump(model, file, protocol=pickle.HIGHEST_PROTOCOL)
+    utils.atomic_write(path, write)
+    with open(artifact_path(name, model_fingerprint, "json"), "w") as file:
+        json.dump({"name": name, "fingerprint": model_fingerprint, "params": params,
+                   "sklearn": sklearn.__version__}, file, indent=4)
+    return path
+
+
+def get_model(name: str, model_fingerprint: str, params: Dict[str, Any],
+              train_func: Callable[[], Any], allow_train: bool = True) -> Any:
+    """
+    Gets a model from the store, training and publishing it if missing.
+    :param name: Model name.
+    :param model_fingerprint: Model fingerprint.
+    :param params: Hyperparameters of model.
+    :param train_func: A function that trains the model.
+    :param allow_train: `False` to never train (raises if model is missing).
+    :return: Trained model.
+    """
+    model: Optional[Any] = load_model(name, model_fingerprint)
+    if model is None:
+        if not allow_train:
+            raise ModelNotPublishedException(name, model_fingerprint)
+        model = train_func()
+        publish_model(name, model_fingerprint, model, params)
+    return model
+
+
+def publish_compiled_forest(name: str, model_fingerprint: str, model: Any) -> CompiledForest:
+    """
+    Compiles a trained forest model and saves it to the store, next to the model (atomically).
+    :param name: Model name.
+    :param model_fingerprint: Model fingerprint.
+    :param model: Trained forest model.
+    :return: Compiled forest.
+    """
+    utils.create_folder_if_missing(MODELS_DIR)
+    compiled: CompiledForest = CompiledForest.from_sklearn(model)
+    utils.atomic_write(compiled_forest_path(name, model_fingerprint), compiled.save)
+    return compiled
+
+
+def get_compiled_forest(name: str, model_fingerprint: str, get_model_func: Callable[[], Any]) -> CompiledForest:
+    """
+    Gets a compiled forest of a model from the store, compiling and publishing it if missing.
+    :param name: Model name.
+    :param model_fingerprint: Model fingerprint.
+    :param get_model_func: A function that gets the trained forest model (only called if compiled forest is missing).
+    :return: Compiled forest.
+    """
+    path: str = compiled_forest_path(name, model_fingerprint)
+    if utils.file_exists(path):
+        return CompiledForest.load(path)
+    return publish_compiled_forest(name, model_fingerprint, get_model_func())
@@ -0,0 +1,223 @@
+"""
+Holds nearest-neighbour search utilities over student feature matrices.
+Used by recommendation system.
+"""
+
+
+from typing import Optional, Tuple, Dict
+import numpy as np
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """
+    Normalizes each row of a matrix to unit length, so cosine similarity becomes a dot product.
+    :param matrix: Float matrix (or a single vector).
+    :return: Row-normalized float matrix, all-zero rows are left as zeros (as in sklearn's cosine similarity).
+             Always row-major, so products with it (and their rounding) don't depend on the memory layout of
+             `matrix` - e.g. whether it was pickled or memory-mapped.
+    """
+    matrix = np.ascontiguousarray(matrix, dtype=float)
+    norms: np.ndarray = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1 # avoid division by zero, zero rows stay zero
+    return matrix / norms
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Finds positions of `k` largest scores using a partial selection (no full sort).
+    Ties are broken by position, and result is ordered by descending score - same as pandas' `nlargest`.
+    Missing (NaN) scores rank last.
+    :param scores: Scores vector, or matrix of scores (one row per query).
+    :param k: Amount of positions to find.
+    :return: Positions of `k` largest scores (a row of positions per query if `scores` is a matrix).
+    """
+    is_vector: bool = 1 == np.ndim(scores)
+    scores = np.atleast_2d(scores)
+    if np.isnan(scores).any(): # NaN never compares, so it would break the selection
+        scores = np.where(np.isnan(scores), -np.inf, scores)
+    rows, cols = scores.shape
+    k = max(0, min(k, cols))
+
+    if 0 == k:
+        positions: np.ndarray = np.empty((rows, 0), dtype=int)
+    elif k < cols:
+        kth: np.ndarray = np.partition(scores, cols - k, axis=1)[:, cols - k:cols - k + 1] # k-th largest per row
+        above: np.ndarray = scores > kth
+        ties: np.ndarray = scores == kth
+        missing: np.ndarray = k - above.sum(axis=1, keepdims=True) # amount of ties to take, earliest first
+        selected: np.ndarray = above | (ties & (np.cumsum(ties, axis=1) <= missing))
+        positions = np.nonzero(selected)[1].reshape(rows, k)
+    else:
+        positions = np.tile(np.arange(cols), (rows, 1))
+
+    # order selected positions by descending score (stable, so ties stay ordered by position)
+    order: np.ndarray = np.argsort(-np.take_along_axis(scores, positions, axis=1), axis=1, kind="stable")
+    positions = np.take_along_axis(positions, order, axis=1)
+    return positions[0] if is_vector else positions
+
+
+def k_nearest(matrix: np.ndarray, queries: np.ndarray, k: int, block_elements: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Finds `k` most similar rows of a row-normalized matrix for each of many (row-normalized) queries.
+    Similarities are computed in blocks of queries, so memory stays bounded no matter how many queries are given.
+    :param matrix: Row-normalized matrix to search in.
+    :param queries: Row-normalized matrix of queries.
+    :param k: Amount of most similar rows to find per query.
+    :param block_elements: Maximal amount of query-by-row similarities held in memory at once.
+    :return: Positions of `k` most similar rows per query (ordered by descending similarity),
+             similarities of said rows.
+    """
+    k = max(0, min(k, len(matrix)))
+    block_size: int = max(1, block_elements // max(1, len(matrix)))
+    positions: np.ndarray = np.empty((len(queries), k), dtype=int)
+    similarities: np.ndarray = np.empty((len(queries), k), dtype=float)
+    for start in range(0, len(queries), block_size):
+        end: int = min(start + block_size, len(queries))
+        scores: np.ndarray = queries[start:end] @ matrix.T
+        positions[start:end] = top_k_indices(scores, k)
+        similarities[start:end] = np.take_along_axis(scores, positions[start:end], axis=1)
+    return positions, similarities
+
+
+class IvfIndex:
+    """
+    Approximate nearest-neighbour index for cosine similarity, using an inverted file (IVF):
+    rows are partitioned into `n_lists` clusters (k-means), and a query is compared exactly only with rows of the
+    `n_probe` clusters whose centroids are nearest to it.
+    Probing more clusters raises recall, at the cost of latency.
+    """
+    def __init__(self, matrix: np.ndarray, n_lists: int = 256, n_probe: int = 8,
+                 iterations: int = 10, train_size: int = 50000, seed: int = 0) -> None:
+        """
+        Builds an IVF index.
+        :param matrix: Row-normalized matrix to index.
+        :param n_lists: Amount of clusters (capped by amount of rows).
+        :param n_probe: Default amount of clusters probed per query.
+        :param iterations: Amount of k-means iterations.
+        :param train_size: Maximal amount of (sampled) rows used for training clusters.
+        :param seed: Random seed of sampling and centroid initialization.
+        """
+        rng: np.random.Generator = np.random.default_rng(seed)
+        n_lists = max(1, min(n_lists, len(matrix)))
+        train: np.ndarray = matrix[rng.choice(len(matrix), min(train_size, len(matrix)), replace=False)]
+        centroids: np.ndarray = train[rng.choice(len(train), n_lists, replace=False)]
+        for _ in range(iterations):
+            assignment: np.ndarray = IvfIndex.__assign(train, centroids)
+            sums: np.ndarray = np.stack([np.bincount(assignment, weights=column, minlength=n_lists)
+                                         for column in train.T], axis=1)
+            counts: np.ndarray = np.bincount(assignment, minlength=n_lists)
+            non_empty: np.ndarray = counts > 0 # empty clusters keep their previous centroid
+            centroids[non_empty] = sums[non_empty] / counts[non_empty, None]
+
+        self.__matrix: np.ndarray = matrix
+        self.__n_probe: int = n_probe
+        self.__centroids: np.ndarray = centroids
+        assignment = IvfIndex.__assign(matrix, centroids)
+        self.__order: np.ndarray = np.argsort(assignment, kind="stable") # rows sorted by cluster
+        self.__offsets: np.ndarray = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=n_lists))])
+
+    @property
+    def n_probe(self) -> int:
+        """
+        Default amount of clusters probed per query.
+        """
+        return self.__n_probe
+
+    @staticmethod
+    def load(path: str, matrix: np.ndarray, n_probe: int = 8) -> 'IvfIndex':
+        """
+        Loads an index saved by `save`.
+        :param path: Path of saved index.
+        :param matrix: Row-normalized matrix the index was built on.
+        :param n_probe: Default amount of clusters probed per query.
+        :return: Loaded index.
+        """
+        with np.load(path) as arrays:
+            return IvfIndex.from_arrays(dict(arrays), matrix, n_probe)
+
+    @staticmethod
+    def from_arrays(arrays: Dict[str, np.ndarray], matrix: np.ndarray, n_probe: int = 8) -> 'IvfIndex':
+        """
+        Restores an index from its arrays (see `arrays`).
+        :param arrays: Arrays of index, by name.
+        :param matrix: Row-normalized matrix the index was built on.
+        :param n_probe: Default amount of clusters probed per query.
+        :return: Restored index.
+        """
+        index: IvfIndex = IvfIndex.__new__(IvfIndex)
+        index.__centroids = arrays["centroids"]
+        index.__order = arrays["order"]
+        index.__offsets = arrays["offsets"]
+        index.__matrix = matrix
+        index.__n_probe = n_probe
+        return index
+
+    @property
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """
+        Arrays of index (without the indexed matrix), by name.
+        """
+        return {"centroids": self.__centroids, "order": self.__order, "offsets": self.__offsets}
+
+    def save(self, path: str) -> None:
+        """
+        Saves index (without the indexed matrix).
+        :param path: Path to save index at.
+        """
+        with open(path, "wb") as file:
+            np.savez(file, **self.arrays)
+
+    def k_nearest(self, queries: np.ndarray, k: int, n_probe: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Finds (approximately) `k` most similar rows for each query.
+        Queries with less than `k` candidates fall back to an exact search.
+        :param queries: Row-normalized matrix of queries.
+        :param k: Amount of most similar rows to find per query.
+        :param n_probe: Amount of clusters to probe per query, `None` for index's default.
+        :return: Positions of `k` most similar rows per query (ordered by descending similarity),
+                 similarities of said rows.
+        """
+        k = max(0, min(k, len(self.__matrix)))
+        if n_probe is None:
+            n_probe = self.__n_probe
+        probed_clusters: np.ndarray = top_k_indices(-IvfIndex.__distances(queries, self.__centroids), n_probe)
+
+        positions: np.ndarray = np.empty((len(queries), k), dtype=int)
+        similarities: np.ndarray = np.empty((len(queries), k), dtype=float)
+        for i, query in enumerate(queries):
+            candidates: np.ndarray = np.sort(np.concatenate([
+                self.__order[self.__offsets[cluster]:self.__offsets[cluster + 1]] for cluster in probed_clusters[i]
+            ]))
+            if len(candidates) < k:
+                candidates = np.arange(len(self.__matrix)) # not enough candidates, search exhaustively
+            scores: np.ndarray = self.__matrix[candidates] @ query
+            top: np.ndarray = top_k_indices(scores, k)
+            positions[i] = candidates[top]
+            similarities[i] = scores[top]
+        return positions, similarities
+
+    @staticmethod
+    def __distances(matrix: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        """
+        Calculates squared euclidean distances between rows and centroids (up to a per-row constant).
+        :param matrix: Matrix of rows.
+        :param centroids: Matrix of centroids.
+        :return: Distances matrix (rows, centroids).
+        """
+        return (centroids ** 2).sum(axis=1) - 2 * (matrix @ centroids.T)
+
+    @staticmethod
+    def __assign(matrix: np.ndarray, centroids: np.ndarray, block_size: int = 8192) -> np.ndarray:
+        """
+        Assigns each row to its nearest centroid (in blocks, to bound memory).
+        :param matrix: Matrix of rows.
+        :param centroids: Matrix of centroids.
+        :param block_size: Amount of rows assigned at once.
+        :return: Index of nearest centroid of each row.
+        """
+        if 0 == len(matrix):
+            return np.empty(0, dtype=int)
+        return np.concatenate([
+            IvfIndex.__distances(matrix[start:start + block_size], centroids).argmin(axis=1)
+            for start in range(0, len(matrix), block_size)
+        ])
@@ -0,0 +1,180 @@
+"""
+Holds parallel execution utilities.
+Used for building recommendation system utility matrices, and for batch recommendations.
+"""
+
+
+from typing import TypeVar, Callable, Optional, Iterator, Tuple, List, Dict, Any
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, Future, as_completed
+from contextlib import contextmanager
+import multiprocessing
+import profiling
+import time
+import sys
+import os
+
+
+T = TypeVar('T') # used for generics
+R = TypeVar('R') # used for generics
+
+
+# default amount of workers, "0" (or unset) for amount of CPUs
+DEFAULT_WORKERS: int = int(os.environ.get("RECSYS_BUILD_WORKERS", "0"))
+
+
+# maps items by a worker pool (optionally reporting progress with a description), keeping items' order
+MapFunc = Callable[..., List[R]]
+
+
+# function run by this process when it's a forked worker, set by pool initializer (inherited, never pickled)
+__worker_func: Optional[Callable] = None
+
+
+def resolve_workers(workers: Optional[int]) -> int:
+    """
+    Resolves an amount of workers.
+    :param workers: Requested amount of workers, `None` or `0` for default (`RECSYS_BUILD_WORKERS`, or amount of CPUs).
+    :return: Amount of workers (at least 1).
+    """
+    if not workers:
+        workers = DEFAULT_WORKERS or os.cpu_count() or 1
+    return max(1, workers)
+
+
+@contextmanager
+def worker_pool(func: Callable[[T], R], workers: Optional[int] = None) -> Iterator[MapFunc]:
+    """
+    Opens a pool of worker processes running a function, which can be used for many maps.
+    Workers are forked, so `func` may be any callable (closures included) and everything it references is shared with
+    the parent (copy-on-write) as it was when workers were started - only items and results are pickled.
+    Where forking isn't supported, worker threads are used instead.
+    If profiling is enabled, workers' spans and counters are returned with their results, and merged into this
+    process' records.
+    :param func: Function workers apply on items.
+    :param workers: Amount of workers, `None` or `0` for default (see `resolve_workers`), `1` to run serially.
+    :return: A map function - receives items (and optionally a description, to report progress to stderr), and
+             returns results of `func`, ordered as items.
+    """
+    workers = resolve_workers(workers)
+    if workers <= 1:
+        yield lambda items, description=None: __map_serially(func, items, description)
+        return
+
+    executor: Executor
+    task: Callable[[T], R]
+    profiled: bool = False # whether tasks return profiling records with their results
+    if "fork" in multiprocessing.get_all_start_methods():
+        executor = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("fork"),
+                                       initializer=__set_worker_func, initargs=(func,))
+        profiled = profiling.is_enabled()
+        task = __call_profiled_worker_func if profiled else __call_worker_func
+    else:
+        executor = ThreadPoolExecutor(workers)
+        task = func
+    with executor:
+        yield lambda items, description=None: __map_by_executor(executor, task, items, description, profiled)
+
+
+def map_ordered(func: Callable[[T], R], items: List[T], workers: Optional[int] = None,
+                description: Optional[str] = None) -> List[R]:
+    """
+    Maps a function over items using a pool of worker processes, keeping items' order.
+    Workers are forked, so `func` and `items` may be anything (closures included, only results are pickled) and
+    workers see the parent's state as it was when called. Where forking isn't supported, threads are used instead.
+    :param func: Function to apply on each item.
+    :param items: Items to map.
+    :param workers: Amount of workers, `None` or `0` for default (see `resolve_workers`), `1` to run serially.
+    :param description: Description of mapped work, progress is reported (to stderr) if provided.
+    :return: Results of `func`, ordered as `items`.
+    """
+    workers = min(resolve_workers(workers), max(1, len(items)))
+    # workers receive only item positions, items themselves are inherited
+    with worker_pool(lambda position: func(items[position]), workers) as map_func:
+        return map_func(list(range(len(items))), description)
+
+
+def __map_serially(func: Callable[[T], R], items: List[T], description: Optional[str]) -> List[R]:
+    """
+    Maps items in this process.
+    :param func: Function to apply on each item.
+    :param items: Items to map.
+    :param description: Description of mapped work, progress is reported (to stderr) if provided.
+    :return: Results, ordered as `items`.
+    """
+    report: Callable[[int], None] = __progress_reporter(description, len(items))
+    results: List[R] = list()
+    for item in items:
+        results.append(func(item))
+        report(len(results))
+    return results
+
+
+def __map_by_executor(executor: Executor, task: Callable[[T], Any], items: List[T],
+                      description: Optional[str], profiled: bool = False) -> List[R]:
+    """
+    Maps items by an executor's workers.
+    :param executor: Executor to submit items to.
+    :param task: Task to submit with each item.
+    :param items: Items to map.
+    :param description: Description of mapped work, progress is reported (to stderr) if provided.
+    :param profiled: `True` if task returns profiling records with its result (merged into this process' records).
+    :return: Results, ordered as `items`.
+    """
+    report: Callable[[int], None] = __progress_reporter(description, len(items))
+    futures: Dict[Future, int] = {executor.submit(task, item): i for i, item in enumerate(items)}
+    results: List[Optional[R]] = [None] * len(items)
+    for done, future in enumerate(as_completed(futures), 1):
+        if profiled:
+            results[futures[future]], records = future.result()
+            profiling.merge_records(records)
+        else:
+            results[futures[future]] = future.result()
+        report(done)
+    return results # type: ignore
+
+
+def __set_worker_func(func: Callable) -> None:
+    """
+    Sets the function run by this worker (pool initializer, runs inside a worker).
+    :param func: Worker function.
+    """
+    global __worker_func
+    __worker_func = func
+    profiling.take_records() # drop records inherited from parent, so they aren't merged back into it
+
+
+def __call_worker_func(item: T) -> R:
+    """
+    Calls the worker function on an item (runs inside a worker).
+    :param item: Item to apply worker function on.
+    :return: Result of worker function.
+    """
+    return __worker_func(item) # type: ignore
+
+
+def __call_profiled_worker_func(item: T) -> Tuple[R, profiling.Records]:
+    """
+    Calls the worker function on an item (runs inside a worker), taking profiling records of the call.
+    :param item: Item to apply worker function on.
+    :return: Result of worker function, profiling records of call.
+    """
+    result: R = __worker_func(item) # type: ignore
+    return result, profiling.take_records()
+
+
+def __progress_reporter(description: Optional[str], total: int) -> Callable[[int], None]:
+    """
+    Creates a progress reporter, printing completed amount and estimated remaining time to stderr.
+    :param description: Description of reported work, `None` to not report.
+    :param total: Total amount of work items.
+    :return: A function that receives the amount of completed items, and reports it.
+    """
+    if description is None:
+        return lambda done: None
+    start: float = time.perf_counter()
+
+    def report(done: int) -> None:
+        elapsed: float = time.perf_counter() - start
+        eta: float = elapsed / done * (total - done)
+        print(f"{description}: {done}/{total} ({elapsed:.1f}s elapsed, ETA {eta:.1f}s)", file=sys.stderr, flush=True)
+    return report
@@ -8,7 +8,23 @@ import pandas as pd
 from sklearn.metrics import accuracy_score, classification_report
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestClassifier
-from typing import Callable, Optional
+from typing import Dict, Any
+from ChancePredictor import ChancePredictor
+from forest import CompiledForest
+import model_store
+
+
+# path of CSV the predictor is trained on
+DATA_PATH: str = "../data/cleaned_data.csv"
+
+# name of predictor model in model store
+MODEL_NAME: str = "random_forest"
+
+# hyperparameters of predictor model
+MODEL_PARAMS: Dict[str, Any] = {"random_state": 42}
+
+# all training settings, model is retrained whenever any of them changes
+TRAIN_PARAMS: Dict[str, Any] = {"model": MODEL_PARAMS, "test_size": 0.2, "split_random_state": 42}
 
 
 def __train_predictor_model() -> RandomForestClassifier:
@@ -18,7 +34,7 @@ def __train_predictor_model() -> RandomForestClassifier:
     """
     print("\nPredictor training started\n")
 
-    file_path = "../data/cleaned_data.csv"
+    file_path = DATA_PATH
     # Assume 'X' is the subset of data with relevant academic features
     data = pd.read_csv(file_path)
 
@@ -37,10 +53,11 @@ def __train_predictor_model() -> RandomForestClassifier:
 
     X = data.drop(columns=['Target'])
 
-    x_train, x_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    x_train, x_test, y_train, y_test = train_test_split(X, y, test_size=TRAIN_PARAMS["test_size"],
+                                                        random_state=TRAIN_PARAMS["split_random_state"])
 
     # Train a Random Forest model
-    rf = RandomForestClassifier(random_state=42)
+    rf = RandomForestClassifier(**MODEL_PARAMS)
     rf.fit(x_train, y_train)
 
     y_pred = rf.predict(x_test)
@@ -52,15 +69,38 @@ def __train_predictor_model() -> RandomForestClassifier:
     return rf
 
 
-def get_predictor() -> Callable[[pd.Series], float]:
+def model_fingerprint() -> str:
+    """
+    Gets fingerprint of predictor model, identifying its stored version.
+    :return: Predictor model fingerprint.
+    """
+    return model_store.fingerprint(DATA_PATH, TRAIN_PARAMS)
+
+
+def train_and_publish() -> str:
+    """
+    Trains predictor model and publishes it to the model store.
+    :return: Path of published model artifact.
+    """
+    model_fp: str = model_fingerprint()
+    model: RandomForestClassifier = __train_predictor_model()
+    path: str = model_store.publish_model(MODEL_NAME, model_fp, model, TRAIN_PARAMS)
+    model_store.publish_compiled_forest(MODEL_NAME, model_fp, model)
+    return path
+
+
+def get_predictor(allow_train: bool = True) -> ChancePredictor:
     """
-    Gets a student graduation chance predictor, which is trained on first predict call.
-    :return: Trained predictor, in the form of a callable.
+    Gets a student graduation chance predictor, which is loaded from the model store on first predict call
+    (and trained, if not stored yet).
+    Single students and small batches are scored by the compiled forest (compiled on first use, if not stored yet), so
+    the forest itself is only loaded for large batches.
+    :param allow_train: `False` to never train on missing model (for serving processes).
+    :return: Trained predictor, callable on a single student and supporting batched prediction.
     """
-    model: Optional[RandomForestClassifier] = None
-    def func(student: pd.Series) -> float:
-        nonlocal model
-        if model is None:
-            model = __train_predictor_model()
-        return float(model.predict_proba(pd.DataFrame([student]))[0, 1])
-    return func
+    model_fp: str = model_fingerprint()
+    def load_model() -> RandomForestClassifier:
+        return model_store.get_model(MODEL_NAME, model_fp, TRAIN_PARAMS, __train_predictor_model, allow_train)
+    def load_compiled() -> CompiledForest:
+        return model_store.get_compiled_forest(MODEL_NAME, model_fp, load_model)
+    return ChancePredictor(load_model, fingerprint=model_fp, load_compiled=load_compiled)
@@ -0,0 +1,115 @@
+"""
+Holds opt-in profiling instrumentation: timing spans around phases of recommendation, and counters.
+Profiling is disabled by default, and then a span or a counter costs a single flag check.
+Traces are written as JSON in Chrome's trace event format (viewable in chrome://tracing or https://ui.perfetto.dev),
+with counters' totals under "counters".
+Used by recommendation system (CLI, evaluation).
+"""
+
+
+from typing import ContextManager, Iterator, Tuple, List, Dict, Any
+from contextlib import contextmanager, nullcontext
+import threading
+import json
+import time
+import os
+
+
+# recorded trace events (completed spans) and counters
+Records = Tuple[List[Dict[str, Any]], Dict[str, int]]
+
+
+# whether profiling is enabled
+__enabled: bool = False
+
+# completed spans (as trace events) and counters' totals, recorded by this process
+__events: List[Dict[str, Any]] = list()
+__counters: Dict[str, int] = dict()
+
+# span returned while profiling is disabled (reusable, does nothing)
+__NO_SPAN: ContextManager[None] = nullcontext()
+
+
+def enable() -> None:
+    """
+    Enables profiling (for this process, and workers forked from it later).
+    """
+    global __enabled
+    __enabled = True
+
+
+def is_enabled() -> bool:
+    """
+    Checks if profiling is enabled.
+    :return: `True` if enabled, otherwise `False`.
+    """
+    return __enabled
+
+
+def span(name: str, **args: Any) -> ContextManager[None]:
+    """
+    Times a phase, as a context manager (e.g. `with profiling.span("scoring", rows=10): ...`).
+    :param name: Name of phase.
+    :param args: Details of this occurrence of the phase (JSON-serializable).
+    :return: Context manager timing its block.
+    """
+    if not __enabled:
+        return __NO_SPAN
+    return __timed_span(name, args)
+
+
+def count(name: str, amount: int = 1) -> None:
+    """
+    Adds to a counter.
+    :param name: Name of counter.
+    :param amount: Amount to add.
+    """
+    if __enabled:
+        __counters[name] = __counters.get(name, 0) + amount
+
+
+def take_records() -> Records:
+    """
+    Takes (and clears) everything recorded by this process so far, e.g. to pass it from a worker to its parent.
+    :return: Recorded trace events, counters.
+    """
+    global __events, __counters
+    records: Records = (__events, __counters)
+    __events, __counters = list(), dict()
+    return records
+
+
+def merge_records(records: Records) -> None:
+    """
+    Merges records taken from another process (see `take_records`).
+    :param records: Trace events and counters to merge.
+    """
+    events, counters = records
+    __events.extend(events)
+    for name, amount in counters.items():
+        __counters[name] = __counters.get(name, 0) + amount
+
+
+def write_trace(path: str) -> None:
+    """
+    Writes everything recorded so far as a JSON trace.
+    :param path: Path of trace file.
+    """
+    with open(path, "w") as file:
+        json.dump({"traceEvents": __events, "displayTimeUnit": "ms", "counters": __counters}, file)
+
+
+@contextmanager
+def __timed_span(name: str, args: Dict[str, Any]) -> Iterator[None]:
+    """
+    Times a block, recording it as a complete trace event.
+    Timestamps are of the system-wide monotonic clock, so spans of forked workers line up with their parent's.
+    :param name: Name of phase.
+    :param args: Details of this occurrence of the phase.
+    """
+    start: float = time.perf_counter()
+    try:
+        yield
+    finally:
+        __events.append({"name": name, "ph": "X", "ts": 1e6 * start, "dur": 1e6 * (time.perf_counter() - start),
+                         "pid": os.getpid(), "tid": threading.get_ident(), "args": args})
@@ -41,29 +41,48 @@ python recommendation.py
 [--actions-rec-count <Number of actions to recommend>]
 [--courses-rec-count <Number of courses to recommend>]
 [--output <Output file path>]
+[--output-json <Output JSON file path>]
+[--output-format <Format of JSON output: json (default) or jsonl>]
 [--err <Output error log file path>]
+[--profile <Profiling trace output JSON file path>]
+[--prediction-cache <Number of predictions cached, default is 0 (no cache)>]
+[--prediction-cache-file <Prediction cache file path, reused by later runs>]
+[--snapshot <Recommendation system snapshot file path, built by build_snapshot.py>]
 
 OR
 
 python recommendation.py
 --input <Input csv path>
+[--chunk-size <Number of input rows read and recommended at once, default is 1000>]
+[--workers <Number of worker processes each chunk is split between, 0 for number of CPUs, default is 1>]
 [--actions-rec-count <Number of actions to recommend>]
 [--courses-rec-count <Number of courses to recommend>]
 [--output <Output file path>]
+[--output-json <Output JSON file path>]
+[--output-format <Format of JSON output: json (default, an array of students' results) or jsonl (one per line)>]
 [--err <Output error log file path>]
+[--profile <Profiling trace output JSON file path>]
+[--prediction-cache <Number of predictions cached, default is 0 (no cache), only with a single worker>]
+[--prediction-cache-file <Prediction cache file path, reused by later runs, only with a single worker>]
+[--snapshot <Recommendation system snapshot file path, built by build_snapshot.py>]
 
 Missing arguments will be collected interactively.
 """
 
 
 from RecommendationException import RecommendationException
-from typing import Optional, Callable, Tuple, List
-from RecSys import RecSys
-import pandas as pd
-import predictor
-import utils
+from typing import TYPE_CHECKING, Optional, Callable, Tuple, List, Iterable, Iterator
+from OutputSink import OutputSink, JsonRecordWriter, JSON_FORMATS, FORMAT_JSON
+from contextlib import ExitStack
+import profiling
 import cli
 
+# heavy modules (pandas, sklearn, multiprocessing) are imported only when needed, so e.g. "--help" starts fast
+if TYPE_CHECKING:
+    from ResultCache import ResultCache
+    from RecSys import RecSys
+    import pandas as pd
+
 
 # represents recommendation: description and effectiveness
 Recommendation = Tuple[str, float]
@@ -76,6 +95,9 @@ RecList = List[Recommendation]
 ACTIONS_UTILITY_CACHE_NAME: str = "actions_utility"
 COURSESS_UTILITY_CACHE_NAME: str = "courses_utility"
 
+# cache name of graduates' original predicted chances
+ORG_CHANCES_CACHE_NAME: str = "org_chances"
+
 
 # CLI input fields related to recommendation system
 FIELD_NUM_ACTIONS_REC: cli.InputField = cli.InputField(int, "Number of actions to recommend", "--actions-rec-count", default=5)
@@ -87,9 +109,22 @@ REC_SYS_INPUT_FIELDS: List[cli.InputField] = [FIELD_NUM_ACTIONS_REC, FIELD_NUM_C
 FIELD_INPUT_FILE: cli.InputField = cli.InputField(str, "CSV input file", "--input")
 FIELD_OUTPUT_FILE: cli.InputField = cli.InputField(str, "Output file", "--output")
 FIELD_OUTPUT_JSON: cli.InputField = cli.InputField(str, "Output JSON", "--output-json")
+FIELD_OUTPUT_FORMAT: cli.InputField = cli.InputField(str, "Format of JSON output", "--output-format",
+                                                     choices=JSON_FORMATS, default=FORMAT_JSON)
 FIELD_ERR_FILE: cli.InputField = cli.InputField(str, "Error logging file", "--err")
+FIELD_CHUNK_SIZE: cli.InputField = cli.InputField(int, "Number of input rows read and recommended at once",
+                                                  "--chunk-size", default=1000)
+FIELD_WORKERS: cli.InputField = cli.InputField(int, "Number of worker processes (0 for number of CPUs)", "--workers",
+                                               default=1)
+FIELD_PROFILE: cli.InputField = cli.InputField(str, "Profiling trace output JSON file", "--profile")
+FIELD_PREDICTION_CACHE: cli.InputField = cli.InputField(int, "Number of predictions cached (0 for no cache)",
+                                                        "--prediction-cache", default=0)
+FIELD_PREDICTION_CACHE_FILE: cli.InputField = cli.InputField(str, "Prediction cache file", "--prediction-cache-file")
+FIELD_SNAPSHOT: cli.InputField = cli.InputField(str, "Recommendation system snapshot file", "--snapshot")
 IO_INPUT_FIELDS: List[cli.InputField] = [FIELD_INPUT_FILE, FIELD_OUTPUT_FILE, 
-                                         FIELD_OUTPUT_JSON, FIELD_ERR_FILE]
+                                         FIELD_OUTPUT_JSON, FIELD_OUTPUT_FORMAT, FIELD_ERR_FILE, FIELD_CHUNK_SIZE,
+                                         FIELD_WORKERS, FIELD_PROFILE, FIELD_PREDICTION_CACHE,
+                                         FIELD_PREDICTION_CACHE_FILE, FIELD_SNAPSHOT]
 
 
 def main() -> None:
@@ -103,67 +138,178 @@ def main() -> None:
     input_csv_path: Optional[str] = io_dict[FIELD_INPUT_FILE.field_name]
     output_txt_path: Optional[str] = io_dict[FIELD_OUTPUT_FILE.field_name]
     output_json_path: Optional[str] = io_dict[FIELD_OUTPUT_JSON.field_name]
+    output_format: str = io_dict[FIELD_OUTPUT_FORMAT.field_name]
     err_log_path: Optional[str] = io_dict[FIELD_ERR_FILE.field_name]
+    chunk_size: int = io_dict[FIELD_CHUNK_SIZE.field_name]
+    workers: int = io_dict[FIELD_WORKERS.field_name]
+    profile_path: Optional[str] = io_dict[FIELD_PROFILE.field_name]
+    prediction_cache_size: int = io_dict[FIELD_PREDICTION_CACHE.field_name]
+    prediction_cache_path: Optional[str] = io_dict[FIELD_PREDICTION_CACHE_FILE.field_name]
+    snapshot_path: Optional[str] = io_dict[FIELD_SNAPSHOT.field_name]
     num_actions_rec: int = rec_sys_dict[FIELD_NUM_ACTIONS_REC.field_name]
     num_courses_rec: int = rec_sys_dict[FIELD_NUM_COURSES_REC.field_name]
 
-    # output function, either file (if provided) or screen
-    output: Callable[[str], None] = __output_func_from_path(output_txt_path)
+    if profile_path is not None: # record spans and counters, written as a trace on exit
+        profiling.enable()
 
-    # error-logging function, either file (if provided) or screen
-    err_log: Callable[[str], None] = __output_func_from_path(err_log_path)
+    # arguments are parsed, import heavy modules
+    with profiling.span("import"):
+        from RecSys import RecSys
+        import pandas as pd
+        import utils
 
-    # delete JSON output file if already exists, to overwrite it
-    utils.delete_file_if_exists(output_json_path)
+    # each output is a single buffered handle for the whole run, closed (and flushed) on exit - even on error
+    with ExitStack() as outputs:
 
-    # construct new recommendation system with default predictor
-    rec_sys: RecSys = RecSys(
-        chance_predictor=predictor.get_predictor(),
-        actions_utility_cache_name=ACTIONS_UTILITY_CACHE_NAME,
-        courses_utility_cache_name=COURSESS_UTILITY_CACHE_NAME
-    )
+        if profile_path is not None: # trace is written last, after outputs are closed
+            outputs.callback(profiling.write_trace, profile_path)
 
-    if input_csv_path is None: # no input file - single student input (CLI/interactive)
+        # output function, either file (if provided) or screen
+        output: Callable[[str], None] = outputs.enter_context(OutputSink(output_txt_path)).write_line
 
-        # collect missing input interactively
-        student_dict, = cli.collect_missing_user_input((cli.STUDENT_INPUT_FIELDS, student_dict))
+        # error-logging function, either file (if provided) or screen
+        err_log: Callable[[str], None] = outputs.enter_context(OutputSink(err_log_path)).write_line
 
-        student: pd.Series = pd.Series(student_dict)
-        __output_single_student(rec_sys, student, 
-                                num_actions_rec, num_courses_rec, 
-                                output, output_json_path, err_log)
+        # JSON output (overwritten if already exists), an array of results if multiple students
+        json_writer: Optional[JsonRecordWriter] = None if output_json_path is None else outputs.enter_context(
+            JsonRecordWriter(OutputSink(output_json_path), output_format, as_array=input_csv_path is not None)
+        )
 
-    else: # CSV input file - multiple students
-        
-        if not utils.file_exists(input_csv_path):
-            utils.exit_with_error(f"No such file:\"{input_csv_path}\"", err_log)
-        students_df: pd.DataFrame = pd.read_csv(input_csv_path).drop(columns=["Target"])
-        __output_multiple_students(rec_sys, students_df, 
-                                   num_actions_rec, num_courses_rec, 
-                                   output, output_json_path, err_log)
+        if prediction_cache_size < 0:
+            utils.exit_with_error(f"Invalid prediction cache size: {prediction_cache_size}", err_log)
+        if (0 < prediction_cache_size or prediction_cache_path is not None) and input_csv_path is not None:
+            import parallel
+            if 1 < parallel.resolve_workers(workers): # predictions of forked workers never reach this process' cache
+                utils.exit_with_error("Prediction cache can't be used with multiple workers", err_log)
+
+        if snapshot_path is not None: # load fully built recommendation system, sklearn isn't even imported
+            if 0 < prediction_cache_size or prediction_cache_path is not None:
+                utils.exit_with_error("Prediction cache can't be used with a snapshot", err_log)
+            if not utils.file_exists(snapshot_path):
+                utils.exit_with_error(f"No such file:\"{snapshot_path}\"", err_log)
+            import snapshot
+            try:
+                rec_sys: RecSys = RecSys.load_snapshot(snapshot_path)
+            except snapshot.SnapshotException as e:
+                utils.exit_with_error(str(e), err_log)
+
+        else:
+            with profiling.span("import"):
+                from PredictionCache import PredictionCache, with_cache
+                from model_store import ModelNotPublishedException
+                import predictor
+
+            # default published predictor (never trained here, see train_model.py), behind a prediction cache if
+            # requested (persisted on exit, if it has a file)
+            chance_predictor: Callable[[pd.Series], float] = with_cache(predictor.get_predictor(allow_train=False),
+                                                                        prediction_cache_size, prediction_cache_path)
+            if isinstance(chance_predictor, PredictionCache):
+                outputs.callback(chance_predictor.save)
+
+            # construct new recommendation system with default predictor
+            try:
+                with profiling.span("build_recommendation_system"):
+                    rec_sys = RecSys(
+                        chance_predictor=chance_predictor,
+                        actions_utility_cache_name=ACTIONS_UTILITY_CACHE_NAME,
+                        courses_utility_cache_name=COURSESS_UTILITY_CACHE_NAME,
+                        org_chances_cache_name=ORG_CHANCES_CACHE_NAME
+                    )
+            except ModelNotPublishedException as e:
+                utils.exit_with_error(str(e), err_log)
+
+        if input_csv_path is None: # no input file - single student input (CLI/interactive)
+
+            # collect missing input interactively
+            student_dict, = cli.collect_missing_user_input((cli.STUDENT_INPUT_FIELDS, student_dict))
+
+            student: pd.Series = pd.Series(student_dict)
+            __output_single_student(rec_sys, student, 
+                                    num_actions_rec, num_courses_rec, 
+                                    output, json_writer, err_log)
+
+        else: # CSV input file - multiple students
+            
+            if not utils.file_exists(input_csv_path):
+                utils.exit_with_error(f"No such file:\"{input_csv_path}\"", err_log)
+            if chunk_size < 1:
+                utils.exit_with_error(f"Invalid chunk size: {chunk_size}", err_log)
+            if workers < 0:
+                utils.exit_with_error(f"Invalid number of workers: {workers}", err_log)
+            # stream input in chunks, so memory stays flat and results are written as soon as each chunk is done
+            students_chunks: Iterable[pd.DataFrame] = __read_students_chunks(input_csv_path, chunk_size)
+            __output_multiple_students(rec_sys, students_chunks, 
+                                       num_actions_rec, num_courses_rec, 
+                                       output, json_writer, err_log, workers)
 
 
 
 def recommend(student_dict: dict, num_actions_rec: int, num_courses_rec: int,
-              rec_sys: Optional[RecSys] = None) -> Tuple[float, RecList, RecList]:
+              rec_sys: Optional['RecSys'] = None,
+              result_cache: Optional['ResultCache'] = None) -> Tuple[float, RecList, RecList]:
     """
     Makes recommendations for a single student.
     :param student_dict: Student features provided as a dictionary.
     :param num_actions_rec: Amount of actions to recommend (at most).
     :param num_courses_rec: Amount of courses to recommend (at most).
-    :param rec_sys: Recommendation system to use. if not provided, default will be used.
+    :param rec_sys: Recommendation system to use. if not provided, default will be used (with the published predictor
+                    model, raises `ModelNotPublishedException` if it wasn't trained).
+    :param result_cache: Cache of results (keyed by student's features, amounts of recommendations and recommendation
+                         system's identity), `None` to always recommend. Cached results mustn't be modified.
     :return: Original estimated chance of graduation,
              List of recommended actions and their estimated improvement rate,
              List of recommended courses and their estimated improvement rate.
     """
+    from RecSys import RecSys
+    import pandas as pd
+    import predictor
+
     if rec_sys is None:
         rec_sys = RecSys(
-           chance_predictor=predictor.get_predictor(),
+            chance_predictor=predictor.get_predictor(allow_train=False),
             actions_utility_cache_name=ACTIONS_UTILITY_CACHE_NAME,
-            courses_utility_cache_name=COURSESS_UTILITY_CACHE_NAME
+            courses_utility_cache_name=COURSESS_UTILITY_CACHE_NAME,
+            org_chances_cache_name=ORG_CHANCES_CACHE_NAME
         )
     student: pd.Series = pd.Series(student_dict)
-    return __make_recommendation(rec_sys, student, num_actions_rec, num_courses_rec)
+    if result_cache is None:
+        return __make_recommendation(rec_sys, student, num_actions_rec, num_courses_rec)
+    return result_cache.get_or_compute(
+        rec_sys.identity, (tuple(student_dict.items()), num_actions_rec, num_courses_rec),
+        lambda: __make_recommendation(rec_sys, student, num_actions_rec, num_courses_rec)
+    )
+
+
+def __read_students_chunks(input_csv_path: str, chunk_size: int) -> Iterator['pd.DataFrame']:
+    """
+    Reads students from a CSV file, chunk by chunk (raises `RecommendationException` on a student with missing values).
+    :param input_csv_path: Path of students' CSV.
+    :param chunk_size: Amount of rows in each chunk (at most).
+    :return: Iterator of students' dataframes (chunks of all students, in order).
+    """
+    import pandas as pd
+
+    chunks: Iterator[pd.DataFrame] = iter(pd.read_csv(input_csv_path, chunksize=chunk_size))
+    while True:
+        with profiling.span("read_chunk"):
+            chunk: Optional[pd.DataFrame] = next(chunks, None)
+        if chunk is None:
+            return
+        students: pd.DataFrame = chunk.drop(columns=["Target"])
+        __validate_students(students)
+        yield students
+
+
+def __validate_students(students: 'pd.DataFrame') -> None:
+    """
+    Makes sure no student has missing values (e.g. a blank CSV cell), as they can't be recommended for.
+    :param students: Students' dataframe, indexed by position in input.
+    """
+    missing: pd.DataFrame = students.isna()
+    if missing.to_numpy().any():
+        position: int = int(missing.any(axis=1).idxmax())
+        columns: List[str] = students.columns[missing.loc[position]].tolist()
+        raise RecommendationException(f"Student {position + 1} has missing values: {', '.join(columns)}")
 
 
 def __frac_to_percent(frac: float) -> float:
@@ -175,8 +321,8 @@ def __frac_to_percent(frac: float) -> float:
     return round(frac * 100, 4)
 
 
-def __make_recommendation(rec_sys: RecSys,
-                          student: pd.Series, 
+def __make_recommendation(rec_sys: 'RecSys',
+                          student: 'pd.Series', 
                           num_actions_rec: int, 
                           num_courses_rec: int) -> Tuple[float, RecList, RecList]:
     """
@@ -209,8 +355,34 @@ def __make_recommendation(rec_sys: RecSys,
     return org_chance, res_rec_actions, res_rec_courses
 
 
-def __output_single_student(rec_sys: RecSys, student: pd.Series, num_actions_rec: int, num_courses_rec: int,
-                            output: Callable[[str], None], output_json_path: Optional[str],
+def __make_recommendations(rec_sys: 'RecSys',
+                           students: 'pd.DataFrame',
+                           num_actions_rec: int,
+                           num_courses_rec: int) -> List[Tuple[float, RecList, RecList]]:
+    """
+    Makes recommendations for multiple students in a single pass.
+    :param rec_sys: Recommendation system instance to use.
+    :param students: Students' dataframe.
+    :param num_actions_rec: Amount of actions to recommend for each student (at most).
+    :param num_courses_rec: Amount of courses to recommend for each student (at most).
+    :return: For each student (ordered as `students` rows): original estimated chance of graduation,
+             List of action recommendations (each is description, improve percentage),
+             List of course recommendations (each is description, improve percentage).
+    """
+    org_chances: pd.Series = rec_sys.predict_chances(students)
+    recs = rec_sys.recommend_many(students, actions_rec_count=num_actions_rec, courses_rec_count=num_courses_rec)
+    return [
+        (
+            __frac_to_percent(org_chance),
+            [(str(action), __frac_to_percent(improvement_rate)) for action, improvement_rate in rec_actions],
+            [(str(course), __frac_to_percent(improvement_rate)) for course, improvement_rate in rec_courses]
+        )
+        for org_chance, (rec_actions, rec_courses) in zip(org_chances, recs)
+    ]
+
+
+def __output_single_student(rec_sys: 'RecSys', student: 'pd.Series', num_actions_rec: int, num_courses_rec: int,
+                            output: Callable[[str], None], json_writer: Optional[JsonRecordWriter],
                             err_log: Callable[[str], None]) -> None:
     """
     Outputs action recommentations and courses for a single student.
@@ -219,9 +391,11 @@ def __output_single_student(rec_sys: RecSys, student: pd.Series, num_actions_rec
     :param num_actions_rec: Amount of actions to recommend (at most).
     :param num_courses_rec: Amount of courses to recommend (at most).
     :param output: An output function to use for outputing recommendations.
-    :param output_json_path: A JSON file path for JSON output, `None` if irrelevant.
+    :param json_writer: A JSON writer for JSON output, `None` if irrelevant.
     :param err_log: An output function to use for logging errors.
     """
+    import utils
+
     try: # try making recommendation, if failed exit with error
         org_chance, rec_actions, rec_courses = __make_recommendation(rec_sys, student, 
                                                                      num_actions_rec,
@@ -230,7 +404,34 @@ def __output_single_student(rec_sys: RecSys, student: pd.Series, num_actions_rec
         utils.exit_with_error(e.message, err_log, e.code)
     except Exception as e:
         utils.exit_with_error(str(e), err_log)
-    
+
+    __output_recommendation(org_chance, rec_actions, rec_courses, output, json_writer)
+
+
+def __output_recommendation(org_chance: float, rec_actions: RecList, rec_courses: RecList,
+                            output: Callable[[str], None], json_writer: Optional[JsonRecordWriter]) -> None:
+    """
+    Outputs a single student's recommendation results.
+    :param org_chance: Original estimated chance of graduation.
+    :param rec_actions: List of action recommendations (each is description, improve percentage).
+    :param rec_courses: List of course recommendations (each is description, improve percentage).
+    :param output: An output function to use for outputing recommendations.
+    :param json_writer: A JSON writer for JSON output, `None` if irrelevant.
+    """
+    with profiling.span("output"):
+        __write_recommendation(org_chance, rec_actions, rec_courses, output, json_writer)
+
+
+def __write_recommendation(org_chance: float, rec_actions: RecList, rec_courses: RecList,
+                           output: Callable[[str], None], json_writer: Optional[JsonRecordWriter]) -> None:
+    """
+    Writes a single student's recommendation results (see `__output_recommendation`).
+    :param org_chance: Original estimated chance of graduation.
+    :param rec_actions: List of action recommendations (each is description, improve percentage).
+    :param rec_courses: List of course recommendations (each is description, improve percentage).
+    :param output: An output function to use for outputing recommendations.
+    :param json_writer: A JSON writer for JSON output, `None` if irrelevant.
+    """
     output(f"Current chance of graduation: {org_chance}%\n")
     
     output("Recommended actions:")
@@ -244,59 +445,65 @@ def __output_single_student(rec_sys: RecSys, student: pd.Series, num_actions_rec
     output("")
 
     # output JSON if required
-    utils.append_output_json(output_json_path, {
-        "OrgChance": org_chance,
-        "ActionsRec": rec_actions,
-        "CoursesRec": rec_courses
-    })
+    if json_writer is not None:
+        json_writer.write({
+            "OrgChance": org_chance,
+            "ActionsRec": rec_actions,
+            "CoursesRec": rec_courses
+        })
 
 
-def __output_multiple_students(rec_sys: RecSys, students: pd.DataFrame,
+def __output_multiple_students(rec_sys: 'RecSys', students_chunks: Iterable['pd.DataFrame'],
                                num_actions_rec: int, num_courses_rec: int,
-                               output: Callable[[str], None], output_json_path: Optional[str],
-                               err_log: Callable[[str], None]) -> None:
+                               output: Callable[[str], None], json_writer: Optional[JsonRecordWriter],
+                               err_log: Callable[[str], None], workers: int = 1) -> None:
     """
     Outputs action recommendations and courses for multiple students.
+    Students are recommended chunk by chunk (each chunk in a single pass, or split between worker processes), and each
+    chunk's results are output before the next chunk is read.
+    Workers are forked from this process, so they share the recommendation system (graduates, utility matrices and
+    predictor model, loaded before forking) rather than copying it - only students and results are passed between
+    processes.
     :param rec_sys: Recommendation system instance to use.
-    :param students: Students' dataframe.
+    :param students_chunks: Students' dataframes (chunks of all students, in order).
     :param num_actions_rec: Amount of actions to recommend for each student (at most).
     :param num_courses_rec: Amount of courses to recommend for each student (at most).
     :param output: An output function to use for outputing recommendations.
-    :param output_json_path: A JSON file path for JSON output, `None` if irrelevant.
+    :param json_writer: A JSON writer for JSON output (of an array of students' results), `None` if irrelevant.
     :param err_log: An output function to use for logging errors.
+    :param workers: Amount of worker processes, `0` for amount of CPUs, `1` to recommend in this process.
     """
-    utils.append_output(output_json_path, "[") # if requires JSON output, begin list
-
-    # for each student, output its index and recommendation results
-    last_index = len(students) - 1
-    for i, ind in enumerate(students.index, 1):
-        output(f"Student {i}:")
-        __output_single_student(rec_sys, students.loc[ind], 
-                                num_actions_rec, num_courses_rec, 
-                                output, output_json_path, err_log)
-        output("")
-
-        if i < last_index:
-            utils.append_output(output_json_path, ",") # if has more elements, append comma to JSON output
-    
-    utils.append_output(output_json_path, "]") # close list
-
+    import numpy as np
+    import parallel
+    import utils
+
+    workers = parallel.resolve_workers(workers)
+    student_number: int = 0 # number of last output student, across chunks
+    try: # try making recommendations, if failed (or input is invalid) exit with error
+        if 1 < workers: # load model once, shared copy-on-write by workers (rather than loaded by each of them)
+            rec_sys.warm_up()
+        with parallel.worker_pool(lambda students: __make_recommendations(rec_sys, students,
+                                                                          num_actions_rec, num_courses_rec),
+                                  workers) as recommend_slices:
+            for students in students_chunks:
+                # split chunk into contiguous slices (one per worker), results are merged in input order
+                bounds: np.ndarray = np.linspace(0, len(students), min(workers, len(students)) + 1).astype(int)
+                slices: List[pd.DataFrame] = [students.iloc[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+                results: List[Tuple[float, RecList, RecList]] = [
+                    result for slice_results in recommend_slices(slices) for result in slice_results
+                ]
+
+                # for each student, output its index and recommendation results
+                for org_chance, rec_actions, rec_courses in results:
+                    student_number += 1
+                    output(f"Student {student_number}:")
+                    __output_recommendation(org_chance, rec_actions, rec_courses, output, json_writer)
+                    output("")
+    except RecommendationException as e:
+        utils.exit_with_error(e.message, err_log, e.code)
+    except Exception as e:
+        utils.exit_with_error(str(e), err_log)
 
-def __output_func_from_path(path: Optional[str]) -> Callable[[str], None]:
-    """
-    Given a file path, returns an output function to that file.
-    :param path: Path of file to output for, `None` for stdout.
-    :return: A function that receives an `str` and outputs it to `path` (or stdout).
-    """
-    if path is None:
-        return lambda text: print(text)
-    
-    utils.delete_file_if_exists(path)
-    def func(text: str) -> None:
-        with open(path, "a") as file:
-            file.write(text + "\n")
-    return func
-    
 
 if __name__ == "__main__":
     main()
@@ -1,39 +1,66 @@
-from typing import Callable
+from typing import Callable, Optional, Tuple, List, Dict
+from StudentAction import StudentAction
 from RecSys import RecSys
 from Course import Course
 import pandas as pd
+import numpy as np
 import predictor
 import baseline
+import profiling
+import parallel
 import src_data
+import what_if
 import utils
+import cli
+
+
+# recommendations of a student: actions and their improvement rates, courses and their improvement rates
+StudentRecs = Tuple[List[Tuple[StudentAction, float]], List[Tuple[Course, float]]]
+
+
+FIELD_PROFILE: cli.InputField = cli.InputField(str, "Profiling trace output JSON file", "--profile")
+EVAL_INPUT_FIELDS: List[cli.InputField] = [FIELD_PROFILE]
 
 
 def main() -> None:
+    eval_dict, = cli.parse_args(EVAL_INPUT_FIELDS)
+    profile_path: Optional[str] = eval_dict[FIELD_PROFILE.field_name]
+    if profile_path is not None: # record spans and counters, written as a trace when done
+        profiling.enable()
+
     baseline_predictor: Callable[[pd.Series], float] = baseline.get_predictor()
     final_predictor: Callable[[pd.Series], float] = predictor.get_predictor()
 
-    print("\nRunning estimations. This may take about 20 minutes.\n")
+    print("\nRunning estimations. This may take a few seconds.\n")
 
-    eval_rec_sys_accuracies(baseline_predictor=baseline_predictor,
-                            final_predictor=final_predictor)
+    try:
+        eval_rec_sys_accuracies(baseline_predictor=baseline_predictor,
+                                final_predictor=final_predictor)
+    finally:
+        if profile_path is not None:
+            profiling.write_trace(profile_path)
 
 
 def eval_rec_sys_accuracies(baseline_predictor: Callable[[pd.Series], float],
                             final_predictor: Callable[[pd.Series], float]) -> None:
     """
     Evaluates accuracy of recommendation system with both the baseline predictor and the "final" one.
+    Both systems are built and evaluated at once, each in its own worker process.
     Prints results to the screen.
     :param basline_predictor: Baseline student gradutaion chance predictor, in the form of a callable.
     :param final_predictor: "Final" student graduation chance predictor, in the form of a callable.
     """
     unlabeled_df: pd.DataFrame = pd.read_csv("../data/enrolled.csv").drop(columns=["Target"])
-    
-    baseline_rec_sys: RecSys = RecSys(baseline_predictor)
-    final_rec_sys: RecSys = RecSys(final_predictor)
+    predictors: Dict[str, Callable[[pd.Series], float]] = {"baseline": baseline_predictor, "final": final_predictor}
+
+    def evaluate(name: str) -> float:
+        with profiling.span("build_recommendation_system", predictor=name):
+            rec_sys: RecSys = RecSys(predictors[name])
+        with profiling.span("evaluate", predictor=name):
+            return calc_rec_sys_accuracy(rec_sys, unlabeled_df)
 
-    baseline_accuracy: float = calc_rec_sys_accuracy(baseline_rec_sys, unlabeled_df)
+    baseline_accuracy, final_accuracy = parallel.map_ordered(evaluate, list(predictors.keys()))
     print(f"Baseline recommendation system accuracy compared to predictor is {100 * baseline_accuracy}%")
-    final_accuracy: float = calc_rec_sys_accuracy(final_rec_sys, unlabeled_df)
     print(f"Final recommendation system accuracy compared to predictor is {100 * final_accuracy}%")
 
 
@@ -44,47 +71,67 @@ def calc_rec_sys_accuracy(rec_sys: RecSys, students_df: pd.DataFrame) -> float:
     :param: students_df: A dataframe of students to evaluate accuracy based on.
     :return: Evaluated accuracy.
     """
-    errs = students_df.apply(lambda student: calc_student_err(rec_sys, student), axis=1)
-    avg_err = 0.0 if errs.empty else errs.mean()
+    recs = rec_sys.recommend_many(students_df) # all students' recommendations in a single pass
+    errs: np.ndarray = calc_students_errs(rec_sys, students_df, recs)
+    avg_err = 0.0 if 0 == len(errs) else errs.mean()
     return round(1 - avg_err, 2) # accuracy is 1 minus overall error
 
 
-def calc_student_err(rec_sys: RecSys, student: pd.Series) -> float:
+def calc_students_errs(rec_sys: RecSys, students_df: pd.DataFrame, recs: List[StudentRecs]) -> np.ndarray:
+    """
+    Calculates recommendation error of each student.
+    Every recommended action and course of every student is applied on its own copy of the student, and all of these
+    counterfactual variants (and the original students) are predicted in a single batched call.
+    :param rec_sys: Recommendation system to calculate errors on.
+    :param students_df: Students' dataframe.
+    :param recs: Recommendations (actions, courses) of each student, ordered as `students_df` rows.
+    :return: Recommendation error of each student (mean absolute difference between recommendations' improvement
+             rates and actual improvement rates, `0` if nothing was recommended), ordered as `students_df` rows.
+    """
+    # position of student each variant was made of, and its recommended improvement rate
+    action_pairs: List[Tuple[int, StudentAction]] = list()
+    action_rates: List[float] = list()
+    course_positions: List[int] = list()
+    course_rates: List[float] = list()
+    course_ids: List[int] = list()
+    for position, (action_recs, course_recs) in enumerate(recs):
+        for action, rate in action_recs:
+            action_pairs.append((position, action))
+            action_rates.append(rate)
+        for course, rate in course_recs:
+            course_positions.append(position)
+            course_rates.append(rate)
+            course_ids.append(course.id)
+    course_variants: pd.DataFrame = students_df.iloc[course_positions].copy()
+    course_variants[src_data.C_STUD_COURSE] = course_ids
+
+    variants_df: pd.DataFrame = pd.concat([
+        students_df, what_if.stack_variants(students_df, action_pairs), course_variants
+    ], ignore_index=True)
+    chances: np.ndarray = rec_sys.predict_chances(variants_df).to_numpy()
+    org_chances: np.ndarray = chances[:len(students_df)]
+
+    positions: np.ndarray = np.array([position for position, _ in action_pairs] + course_positions, dtype=int)
+    rates: np.ndarray = np.array(action_rates + course_rates, dtype=float)
+    errs: np.ndarray = np.abs(rates - utils.calc_improve(org_chances[positions], chances[len(students_df):]))
+
+    # average errors of each student
+    total_recs: np.ndarray = np.bincount(positions, minlength=len(students_df))
+    total_errs: np.ndarray = np.bincount(positions, weights=errs, minlength=len(students_df))
+    return np.divide(total_errs, total_recs, out=np.zeros(len(students_df)), where=0 < total_recs)
+
+
+def calc_student_err(rec_sys: RecSys, student: pd.Series, recs: Optional[StudentRecs] = None) -> float:
     """
     Calculates recommendation error for a single student.
     :param rec_sys: Recommendation system to calculate error on.
     :param student: Student's representative features vector.
+    :param recs: Student's recommendations (actions, courses) if already made, `None` to make them.
     :return: Recommendation error (absolute difference between recommendation improvement rate and
              actual improvement rate).
     """
-    org_chance: float = rec_sys.predict_chance(student)
-    action_recs, course_recs = rec_sys.recommend(student)
-    
-    action_errs = [
-        abs(improve_rate - utils.calc_improve(org_chance, rec_sys.predict_chance(action.apply(student))))
-        for action, improve_rate in action_recs
-    ]
-
-    course_errs = [
-        abs(improve_rate - utils.calc_improve(org_chance, rec_sys.predict_chance(__apply_course(student, course))))
-        for course, improve_rate in course_recs
-    ]
-
-    total_err: float = sum(action_errs) + sum(course_errs)
-    total_recs: float = len(action_recs) + len(course_recs)
-
-    return 0 if 0 == total_recs else total_err / total_recs
-
-
-def __apply_course(student: pd.Series, course: Course) -> pd.Series:
-    """
-    Applies course on student.
-    :param student: Student to apply course on.
-    :param course: Course to apply on student.
-    :return: `student`, but enrolled at `course`.
-    """
-    student[src_data.C_STUD_COURSE] = course.id
-    return student
+    return float(calc_students_errs(rec_sys, pd.DataFrame([student]),
+                                    [rec_sys.recommend(student) if recs is None else recs])[0])
 
 
 if __name__ == "__main__":
@@ -0,0 +1,288 @@
+"""
+Recommendation system server script.
+Execute this script to serve recommendations over a local HTTP JSON API. The recommendation system is built at startup
+(not per request), so clients (e.g. the GUI) don't pay process start-up, imports and model loading on every request.
+The server never trains the predictor - its model must be published first (by train_model.py).
+Usage:
+python server.py
+[--host <Host to listen on, default is localhost>]
+[--port <Port to listen on, default is 8765>]
+[--result-cache-size <Number of recommendation results cached, 0 for no cache, default is 1024>]
+[--result-cache-ttl <Seconds a recommendation result is cached for, default is 300>]
+[--reload-interval <Seconds between checks for a republished model or rebuilt cache, default is 5>]
+
+API (same JSON shapes as the CLI's "--output-json"):
+GET  /courses    -> {"Courses": [[{"ID": <id>, "Name": <name>}, <is evening>], ...]}
+POST /recommend  -> {"OrgChance": <chance>, "ActionsRec": [[<description>, <rate>], ...], "CoursesRec": [...]}
+    Request body is a JSON object keyed by CLI argument names without "--" (same as recommendation.py arguments),
+    e.g. {"marital-status": 1, "course": 33, ..., "actions-rec-count": 5, "courses-rec-count": 5}.
+Errors are returned as {"Error": <message>} with a non-200 status.
+Repeated requests of a student (e.g. an advisor reopening a profile) are answered from a result cache, until the result
+expires or the recommendation system changes.
+The recommendation system is rebuilt (while the previous one keeps serving) once the predictor model is republished, or
+the dataset or cache changes - checked by modification times, at most once per reload interval.
+"""
+
+
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Callable, Hashable, Optional, Tuple, Dict, Any, List
+from ResultCache import ResultCache
+from Course import CourseEncoder
+from RecSys import RecSys, DEFAULT_DATASET_PATH
+from model_store import ModelNotPublishedException
+import get_all_courses
+import recommendation
+import model_store
+import predictor
+import threading
+import utils
+import time
+import json
+import glob
+import sys
+import os
+import cli
+
+
+# default time (in seconds) between checks of whether recommendation system's sources changed
+DEFAULT_RELOAD_INTERVAL: float = 5.0
+
+
+FIELD_HOST: cli.InputField = cli.InputField(str, "Host to listen on", "--host", default="localhost")
+FIELD_PORT: cli.InputField = cli.InputField(int, "Port to listen on", "--port", default=8765)
+FIELD_RESULT_CACHE_SIZE: cli.InputField = cli.InputField(int, "Number of results cached (0 for no cache)",
+                                                         "--result-cache-size", default=1024)
+FIELD_RESULT_CACHE_TTL: cli.InputField = cli.InputField(float, "Seconds a recommendation result is cached for",
+                                                        "--result-cache-ttl", default=300.0)
+FIELD_RELOAD_INTERVAL: cli.InputField = cli.InputField(float, "Seconds between checks for changed model or cache",
+                                                      "--reload-interval", default=DEFAULT_RELOAD_INTERVAL)
+SERVER_INPUT_FIELDS: List[cli.InputField] = [FIELD_HOST, FIELD_PORT, FIELD_RESULT_CACHE_SIZE, FIELD_RESULT_CACHE_TTL,
+                                             FIELD_RELOAD_INTERVAL]
+
+
+class RecommendationRequestHandler(BaseHTTPRequestHandler):
+    """
+    Handles recommendation server requests, using the server's shared recommendation system.
+    """
+    server: 'RecommendationServer'
+
+    def do_GET(self) -> None:
+        """
+        Handles GET requests.
+        """
+        if "/courses" == self.path:
+            self.__send_json(200, {"Courses": self.server.courses})
+        else:
+            self.__send_json(404, {"Error": f"No such endpoint: \"{self.path}\""})
+
+    def do_POST(self) -> None:
+        """
+        Handles POST requests.
+        """
+        if "/recommend" != self.path:
+            self.__send_json(404, {"Error": f"No such endpoint: \"{self.path}\""})
+            return
+        try:
+            body: Dict[str, Any] = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            student_dict: dict = parse_fields(cli.STUDENT_INPUT_FIELDS, body)
+            rec_sys_dict: dict = parse_fields(recommendation.REC_SYS_INPUT_FIELDS, body)
+        except Exception as e:
+            self.__send_json(400, {"Error": str(e)})
+            return
+        try:
+            org_chance, rec_actions, rec_courses = recommendation.recommend(
+                student_dict,
+                rec_sys_dict[recommendation.FIELD_NUM_ACTIONS_REC.field_name],
+                rec_sys_dict[recommendation.FIELD_NUM_COURSES_REC.field_name],
+                self.server.get_rec_sys(),
+                self.server.result_cache
+            )
+        except Exception as e:
+            self.__send_json(500, {"Error": str(e)})
+            return
+        self.__send_json(200, {"OrgChance": org_chance, "ActionsRec": rec_actions, "CoursesRec": rec_courses})
+
+    def log_message(self, format: str, *args: Any) -> None:
+        """
+        Silences per-request logging.
+        """
+
+    def __send_json(self, status: int, data: Dict[str, Any]) -> None:
+        """
+        Sends a JSON response.
+        :param status: HTTP status code.
+        :param data: Data to send as JSON.
+        """
+        payload: bytes = json.dumps(data, cls=CourseEncoder).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class RecommendationServer(ThreadingHTTPServer):
+    """
+    HTTP server holding a single, shared (read-only) recommendation system, replaced by a rebuilt one when its sources
+    change.
+    """
+    def __init__(self, host: str, port: int, rec_sys: Optional[RecSys] = None,
+                 result_cache: Optional[ResultCache] = None,
+                 build_rec_sys: Optional[Callable[[], RecSys]] = None,
+                 get_sources_stamp: Optional[Callable[[], Hashable]] = None,
+                 reload_interval: float = DEFAULT_RELOAD_INTERVAL,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        Initializes recommendation server, building its recommendation system.
+        :param host: Host to listen on.
+        :param port: Port to listen on.
+        :param rec_sys: Recommendation system to serve (as is, never rebuilt), if not provided, it's built by
+                        `build_rec_sys`.
+        :param result_cache: Cache of recommendation results, `None` to always recommend.
+        :param build_rec_sys: A function building the recommendation system, called again whenever its sources change.
+                              Default builds the default system (with the published predictor model, raises
+                              `ModelNotPublishedException` if it wasn't trained).
+        :param get_sources_stamp: A function getting a stamp of everything the system is built from, which changes
+                                  when any of it does. Default is `get_default_sources_stamp`.
+        :param reload_interval: Time (in seconds) between checks of sources' stamp, `0` to check on every request.
+        :param clock: A function returning current time (in seconds).
+        """
+        self.__build_rec_sys: Optional[Callable[[], RecSys]] = None # `None` if system is never rebuilt
+        self.__get_sources_stamp: Callable[[], Hashable] = \
+            get_default_sources_stamp if get_sources_stamp is None else get_sources_stamp
+        self.__sources_stamp: Optional[Hashable] = None # stamp of sources current system was built from
+        self.__reload_interval: float = reload_interval
+        self.__clock: Callable[[], float] = clock
+        self.__next_check: float = clock() + reload_interval
+        self.__reloading: bool = False
+        self.__reload_lock: threading.Lock = threading.Lock()
+        if rec_sys is None:
+            self.__build_rec_sys = build_default_rec_sys if build_rec_sys is None else build_rec_sys
+            rec_sys, self.__sources_stamp = self.__build()
+        else:
+            rec_sys.warm_up() # load model before serving, so request threads never load it
+        self.rec_sys: RecSys = rec_sys
+        self.result_cache: Optional[ResultCache] = result_cache
+        self.courses: list = get_all_courses.get_all_courses()
+        super().__init__((host, port), RecommendationRequestHandler)
+
+    def get_rec_sys(self) -> RecSys:
+        """
+        Gets recommendation system to serve a request with, first rebuilding it if its sources changed (checked at most
+        once per reload interval). A single request rebuilds it, others are served by the current system meanwhile.
+        If rebuilding fails (e.g. a new model wasn't published yet), the current system keeps serving, until sources
+        change again.
+        :return: Recommendation system.
+        """
+        with self.__reload_lock:
+            if self.__build_rec_sys is None or self.__reloading or self.__clock() < self.__next_check:
+                return self.rec_sys
+            self.__next_check = self.__clock() + self.__reload_interval
+            try:
+                sources_stamp: Hashable = self.__get_sources_stamp()
+            except Exception as e: # e.g. a file replaced while checked, check again next time
+                print(f"Failed checking recommendation system sources: {e}", file=sys.stderr)
+                return self.rec_sys
+            if sources_stamp == self.__sources_stamp:
+                return self.rec_sys
+            self.__reloading = True
+        try: # rebuild outside lock, so other requests are served meanwhile
+            rec_sys, sources_stamp = self.__build()
+            self.rec_sys = rec_sys # replaced system's results are dropped by result cache, by its identity
+        except Exception as e:
+            print(f"Failed rebuilding recommendation system, serving previous one: {e}", file=sys.stderr)
+        finally:
+            with self.__reload_lock:
+                self.__sources_stamp = sources_stamp
+                self.__reloading = False
+        return self.rec_sys
+
+    def __build(self) -> Tuple[RecSys, Hashable]:
+        """
+        Builds recommendation system, with its model loaded.
+        :return: Recommendation system, stamp of its sources (taken once built, so the build's own cache writes don't
+                 count as a change).
+        """
+        rec_sys: RecSys = self.__build_rec_sys()
+        rec_sys.warm_up() # load model before serving, so request threads never load it
+        return rec_sys, self.__get_sources_stamp()
+
+
+def build_default_rec_sys() -> RecSys:
+    """
+    Builds default recommendation system, with the published predictor model and cached utility matrices.
+    :return: Recommendation system.
+    """
+    return RecSys(
+        chance_predictor=predictor.get_predictor(allow_train=False),
+        actions_utility_cache_name=recommendation.ACTIONS_UTILITY_CACHE_NAME,
+        courses_utility_cache_name=recommendation.COURSESS_UTILITY_CACHE_NAME,
+        org_chances_cache_name=recommendation.ORG_CHANCES_CACHE_NAME
+    )
+
+
+def get_default_sources_stamp() -> Hashable:
+    """
+    Gets a stamp of everything the default recommendation system is built from: fingerprint of predictor model, and
+    modification times of its published artifact, of dataset and of cache entries' manifests (rewritten whenever an
+    entry is).
+    :return: Stamp of sources, changes when any of them does.
+    """
+    model_fingerprint: str = predictor.model_fingerprint()
+    paths: List[str] = [model_store.model_path(predictor.MODEL_NAME, model_fingerprint),
+                        DEFAULT_DATASET_PATH] + sorted(glob.glob(utils.cache_path("*", "manifest.json")))
+    return model_fingerprint, tuple((path, os.path.getmtime(path)) for path in paths if utils.file_exists(path))
+
+
+def parse_fields(fields: List[cli.InputField], body: Dict[str, Any]) -> dict:
+    """
+    Parses input fields from a request body keyed by CLI argument names (without "--").
+    :param fields: Input fields to parse.
+    :param body: Request body.
+    :return: Parsed values, keyed by field name.
+    """
+    values: dict = dict()
+    for field in fields:
+        key: str = field.arg_name[2:]
+        if key in body:
+            value = field.type(body[key])
+            if field.choices is not None and value not in field.choices:
+                raise ValueError(f"Invalid value for \"{key}\": {value}")
+            values[field.field_name] = value
+        elif field.has_default:
+            values[field.field_name] = field.default
+        else:
+            raise ValueError(f"Missing field \"{key}\"")
+    return values
+
+
+def main() -> None:
+    """
+    Main function to be called when running as main module.
+    Serves recommendations until interrupted.
+    """
+    server_dict, = cli.parse_args(SERVER_INPUT_FIELDS)
+    result_cache_size: int = server_dict[FIELD_RESULT_CACHE_SIZE.field_name]
+    result_cache: Optional[ResultCache] = None if 0 == result_cache_size else \
+        ResultCache(result_cache_size, server_dict[FIELD_RESULT_CACHE_TTL.field_name])
+    reload_interval: float = server_dict[FIELD_RELOAD_INTERVAL.field_name]
+    if reload_interval < 0:
+        utils.exit_with_error(f"Invalid reload interval: {reload_interval}", print)
+    try:
+        server: RecommendationServer = RecommendationServer(server_dict[FIELD_HOST.field_name],
+                                                            server_dict[FIELD_PORT.field_name],
+                                                            result_cache=result_cache,
+                                                            reload_interval=reload_interval)
+    except ModelNotPublishedException as e:
+        utils.exit_with_error(str(e), print)
+    print(f"Serving recommendations at http://{server.server_address[0]}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
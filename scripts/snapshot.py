@@ -0,0 +1,104 @@
+"""
+Holds the single-file snapshot format: a versioned bundle of a JSON header and raw numeric arrays.
+Arrays are stored contiguously at aligned offsets, so reading a bundle maps it into memory (zero-copy, pages are loaded
+lazily and shared between all processes reading the same file) rather than parsing it.
+Layout: magic, format version (uint32), header length (uint64), JSON header, then arrays (each aligned).
+Used by recommendation system (warm-start snapshots).
+"""
+
+
+from typing import Tuple, Dict, Any
+import numpy as np
+import struct
+import json
+import os
+import utils
+
+
+# default path of recommendation system snapshot
+DEFAULT_PATH: str = os.path.join(utils.CACHE_ROOT, "recsys.snapshot")
+
+# marks a snapshot file
+MAGIC: bytes = b"RECSYSSN"
+
+# version of snapshot format, bundles of other versions aren't read
+VERSION: int = 2
+
+# alignment (in bytes) of arrays in bundle
+ALIGNMENT: int = 64
+
+# format of fixed-size prefix following magic: format version, header length
+__PREFIX_FORMAT: str = "<IQ"
+
+
+class SnapshotException(Exception):
+    """Exception thrown when a snapshot can't be read."""
+    def __init__(self, path: str, reason: str) -> None:
+        """
+        Initializes snapshot exception instance.
+        :param path: Path of snapshot.
+        :param reason: Why snapshot can't be read.
+        """
+        super().__init__(f"Can't read snapshot \"{path}\": {reason}")
+
+
+def write_bundle(path: str, header: Dict[str, Any], arrays: Dict[str, np.ndarray]) -> None:
+    """
+    Writes a bundle (atomically, so readers never see a partially written bundle).
+    :param path: Path of bundle file.
+    :param header: Metadata of bundle (JSON-serializable).
+    :param arrays: Numeric arrays of bundle, by name.
+    """
+    contiguous: Dict[str, np.ndarray] = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+    layout: Dict[str, Dict[str, Any]] = dict() # dtype, shape and offset (from first array) of each array
+    offset: int = 0
+    for name, array in contiguous.items():
+        # shape of original array, as contiguous copies of scalars (0-dimensional arrays) have a dimension
+        layout[name] = {"dtype": array.dtype.str, "shape": list(np.shape(arrays[name])), "offset": offset}
+        offset += __aligned(array.nbytes)
+    header_bytes: bytes = json.dumps({"header": header, "arrays": layout}).encode()
+    data_start: int = __aligned(len(MAGIC) + struct.calcsize(__PREFIX_FORMAT) + len(header_bytes))
+
+    def write(tmp_path: str) -> None:
+        with open(tmp_path, "wb") as file:
+            file.write(MAGIC)
+            file.write(struct.pack(__PREFIX_FORMAT, VERSION, len(header_bytes)))
+            file.write(header_bytes)
+            for name, array in contiguous.items():
+                file.seek(data_start + layout[name]["offset"])
+                file.write(array.data)
+            file.truncate(data_start + offset)
+    utils.atomic_write(path, write)
+
+
+def read_bundle(path: str) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+    """
+    Reads a bundle written by `write_bundle`, mapping its arrays into memory.
+    :param path: Path of bundle file.
+    :return: Metadata of bundle, read-only arrays of bundle (by name).
+    """
+    with open(path, "rb") as file:
+        if MAGIC != file.read(len(MAGIC)):
+            raise SnapshotException(path, "not a snapshot")
+        version, header_length = struct.unpack(__PREFIX_FORMAT, file.read(struct.calcsize(__PREFIX_FORMAT)))
+        if VERSION != version:
+            raise SnapshotException(path, f"format version {version} isn't supported (expected {VERSION})")
+        bundle: Dict[str, Any] = json.loads(file.read(header_length))
+    data_start: int = __aligned(len(MAGIC) + struct.calcsize(__PREFIX_FORMAT) + header_length)
+    mapped: np.ndarray = np.memmap(path, dtype=np.uint8, mode="r")
+    arrays: Dict[str, np.ndarray] = dict()
+    for name, entry in bundle["arrays"].items():
+        dtype: np.dtype = np.dtype(entry["dtype"])
+        start: int = data_start + entry["offset"]
+        count: int = int(np.prod(entry["shape"], dtype=np.int64))
+        arrays[name] = mapped[start:start + count * dtype.itemsize].view(dtype).reshape(tuple(entry["shape"]))
+    return bundle["header"], arrays
+
+
+def __aligned(size: int) -> int:
+    """
+    Rounds a size up to `ALIGNMENT`.
+    :param size: Size (in bytes).
+    :return: Aligned size.
+    """
+    return -(-size // ALIGNMENT) * ALIGNMENT
@@ -3,9 +3,11 @@ Holds source dataset utilities for recommendation system.
 """
 
 
-from typing import Tuple, List, Dict
+from typing import Optional, Tuple, List, Dict
 from Course import Course
 import pandas as pd
+import profiling
+import hashlib
 import utils
 
 
@@ -59,6 +61,16 @@ _COURSES: Dict[int, str] = {
 }
 
 
+def row_keys(df: pd.DataFrame) -> pd.Index:
+    """
+    Calculates stable keys of dataframe rows by their content, so a row keeps its key when rows are added, removed or
+    reordered (identical rows share a key).
+    :param df: Dataframe to calculate keys of (numeric columns, hashed as floats so storage dtype doesn't matter).
+    :return: Key of each row, ordered as `df` rows.
+    """
+    return pd.Index(pd.util.hash_pandas_object(df.astype(float), index=False).to_numpy(), name="row_key")
+
+
 class PrimaryData:
     """
     Base data used for calculations
@@ -68,6 +80,8 @@ class PrimaryData:
         :param df: Base dataframe.
         """
         self.__df = df
+        self.__fingerprint: Optional[str] = None
+        self.__courses_by_id: Optional[Dict[int, Course]] = None
 
     @staticmethod
     def read_csv(path: str) -> 'PrimaryData':
@@ -75,8 +89,21 @@ class PrimaryData:
         Loads primary data from CSV.
         :param path: CSV path.
         """
-        return PrimaryData(pd.read_csv(path))
+        with profiling.span("read_csv", path=path):
+            return PrimaryData(pd.read_csv(path))
     
+    @property
+    def fingerprint(self) -> str:
+        """
+        Content hash of primary data, identifies the dataset in cache manifests.
+        """
+        if self.__fingerprint is None:
+            digest = hashlib.sha256()
+            digest.update(",".join(self.__df.columns).encode())
+            digest.update(pd.util.hash_pandas_object(self.__df, index=True).to_numpy().tobytes())
+            self.__fingerprint = digest.hexdigest()[:16]
+        return self.__fingerprint
+
     def get_students_df_and_labels(self) -> Tuple[pd.DataFrame, pd.Series]:
         """
         Gets students' dataframe and target labels.
@@ -92,7 +119,7 @@ class PrimaryData:
         """
         def gen_func() -> pd.DataFrame:
             return self.__df[self.__df["Target"] == "Graduate"].drop(columns=["Target"])
-        return utils.get_cached_dataframe(gen_func, "students_data")
+        return utils.get_cached_dataframe(gen_func, "students_data", {"data": self.fingerprint}, dtype="float64")
     
     def get_courses_df(self) -> pd.DataFrame:
         """
@@ -104,18 +131,35 @@ class PrimaryData:
             courses_df: pd.DataFrame = self.__df[["Course", "Daytime/evening attendance"]].drop_duplicates()
             courses_df[C_COURSE_NAME] = courses_df["Course"].apply(lambda id: _COURSES[id])
             return courses_df
-        return utils.get_cached_dataframe(gen_func, "courses_data")
+        return utils.get_cached_dataframe(gen_func, "courses_data", {"data": self.fingerprint, "names": _COURSES})
     
+    def get_courses_by_id(self) -> Dict[int, Course]:
+        """
+        Gets all available courses by ID, each course as a single (shared) instance.
+        IDs identify courses, so each ID must have a single name - this is validated once, when courses are first
+        gotten. Courses sharing a name (e.g. day and evening "Social Service" or "Management") are distinct courses,
+        told apart by their IDs.
+        :return: Dictionary of courses by ID, ordered as courses dataframe.
+        """
+        if self.__courses_by_id is None:
+            courses_df: pd.DataFrame = self.get_courses_df()
+            courses: Dict[int, Course] = dict()
+            for course_id, course_name in zip(courses_df[C_COURSE_ID], courses_df[C_COURSE_NAME]):
+                course: Course = Course(id=int(course_id), name=str(course_name))
+                if courses.setdefault(course.id, course) != course: # ID may repeat (day and evening), not its name
+                    raise ValueError(f"Course {course.id} has conflicting names: "
+                                     f"\"{courses[course.id].name}\", \"{course.name}\"")
+            self.__courses_by_id = courses
+        return self.__courses_by_id
+
     def get_all_courses(self) -> List[Tuple[Course, bool]]:
         """
         Gets all available courses.
         :return: List of (course, is_evening).
         """
         courses_df: pd.DataFrame = self.get_courses_df()
+        courses: Dict[int, Course] = self.get_courses_by_id()
         return [
-            (
-                Course(id=int(course[C_COURSE_ID]), name=str(course[C_COURSE_NAME])),
-                int(course[C_COURSE_TIME]) == V_NIGHT
-            )
-            for _, course in courses_df.iterrows()
+            (courses[int(course_id)], int(course_time) == V_NIGHT)
+            for course_id, course_time in zip(courses_df[C_COURSE_ID], courses_df[C_COURSE_TIME])
         ]
@@ -3,9 +3,12 @@ Tests for CLI module.
 """
 
 
-from typing import List, Iterator
+from typing import Tuple, List, Iterator
 from pytest import MonkeyPatch
+import pytest
+import pandas as pd
 import recommendation
+import json
 
 
 def __run_cli_test_with(monkeypatch: MonkeyPatch, args_str: str, interactive_inputs: List[str]) -> None:
@@ -16,6 +19,20 @@ def __run_cli_test_with(monkeypatch: MonkeyPatch, args_str: str, interactive_inp
     recommendation.main()
 
 
+def __write_students_csv(tmp_path, rows: int) -> str:
+    input_path: str = str(tmp_path / "students.csv")
+    pd.read_csv("../data/enrolled.csv").head(rows).to_csv(input_path, index=False)
+    return input_path
+
+
+def __run_csv_test_with(monkeypatch: MonkeyPatch, tmp_path, input_path: str, args_str: str) -> Tuple[str, list]:
+    output_path, output_json_path = tmp_path / "output.txt", tmp_path / "output.json"
+    __run_cli_test_with(monkeypatch, f"--input {input_path} --output {output_path} --output-json {output_json_path} "
+                                     f"{args_str}", [])
+    with open(output_json_path, "r") as file:
+        return output_path.read_text(), json.load(file)
+
+
 def test_case_1(monkeypatch: MonkeyPatch) -> None:
     args_str: str = """--marital-status 1 
                        --application-mode 2 
@@ -359,3 +376,37 @@ def test_case_8(monkeypatch: MonkeyPatch) -> None:
                        --courses-rec-count 5"""
     interactive_inputs: List[str] = []
     __run_cli_test_with(monkeypatch, args_str, interactive_inputs)
+
+
+def test_csv_input_chunks(monkeypatch: MonkeyPatch, tmp_path) -> None:
+    input_path: str = __write_students_csv(tmp_path, 23)
+    single_chunk: Tuple[str, list] = __run_csv_test_with(monkeypatch, tmp_path, input_path, "--chunk-size 1000")
+    assert 23 == len(single_chunk[1]) and "Student 23:" in single_chunk[0]
+    for chunk_size in (1, 5, 23): # chunk per student, last chunk partial (23 = 4 * 5 + 3), chunk of exactly all
+        assert single_chunk == __run_csv_test_with(monkeypatch, tmp_path, input_path, f"--chunk-size {chunk_size}")
+    read_students_chunks = getattr(recommendation, "__read_students_chunks")
+    assert [5, 5, 5, 5, 3] == [len(students) for students in read_students_chunks(input_path, 5)]
+
+
+def test_empty_csv_input(monkeypatch: MonkeyPatch, tmp_path) -> None:
+    input_path: str = __write_students_csv(tmp_path, 0) # header only
+    assert ("", []) == __run_csv_test_with(monkeypatch, tmp_path, input_path, "--chunk-size 5")
+
+
+def test_csv_input_workers(monkeypatch: MonkeyPatch, tmp_path) -> None:
+    input_path: str = __write_students_csv(tmp_path, 23)
+    serial: Tuple[str, list] = __run_csv_test_with(monkeypatch, tmp_path, input_path, "--chunk-size 5 --workers 1")
+    assert serial == __run_csv_test_with(monkeypatch, tmp_path, input_path, "--chunk-size 5 --workers 2")
+
+
+def test_prediction_cache_rejected(monkeypatch: MonkeyPatch, tmp_path, capsys) -> None:
+    input_path: str = __write_students_csv(tmp_path, 3)
+    cases: List[Tuple[str, str]] = [
+        ("--workers 2 --prediction-cache 10", "Prediction cache can't be used with multiple workers"),
+        (f"--prediction-cache-file {tmp_path / 'predictions.pkl'} --snapshot ../cache/recsys.snapshot",
+         "Prediction cache can't be used with a snapshot")
+    ]
+    for args_str, message in cases:
+        with pytest.raises(SystemExit) as exit_info:
+            __run_cli_test_with(monkeypatch, f"--input {input_path} {args_str}", [])
+        assert 0 != exit_info.value.code and message in capsys.readouterr().out
@@ -0,0 +1,32 @@
+"""
+Tests for course manifest module.
+"""
+
+
+from typing import List, Tuple
+from Course import Course
+import course_manifest
+
+
+def test_get_courses(tmp_path) -> None:
+    data_path: str = str(tmp_path / "data.csv")
+    manifest_path: str = str(tmp_path / "cache" / "courses.json")
+    with open(data_path, "w") as file:
+        file.write("Course\n9238\n")
+    calls: List[int] = list()
+
+    def gen_func() -> List[Tuple[Course, bool]]:
+        calls.append(1)
+        return [(Course(9238, "Social Service"), False), (Course(9238, "Social Service"), True)]
+
+    generated = course_manifest.get_courses(data_path, gen_func, manifest_path)
+    read = course_manifest.get_courses(data_path, gen_func, manifest_path)
+    assert 1 == len(calls) # second call reads manifest
+    assert generated == read
+    assert read[0][0] is read[1][0] # shared instances
+
+    with open(data_path, "a") as file:
+        file.write("8014\n")
+    assert course_manifest.read_courses(data_path, manifest_path) is None # outdated
+    course_manifest.get_courses(data_path, gen_func, manifest_path)
+    assert 2 == len(calls)
@@ -0,0 +1,33 @@
+"""
+Tests for compiled random forest.
+"""
+
+
+from sklearn.ensemble import RandomForestClassifier
+from forest import CompiledForest
+import pandas as pd
+import numpy as np
+
+
+def fitted_forest() -> RandomForestClassifier:
+    rng: np.random.Generator = np.random.default_rng(7)
+    X: pd.DataFrame = pd.DataFrame(rng.integers(0, 5, (300, 4)) * 0.3, columns=["a", "b", "c", "d"])
+    y: np.ndarray = (X["a"] + rng.random(300) > X["b"]).astype(int)
+    return RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y)
+
+
+def test_matches_sklearn(tmp_path) -> None:
+    model: RandomForestClassifier = fitted_forest()
+    X: pd.DataFrame = pd.DataFrame(np.random.default_rng(8).random((50, 4)) * 1.5, columns=["a", "b", "c", "d"])
+    expected: np.ndarray = model.predict_proba(X)
+    for float32_thresholds in (False, True):
+        for prune in (False, True):
+            compiled: CompiledForest = CompiledForest.from_sklearn(model, float32_thresholds, prune)
+            assert np.allclose(expected, compiled.predict_proba(X), rtol=0, atol=1e-6)
+            assert np.allclose(expected[3, 1], compiled.predict_positive(X.iloc[3]), rtol=0, atol=1e-6) # single row
+
+    path: str = str(tmp_path / "forest.npz")
+    compiled.save(path)
+    loaded: CompiledForest = CompiledForest.load(path)
+    assert compiled.node_count == loaded.node_count
+    assert np.allclose(expected, loaded.predict_proba(X[["d", "c", "b", "a"]]), rtol=0, atol=1e-6) # aligned by name
@@ -0,0 +1,48 @@
+"""
+Tests for nearest-neighbour search utilities.
+"""
+
+
+import neighbors
+import pandas as pd
+import numpy as np
+
+
+def test_top_k_matches_nlargest() -> None:
+    scores: np.ndarray = np.random.default_rng(3).integers(0, 4, (20, 12)).astype(float) # many ties
+    for k in (1, 5, 11):
+        top: np.ndarray = neighbors.top_k_indices(scores, k)
+        for row, positions in zip(scores, top):
+            assert pd.Series(row).nlargest(k).index.tolist() == positions.tolist()
+    assert [2, 0, 3] == neighbors.top_k_indices(np.array([1.0, 0.0, 3.0, 1.0]), 3).tolist() # vector, ties by position
+
+
+def test_top_k_of_all_columns() -> None:
+    scores: np.ndarray = np.array([[0.2, 0.9, 0.2], [0.5, 0.1, 0.7]])
+    for k in (3, 10):
+        assert [[1, 0, 2], [2, 0, 1]] == neighbors.top_k_indices(scores, k).tolist()
+    assert (2, 0) == neighbors.top_k_indices(scores, 0).shape
+
+
+def test_top_k_nan_ranks_last() -> None:
+    scores: np.ndarray = np.array([[0.3, np.nan, 0.8, 0.1, np.nan], [np.nan, 0.4, 0.4, 0.9, 0.2]])
+    assert [[2, 0], [3, 1]] == neighbors.top_k_indices(scores, 2).tolist()
+    assert [2, 0, 3, 1] == neighbors.top_k_indices(scores[0], 4).tolist()
+
+
+def test_k_nearest() -> None:
+    rng: np.random.Generator = np.random.default_rng(4)
+    matrix: np.ndarray = neighbors.normalize_rows(rng.random((300, 6)))
+    queries: np.ndarray = neighbors.normalize_rows(rng.random((25, 6)))
+    expected: np.ndarray = queries @ matrix.T
+    positions, similarities = neighbors.k_nearest(matrix, queries, 7, block_elements=1000) # several blocks
+    assert np.array_equal(neighbors.top_k_indices(expected, 7), positions)
+    assert np.allclose(np.take_along_axis(expected, positions, axis=1), similarities)
+    assert (25, 300) == neighbors.k_nearest(matrix, queries, 1000, block_elements=1000)[0].shape # k capped
+
+    index: neighbors.IvfIndex = neighbors.IvfIndex(matrix, n_lists=8, n_probe=8) # probes all clusters, so exact
+    ann_positions, ann_similarities = index.k_nearest(queries, 7)
+    assert np.array_equal(positions, ann_positions) and np.allclose(similarities, ann_similarities)
+    restored: neighbors.IvfIndex = neighbors.IvfIndex.from_arrays(index.arrays, matrix, n_probe=2)
+    approx_positions, _ = restored.k_nearest(queries, 7)
+    assert (25, 7) == approx_positions.shape and 2 == restored.n_probe
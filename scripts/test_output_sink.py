@@ -0,0 +1,29 @@
+"""
+Tests for output sink module.
+"""
+
+
+from typing import List
+from OutputSink import OutputSink, JsonRecordWriter
+import json
+
+
+def test_json_array_writer(tmp_path) -> None:
+    for count in (0, 1, 3):
+        path: str = str(tmp_path / f"out{count}.json")
+        records: List[dict] = [{"i": i} for i in range(count)]
+        with JsonRecordWriter(OutputSink(path), "json") as writer:
+            for record in records:
+                writer.write(record)
+        with open(path) as file:
+            assert records == json.load(file)
+
+
+def test_json_lines_writer(tmp_path) -> None:
+    path: str = str(tmp_path / "out.jsonl")
+    records: List[dict] = [{"i": i} for i in range(3)]
+    with JsonRecordWriter(OutputSink(path), "jsonl") as writer:
+        for record in records:
+            writer.write(record)
+    with open(path) as file:
+        assert records == [json.loads(line) for line in file]
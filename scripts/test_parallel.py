@@ -0,0 +1,15 @@
+"""
+Tests for parallel module.
+"""
+
+
+from typing import List, Callable
+import parallel
+
+
+def test_map_ordered_keeps_order() -> None:
+    offset: int = 10
+    items: List[Callable[[], int]] = [lambda i=i: i * i for i in range(7)] # unpicklable items
+    expected: List[int] = [i * i + offset for i in range(7)]
+    for workers in (1, 3):
+        assert expected == parallel.map_ordered(lambda item: item() + offset, items, workers)
@@ -0,0 +1,40 @@
+"""
+Tests for prediction cache.
+"""
+
+
+from PredictionCache import PredictionCache
+import pandas as pd
+import numpy as np
+
+
+class CountingPredictor:
+    fingerprint: str = "test"
+
+    def __init__(self) -> None:
+        self.rows: int = 0
+
+    def __call__(self, student: pd.Series) -> float:
+        self.rows += 1
+        return 0.01 * student["a"]
+
+    def predict_batch(self, students: pd.DataFrame) -> np.ndarray:
+        self.rows += len(students)
+        return 0.01 * students["a"].to_numpy(dtype=float)
+
+
+def test_lru(tmp_path) -> None:
+    chance_predictor: CountingPredictor = CountingPredictor()
+    path: str = str(tmp_path / "predictions.npz")
+    cache: PredictionCache = PredictionCache(chance_predictor, 3, path)
+    students: pd.DataFrame = pd.DataFrame({"a": [1, 2, 1, 3], "b": [0, 0, 0, 0]})
+    assert np.allclose([0.01, 0.02, 0.01, 0.03], cache.predict_batch(students))
+    assert 3 == chance_predictor.rows # repeated student predicted once
+    assert 0.02 == cache(students.iloc[1])
+    assert 0.04 == cache(pd.Series({"a": 4, "b": 0})) # evicts least recently used (first student)
+    assert {"hits": 2, "misses": 4, "evictions": 1, "size": 3} == cache.stats
+
+    cache.save()
+    reloaded: PredictionCache = PredictionCache(CountingPredictor(), 3, path)
+    assert np.allclose([0.02, 0.03, 0.04], reloaded.predict_batch(pd.DataFrame({"a": [2, 3, 4], "b": [0, 0, 0]})))
+    assert 3 == reloaded.stats["hits"]
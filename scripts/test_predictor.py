@@ -0,0 +1,25 @@
+"""
+Tests for predictor modules.
+"""
+
+
+import pandas as pd
+import numpy as np
+import predictor
+import baseline
+
+
+def __students_sample() -> pd.DataFrame:
+    return pd.read_csv("../data/enrolled.csv").drop(columns=["Target"]).head(50)
+
+
+def test_batch_matches_single() -> None:
+    students: pd.DataFrame = __students_sample()
+    for chance_predictor in (predictor.get_predictor(), baseline.get_predictor()):
+        batch: np.ndarray = chance_predictor.predict_batch(students)
+        single: np.ndarray = np.array([chance_predictor(students.loc[ind]) for ind in students.index])
+        assert np.allclose(batch, single)
+
+
+def test_batch_empty() -> None:
+    assert 0 == len(predictor.get_predictor().predict_batch(__students_sample().head(0)))
@@ -0,0 +1,33 @@
+"""
+Tests for profiling module.
+"""
+
+
+from pytest import MonkeyPatch
+import profiling
+import json
+
+
+def test_disabled_records_nothing() -> None:
+    profiling.take_records()
+    with profiling.span("phase"):
+        profiling.count("calls")
+    assert ([], {}) == profiling.take_records()
+
+
+def test_trace(monkeypatch: MonkeyPatch, tmp_path) -> None:
+    monkeypatch.setattr(profiling, "__enabled", True) # restored after test
+    profiling.take_records()
+    with profiling.span("phase", rows=3):
+        profiling.count("calls")
+        profiling.count("rows", 3)
+    profiling.merge_records(([], {"calls": 2})) # e.g. from a worker
+
+    path: str = str(tmp_path / "trace.json")
+    profiling.write_trace(path)
+    profiling.take_records()
+    with open(path, "r") as file:
+        trace: dict = json.load(file)
+    assert {"calls": 3, "rows": 3} == trace["counters"]
+    assert [("phase", "X", {"rows": 3})] == [(event["name"], event["ph"], event["args"])
+                                             for event in trace["traceEvents"]]
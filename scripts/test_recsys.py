@@ -0,0 +1,93 @@
+"""
+Tests for recommendation system.
+"""
+
+
+from typing import Tuple, List, Any
+from pathlib import Path
+from conftest import StubPredictor, SAMPLE_ROWS, students_sample, assert_same_recommendations
+from src_data import PrimaryData
+import pandas as pd
+import numpy as np
+import neighbors
+import profiling
+import src_data
+import utils
+import RecSys
+
+
+def reference_recommendations(rec_sys: RecSys.RecSys, student: pd.Series, k: int,
+                              count: int) -> Tuple[List[Tuple[Any, float]], List[Tuple[Any, float]]]:
+    """
+    Recommends as before scoring was vectorized: `k` most similar graduates (by `nlargest`), each item column scored
+    on its own, items (stably) sorted by score and trimmed at the first non-positive score.
+    """
+    graduates: np.ndarray = neighbors.normalize_rows(rec_sys._RecSys__graduates_df.to_numpy(dtype=float))
+    similarity: pd.Series = pd.Series(graduates @ neighbors.normalize_rows(student.to_numpy(dtype=float)))
+    similar: pd.Index = similarity.nlargest(k).index
+    utility: np.ndarray = np.hstack(rec_sys._RecSys__items_utility)
+    items: list = rec_sys._RecSys__items
+    recs: list = list()
+    for columns in (rec_sys._RecSys__action_columns, rec_sys._RecSys__course_columns):
+        weights: pd.Series = similarity[similar]
+        scores: list = [(items[column], (weights * utility[similar, column]).sum() / weights.sum())
+                        for column in columns]
+        ranked: list = sorted(scores, key=lambda item: item[1], reverse=True)
+        recs.append([(item, score) for item, score in ranked if 0 < score][:count])
+    return recs[0], recs[1]
+
+
+def test_recommend_many_matches_recommend(build_rec_sys, monkeypatch) -> None:
+    rec_sys: RecSys.RecSys = build_rec_sys(k=4)
+    monkeypatch.setattr(RecSys, "SIMILARITY_BLOCK_ELEMENTS", 1000) # a few students per block, last block partial
+    students: pd.DataFrame = students_sample(32)
+    many: list = rec_sys.recommend_many(students, actions_rec_count=3, courses_rec_count=6)
+    assert_same_recommendations([rec_sys.recommend(student, 3, 6) for _, student in students.iterrows()], many)
+    assert any(0 < len(actions) and 0 < len(courses) for actions, courses in many)
+
+
+def test_scores_match_per_column_computation(build_rec_sys) -> None:
+    rec_sys: RecSys.RecSys = build_rec_sys(k=4)
+    students: pd.DataFrame = students_sample(40)
+    for count in (2, 50): # fewer and more than amount of items
+        expected: list = [reference_recommendations(rec_sys, student, 4, count) for _, student in students.iterrows()]
+        assert_same_recommendations(expected, rec_sys.recommend_many(students, count, count))
+    assert all(0 < score for recs in expected for items in recs for _, score in items) # only positive scores
+    assert any(len({score for _, score in items}) < len(items) for recs in expected for items in recs) # ties kept
+    course_count: int = len(rec_sys._RecSys__course_columns)
+    assert course_count < 50 and any(len(courses) < course_count for _, courses in expected) # non-positive trimmed
+
+
+def test_rebuild_predicts_only_new_graduates(build_rec_sys, monkeypatch) -> None:
+    monkeypatch.setattr(profiling, "__enabled", True)
+    profiling.take_records()
+    cache_names: dict = {"actions_utility_cache_name": "actions", "courses_utility_cache_name": "courses",
+                         "org_chances_cache_name": "org_chances"}
+    expected: list = build_rec_sys(**cache_names).recommend_many(students_sample(10))
+    predictor: StubPredictor = StubPredictor()
+    assert_same_recommendations(expected, build_rec_sys(predictor, **cache_names).recommend_many(students_sample(10)))
+    assert 0 == predictor.rows # all from cache
+
+    profiling.take_records()
+    build_rec_sys(StubPredictor(), rows=SAMPLE_ROWS + 40, **cache_names) # dataset grew
+    graduate_keys: list = [set(src_data.row_keys(PrimaryData(pd.read_csv("../data/cleaned_data.csv").head(rows))
+                                                 .get_graduates_df())) for rows in (SAMPLE_ROWS, SAMPLE_ROWS + 40)]
+    events, _ = profiling.take_records()
+    assert [len(graduate_keys[1] - graduate_keys[0])] == [event["args"]["rows"] for event in events
+                                                          if "org_chances" == event["name"]]
+
+
+def test_cache_backends_recommend_same(build_rec_sys, monkeypatch) -> None:
+    cache_names: dict = {"actions_utility_cache_name": "actions", "courses_utility_cache_name": "courses",
+                         "org_chances_cache_name": "org_chances"}
+    students: pd.DataFrame = students_sample(40)
+
+    def recommend(rec_sys: RecSys.RecSys) -> list:
+        return [[[(repr(item), score) for item, score in items] for items in recs]
+                for recs in rec_sys.recommend_many(students, 5, 10)]
+
+    expected: list = recommend(build_rec_sys(**cache_names)) # pickled
+    monkeypatch.setattr(utils, "CACHE_BACKEND", "mmap")
+    assert expected == recommend(build_rec_sys(**cache_names)) # exactly, tied items in same order
+    assert expected == recommend(build_rec_sys(StubPredictor(), **cache_names)) # read from mapped arrays
+    assert (Path(utils.CACHE_ROOT) / "courses.mmap.npy").exists()
@@ -0,0 +1,41 @@
+"""
+Tests for recommendation system evaluation.
+"""
+
+
+from conftest import students_sample
+from RecSys import RecSys
+import pandas as pd
+import numpy as np
+import recsys_eval
+import src_data
+import utils
+
+
+def reference_student_err(rec_sys: RecSys, student: pd.Series, recs: recsys_eval.StudentRecs) -> float:
+    """
+    Calculates a student's recommendation error as before variants were batched: each recommendation's variant of the
+    student is predicted on its own.
+    """
+    org_chance: float = rec_sys.predict_chance(student)
+    action_recs, course_recs = recs
+    errs: list = [abs(rate - utils.calc_improve(org_chance, rec_sys.predict_chance(action.apply(student))))
+                  for action, rate in action_recs]
+    for course, rate in course_recs:
+        course_student: pd.Series = student.copy()
+        course_student[src_data.C_STUD_COURSE] = course.id
+        errs.append(abs(rate - utils.calc_improve(org_chance, rec_sys.predict_chance(course_student))))
+    return 0 if 0 == len(errs) else sum(errs) / len(errs)
+
+
+def test_students_errs_match_per_student(build_rec_sys) -> None:
+    rec_sys: RecSys = build_rec_sys(k=4)
+    students: pd.DataFrame = students_sample(25)
+    recs: list = rec_sys.recommend_many(students, actions_rec_count=3, courses_rec_count=4)
+    recs[0] = ([], []) # nothing recommended
+    recs[1] = (recs[1][0], []) # actions only
+    errs: np.ndarray = recsys_eval.calc_students_errs(rec_sys, students, recs)
+    expected: list = [reference_student_err(rec_sys, student, student_recs)
+                      for (_, student), student_recs in zip(students.iterrows(), recs)]
+    assert np.allclose(expected, errs, rtol=0, atol=1e-12)
+    assert 0 == errs[0] and 0 < np.count_nonzero(errs)
@@ -0,0 +1,32 @@
+"""
+Tests for result cache.
+"""
+
+
+from ResultCache import ResultCache
+from typing import List
+
+
+def test_ttl_size_and_identity() -> None:
+    now: List[float] = [0.0]
+    cache: ResultCache = ResultCache(2, ttl=10, clock=lambda: now[0])
+    computed: List[str] = list()
+
+    def get(identity: str, key: str) -> str:
+        def compute() -> str:
+            computed.append(key)
+            return f"{identity}-{key}"
+        return cache.get_or_compute(identity, key, compute)
+
+    assert "a-1" == get("a", "1")
+    assert "a-1" == get("a", "1") # cached
+    get("a", "2")
+    get("a", "3") # evicts least recently used ("1")
+    get("a", "1")
+    assert ["1", "2", "3", "1"] == computed
+
+    now[0] = 10.0 # all expired
+    get("a", "1")
+    assert "b-1" == get("b", "1") # another system, all results dropped
+    assert ["1", "2", "3", "1", "1", "1"] == computed
+    assert {"hits": 1, "misses": 6, "evictions": 2, "expirations": 1, "invalidations": 1, "size": 1} == cache.stats
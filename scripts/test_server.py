@@ -0,0 +1,106 @@
+"""
+Tests for recommendation server.
+"""
+
+
+from typing import Callable, Iterator, Tuple, List, Dict, Any
+from urllib.error import HTTPError
+from conftest import StubPredictor, students_sample
+from model_store import ModelNotPublishedException
+from ResultCache import ResultCache
+from Course import CourseEncoder
+from RecSys import RecSys
+import urllib.request
+import pandas as pd
+import numpy as np
+import threading
+import pytest
+import recommendation
+import server
+import json
+import cli
+
+
+@pytest.fixture
+def serve() -> Iterator[Callable[..., str]]:
+    """
+    Gets a function starting a recommendation server (on a free port, in a thread), and getting its URL.
+    Servers are shut down after the test.
+    """
+    servers: List[server.RecommendationServer] = list()
+
+    def start(**kwargs) -> str:
+        servers.append(server.RecommendationServer("localhost", 0, **kwargs))
+        threading.Thread(target=servers[-1].serve_forever, daemon=True).start()
+        return f"http://localhost:{servers[-1].server_address[1]}"
+    yield start
+    for started in servers:
+        started.shutdown()
+        started.server_close()
+
+
+def post_recommend(url: str, body: bytes) -> Tuple[int, Dict[str, Any]]:
+    request: urllib.request.Request = urllib.request.Request(f"{url}/recommend", data=body, method="POST")
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.load(response)
+    except HTTPError as e:
+        return e.code, json.load(e)
+
+
+def student_body(position: int) -> Dict[str, Any]:
+    student: pd.Series = students_sample(position + 1).iloc[position]
+    return {field.arg_name[2:]: float(student[field.field_name]) for field in cli.STUDENT_INPUT_FIELDS}
+
+
+def test_recommend_requests(serve, build_rec_sys) -> None:
+    rec_sys: RecSys = build_rec_sys()
+    url: str = serve(rec_sys=rec_sys)
+    body: Dict[str, Any] = {**student_body(3), "courses-rec-count": 3}
+    status, response = post_recommend(url, json.dumps(body).encode())
+    expected: tuple = recommendation.recommend(server.parse_fields(cli.STUDENT_INPUT_FIELDS, body), 5, 3, rec_sys)
+    assert 200 == status
+    assert json.loads(json.dumps(dict(zip(["OrgChance", "ActionsRec", "CoursesRec"], expected)),
+                                 cls=CourseEncoder)) == response
+
+    del body["course"]
+    assert (400, {"Error": "Missing field \"course\""}) == post_recommend(url, json.dumps(body).encode())
+    status, response = post_recommend(url, b"{\"course\": 33,")
+    assert 400 == status and "Error" in response
+
+
+
+class ShiftedPredictor(StubPredictor):
+    """
+    Stub predictor of a republished model, predicting higher chances than `StubPredictor`.
+    """
+    def predict_batch(self, students: pd.DataFrame) -> np.ndarray:
+        return super().predict_batch(students) + 0.1
+
+
+def test_rebuilt_on_sources_change(serve, build_rec_sys, capsys) -> None:
+    model: List[str] = ["v1"] # fingerprint of published model
+
+    def build() -> RecSys:
+        if "unpublished" == model[0]:
+            raise ModelNotPublishedException("stub", "v3")
+        return build_rec_sys(StubPredictor(model[0]) if "v1" == model[0] else ShiftedPredictor(model[0]))
+
+    result_cache: ResultCache = ResultCache(16, 300)
+    url: str = serve(result_cache=result_cache, build_rec_sys=build, get_sources_stamp=lambda: model[0],
+                     reload_interval=0)
+    body: bytes = json.dumps(student_body(3)).encode()
+    status, response = post_recommend(url, body)
+    assert 200 == status and (200, response) == post_recommend(url, body)
+    assert 1 == result_cache.stats["hits"]
+
+    model[0] = "v2" # republished
+    status, republished_response = post_recommend(url, body)
+    assert 200 == status and response["OrgChance"] + 10 == pytest.approx(republished_response["OrgChance"])
+    assert {"hits": 1, "misses": 2, "invalidations": 1} == \
+        {name: result_cache.stats[name] for name in ("hits", "misses", "invalidations")}
+
+    model[0] = "unpublished" # e.g. dataset changed, rebuild fails, previous system keeps serving
+    assert (200, republished_response) == post_recommend(url, body)
+    assert "was not published" in capsys.readouterr().err
+    assert 2 == result_cache.stats["hits"]
@@ -0,0 +1,69 @@
+"""
+Tests for snapshots (bundle format, and recommendation system round trip).
+"""
+
+
+from sklearn.ensemble import RandomForestClassifier
+from ChancePredictor import ChancePredictor
+from forest import CompiledForest
+from src_data import PrimaryData
+import pandas as pd
+import numpy as np
+import warnings
+import pytest
+import snapshot
+import RecSys
+import utils
+
+
+def test_round_trip(tmp_path) -> None:
+    path: str = str(tmp_path / "bundle.snapshot")
+    arrays = {"matrix": np.arange(12, dtype=np.float32).reshape(3, 4), "scalar": np.array(7),
+              "bytes": np.frombuffer(b"abc", dtype=np.uint8), "empty": np.empty((0, 2))}
+    snapshot.write_bundle(path, {"name": "test"}, arrays)
+    header, read = snapshot.read_bundle(path)
+    assert {"name": "test"} == header
+    for name, array in arrays.items():
+        assert array.dtype == read[name].dtype and np.array_equal(array, read[name])
+        assert 0 == read[name].ctypes.data % snapshot.ALIGNMENT or 0 == read[name].size # mapped, aligned
+    assert 7 == int(read["scalar"])
+    assert not read["matrix"].flags.writeable
+
+
+def test_rejects_other_files(tmp_path) -> None:
+    path: str = str(tmp_path / "other.snapshot")
+    with open(path, "wb") as file:
+        file.write(b"not a snapshot at all")
+    with pytest.raises(snapshot.SnapshotException):
+        snapshot.read_bundle(path)
+
+
+def test_recsys_round_trip(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(utils, "CACHE_ROOT", str(tmp_path)) # keep graduates of test dataset out of default cache
+    df: pd.DataFrame = pd.read_csv("../data/cleaned_data.csv").head(300)
+    labeled: pd.DataFrame = df[df["Target"] != "Enrolled"]
+    model: RandomForestClassifier = RandomForestClassifier(n_estimators=10, random_state=0).fit(
+        labeled.drop(columns=["Target"]), (labeled["Target"] == "Dropout").astype(int)
+    )
+    chance_predictor: ChancePredictor = ChancePredictor(lambda: model, fingerprint="test",
+                                                        load_compiled=lambda: CompiledForest.from_sklearn(model))
+    rec_sys: RecSys.RecSys = RecSys.RecSys(chance_predictor, primary_data=PrimaryData(df), k=3, build_workers=1)
+    path: str = str(tmp_path / "recsys.snapshot")
+    rec_sys.save_snapshot(path)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error") # not built from default dataset, so never stale
+        loaded: RecSys.RecSys = RecSys.RecSys.load_snapshot(path)
+
+    assert vars(rec_sys).keys() == vars(loaded).keys() # every attribute is restored
+    assert rec_sys.identity == loaded.identity
+    students: pd.DataFrame = pd.read_csv("../data/enrolled.csv").drop(columns=["Target"]).head(20)
+    assert np.array_equal(rec_sys.predict_chances(students), loaded.predict_chances(students))
+    def described(recs: list) -> list:
+        return [[[(str(item), score) for item, score in items] for items in student_recs] for student_recs in recs]
+    assert described(rec_sys.recommend_many(students)) == described(loaded.recommend_many(students))
+
+    header, arrays = snapshot.read_bundle(path) # as if built from another version of default dataset
+    stale_path: str = str(tmp_path / "stale.snapshot")
+    snapshot.write_bundle(stale_path, {**header, "dataset_source": "another version"}, arrays)
+    with pytest.warns(UserWarning, match="stale"):
+        RecSys.RecSys.load_snapshot(stale_path)
@@ -0,0 +1,27 @@
+"""
+Tests for source data module.
+"""
+
+
+from pytest import MonkeyPatch
+import pandas as pd
+import pytest
+import src_data
+
+
+def test_courses_by_id(monkeypatch: MonkeyPatch) -> None:
+    courses_df: pd.DataFrame = pd.DataFrame({
+        src_data.C_COURSE_ID: [9238, 8014, 9238],
+        src_data.C_COURSE_TIME: [src_data.V_DAY, src_data.V_NIGHT, src_data.V_NIGHT],
+        src_data.C_COURSE_NAME: ["Social Service", "Social Service", "Social Service"]
+    })
+    monkeypatch.setattr(src_data.PrimaryData, "get_courses_df", lambda self: courses_df)
+    data: src_data.PrimaryData = src_data.PrimaryData(pd.DataFrame())
+
+    courses = data.get_courses_by_id()
+    assert [9238, 8014] == list(courses.keys()) # same name, distinct courses
+    assert all(course is courses[course.id] for course, _ in data.get_all_courses()) # shared instances
+
+    courses_df.loc[2, src_data.C_COURSE_NAME] = "Management"
+    with pytest.raises(ValueError):
+        src_data.PrimaryData(pd.DataFrame()).get_courses_by_id() # same ID, conflicting names
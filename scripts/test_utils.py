@@ -0,0 +1,60 @@
+"""
+Tests for utilities module.
+"""
+
+
+from typing import List
+from pytest import MonkeyPatch
+import pandas as pd
+import utils
+
+
+def test_cached_dataframe_invalidation(monkeypatch: MonkeyPatch, tmp_path) -> None:
+    monkeypatch.setattr(utils, "CACHE_ROOT", str(tmp_path))
+    calls: List[int] = []
+    def gen_func() -> pd.DataFrame:
+        calls.append(1)
+        return pd.DataFrame({"a": [len(calls)]})
+
+    assert 1 == utils.get_cached_dataframe(gen_func, "entry", {"data": "x"})["a"][0]
+    assert 1 == utils.get_cached_dataframe(gen_func, "entry", {"data": "x"})["a"][0] # cache hit
+    assert 2 == utils.get_cached_dataframe(gen_func, "entry", {"data": "y"})["a"][0] # manifest changed, rebuilt
+    assert 2 == len(calls)
+    assert not any(path.name.endswith(".tmp") for path in tmp_path.iterdir())
+
+
+def test_incremental_cached_dataframe(monkeypatch: MonkeyPatch, tmp_path) -> None:
+    monkeypatch.setattr(utils, "CACHE_ROOT", str(tmp_path))
+    generated: List[int] = []
+    def gen_rows(keys: pd.Index) -> pd.DataFrame:
+        generated.extend(keys)
+        return pd.DataFrame({"a": [10 * key for key in keys]}, index=keys)
+
+    df: pd.DataFrame = utils.get_incremental_cached_dataframe(gen_rows, "entry", pd.Index([1, 2, 2, 3]))
+    assert [1, 2, 3] == df.index.tolist() and [1, 2, 3] == generated
+    df = utils.get_incremental_cached_dataframe(gen_rows, "entry", pd.Index([3, 1, 4])) # 2 removed, 4 added
+    assert [1, 3, 4] == df.index.tolist() and [10, 30, 40] == df["a"].tolist()
+    assert [1, 2, 3, 4] == generated # only new row generated
+    df = utils.get_incremental_cached_dataframe(gen_rows, "entry", pd.Index([1, 3, 4]), {"version": 2})
+    assert [1, 2, 3, 4, 1, 3, 4] == generated # manifest changed, all rows regenerated
+
+
+def test_mapped_dataframe_round_trip(monkeypatch: MonkeyPatch, tmp_path) -> None:
+    monkeypatch.setattr(utils, "CACHE_ROOT", str(tmp_path))
+    monkeypatch.setattr(utils, "CACHE_BACKEND", "mmap")
+    df: pd.DataFrame = pd.DataFrame({"a": [0.1, 1 / 3, 2.0], 7: [1e-17, -5.5, 0.0]},
+                                    index=pd.Index([11, 3, 7], dtype="uint64", name="key"))
+    calls: List[int] = []
+    def gen_func() -> pd.DataFrame:
+        calls.append(1)
+        return df
+
+    utils.get_cached_dataframe(gen_func, "entry", {"data": "x"}, dtype="float64")
+    read_df: pd.DataFrame = utils.get_cached_dataframe(gen_func, "entry", {"data": "x"}, dtype="float64")
+    assert 1 == len(calls) and (tmp_path / "entry.mmap.npy").exists() # read from mapped array
+    pd.testing.assert_frame_equal(df, read_df) # values, index, its name and columns, exactly
+    assert not read_df.to_numpy().flags.writeable
+    utils.get_cached_dataframe(gen_func, "entry", {"data": "x"}, dtype="float32")
+    assert 2 == len(calls) # element type changed, rebuilt
+    read_df = utils.get_cached_dataframe(gen_func, "entry", {"data": "x"}, dtype="float32")
+    assert 2 == len(calls) and "float32" == read_df["a"].dtype
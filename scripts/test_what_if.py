@@ -0,0 +1,53 @@
+"""
+Tests for what-if engine (and the student action transforms it applies).
+"""
+
+
+from StudentAction import StudentAction
+import pandas as pd
+import numpy as np
+import src_data
+import what_if
+
+
+def students_df() -> pd.DataFrame:
+    return pd.DataFrame({
+        src_data.C_STUD_COURSE: [33, 171, 9003],
+        src_data.C_STUD_COURSE_TIME: [src_data.V_DAY, src_data.V_NIGHT, src_data.V_DAY],
+        src_data.C_STUD_UNITS_SEM1: [0, 3, 10],
+        src_data.C_STUD_UNITS_SEM2: [2, 3, 1]
+    })
+
+
+def test_transforms() -> None:
+    students: pd.DataFrame = students_df()
+    night: pd.DataFrame = StudentAction.ADD_NIGHT_COURSES.transform(students)
+    assert [src_data.V_NIGHT] * 3 == night[src_data.C_STUD_COURSE_TIME].tolist() # course time, not course
+    assert students[src_data.C_STUD_COURSE].tolist() == night[src_data.C_STUD_COURSE].tolist()
+    assert students.equals(students_df()) # input isn't modified
+
+    reduced: pd.DataFrame = StudentAction.REDUCE1.transform(students)
+    assert [0, 1, 8] == reduced[src_data.C_STUD_UNITS_SEM1].tolist() # clipped at zero, 2 + 2 units reduced
+    assert [2, 1, 0] == reduced[src_data.C_STUD_UNITS_SEM2].tolist() # first student has too few units
+    assert [False, True, True] == StudentAction.REDUCE1.applicable(students).tolist()
+    assert [False, False, True] == StudentAction.REDUCE2.applicable(students).tolist()
+
+    student: pd.Series = students.iloc[1]
+    assert src_data.V_DAY == StudentAction.ADD_DAY_COURSES.apply(student)[src_data.C_STUD_COURSE_TIME]
+    assert src_data.V_NIGHT == student[src_data.C_STUD_COURSE_TIME]
+
+
+def test_improvements() -> None:
+    students: pd.DataFrame = students_df()
+    actions = [StudentAction.ADD_DAY_COURSES, StudentAction.REDUCE1]
+    calls = list()
+
+    def chance_predictor(student: pd.Series) -> float:
+        calls.append(1)
+        return 0.1 * student[src_data.C_STUD_COURSE_TIME] - 0.01 * student[src_data.C_STUD_UNITS_SEM1]
+
+    improvement: pd.DataFrame = what_if.improvements(students, actions, chance_predictor)
+    assert len(students) * (1 + len(actions)) == len(calls) # students and all variants, each predicted once
+    assert [action.id for action in actions] == improvement.columns.tolist()
+    assert np.allclose([0, 0.1, 0], improvement[StudentAction.ADD_DAY_COURSES.id]) # day students don't change
+    assert np.allclose([0, 0.02, 0.02], improvement[StudentAction.REDUCE1.id])
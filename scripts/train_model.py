@@ -0,0 +1,42 @@
+"""
+Trains predictor models and publishes them to the model store.
+Execute this script whenever training data or model settings change, so that serving processes (CLI, GUI) only
+load stored models and never train.
+Usage:
+python train_model.py
+[--model <Model to train: predictor, baseline or all (default)>]
+"""
+
+
+from typing import Dict, Callable, List
+import predictor
+import baseline
+import cli
+
+
+# maps model choice to its train-and-publish function
+__TRAIN_FUNCS: Dict[str, Callable[[], str]] = {
+    "predictor": predictor.train_and_publish,
+    "baseline": baseline.train_and_publish
+}
+
+
+FIELD_MODEL: cli.InputField = cli.InputField(str, "Model to train", "--model",
+                                             choices=list(__TRAIN_FUNCS.keys()) + ["all"], default="all")
+TRAIN_INPUT_FIELDS: List[cli.InputField] = [FIELD_MODEL]
+
+
+def main() -> None:
+    """
+    Main function to be called when running as main module.
+    Trains and publishes chosen models.
+    """
+    train_dict, = cli.parse_args(TRAIN_INPUT_FIELDS)
+    model_choice: str = train_dict[FIELD_MODEL.field_name]
+    for name, train_and_publish in __TRAIN_FUNCS.items():
+        if model_choice in (name, "all"):
+            print(f"Published {name} model at \"{train_and_publish()}\"")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,13 +4,26 @@ Used by recommendation system.
 """
 
 
-from typing import Callable, Optional, Type, Dict, Any
+from typing import TypeVar, Callable, Optional, Type, Tuple, Dict, Any
 import pandas as pd
+import numpy as np
+import profiling
 import json
 import sys
 import os
 
 
+T = TypeVar('T') # used for generics
+
+
+# root directory of cache, may be overridden by setting environment variable RECSYS_CACHE_DIR
+CACHE_ROOT: str = os.environ.get("RECSYS_CACHE_DIR", "../cache")
+
+# storage backend of numeric cache entries, may be overridden by setting environment variable RECSYS_CACHE_BACKEND:
+# "pickle" - pandas pickles, "mmap" - contiguous arrays mapped into memory (zero-copy, shared between processes)
+CACHE_BACKEND: str = os.environ.get("RECSYS_CACHE_BACKEND", "pickle")
+
+
 # represents zero improvement rate
 NO_IMPROVE: float = 0.0
 
@@ -85,23 +98,223 @@ def append_output_json(path: Optional[str], data: Dict[str, Any],
     append_output(path, json.dumps(data, cls=encoder))
 
 
-def get_cached_dataframe(gen_func: Callable[[], pd.DataFrame], cache_name: str) -> pd.DataFrame:
+def atomic_write(path: str, write_func: Callable[[str], None]) -> None:
+    """
+    Writes a file atomically: data is written to a temporary file which then replaces `path`,
+    so readers never see a partially written file.
+    :param path: Path of file to write.
+    :param write_func: A function which receives a (temporary) path and writes data to it.
+    """
+    tmp_path: str = f"{path}.{os.getpid()}.tmp"
+    try:
+        write_func(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        delete_file_if_exists(tmp_path) # clean up if writing failed
+
+
+def cache_path(cache_name: str, extension: str) -> str:
+    """
+    Gets path of a cache file.
+    :param cache_name: Name of cache entry.
+    :param extension: Extension of cache file.
+    :return: Path of cache file (under `CACHE_ROOT`).
+    """
+    return os.path.join(CACHE_ROOT, f"{cache_name}.{extension}")
+
+
+def read_cache_manifest(cache_name: str) -> Optional[Dict[str, Any]]:
+    """
+    Reads manifest of a cache entry.
+    :param cache_name: Name of cache entry.
+    :return: Manifest of cache entry, or `None` if missing or unreadable.
+    """
+    try:
+        with open(cache_path(cache_name, "manifest.json"), "r") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def write_cache_manifest(cache_name: str, manifest: Dict[str, Any]) -> None:
+    """
+    Writes manifest of a cache entry (atomically).
+    :param cache_name: Name of cache entry.
+    :param manifest: Manifest to write.
+    """
+    def write(path: str) -> None:
+        with open(path, "w") as file:
+            json.dump(manifest, file, indent=4)
+    atomic_write(cache_path(cache_name, "manifest.json"), write)
+
+
+def normalize_manifest(manifest: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Normalizes a manifest to its JSON form (e.g. tuples become lists), so it can be compared with a stored one.
+    :param manifest: Manifest to normalize, `None` for an empty manifest.
+    :return: Normalized manifest.
+    """
+    return json.loads(json.dumps({} if manifest is None else manifest))
+
+
+def write_mapped_dataframe(df: pd.DataFrame, cache_name: str, dtype: str) -> None:
+    """
+    Writes a numeric dataframe to cache as a contiguous array file, with its index and column header beside it.
+    :param df: Dataframe to write.
+    :param cache_name: Name of cache entry.
+    :param dtype: Type of array elements (e.g. "float64").
+    """
+    atomic_write(cache_path(cache_name, "npy"), lambda path: __save_array(path, df.to_numpy(dtype=dtype)))
+    atomic_write(cache_path(cache_name, "index.npy"), lambda path: __save_array(path, df.index.to_numpy()))
+    def write_header(path: str) -> None:
+        with open(path, "w") as file:
+            json.dump({"columns": df.columns.tolist(), "index_name": df.index.name}, file)
+    atomic_write(cache_path(cache_name, "header.json"), write_header)
+
+
+def read_mapped_dataframe(cache_name: str) -> pd.DataFrame:
+    """
+    Reads a dataframe written by `write_mapped_dataframe`, mapping its array file into memory (zero-copy, pages are
+    loaded lazily and shared between all processes reading the same file).
+    :param cache_name: Name of cache entry.
+    :return: Read-only dataframe backed by the mapped array.
+    """
+    values: np.ndarray = np.load(cache_path(cache_name, "npy"), mmap_mode="r")
+    index: np.ndarray = np.load(cache_path(cache_name, "index.npy"), mmap_mode="r")
+    with open(cache_path(cache_name, "header.json"), "r") as file:
+        header: Dict[str, Any] = json.load(file)
+    return pd.DataFrame(values, index=pd.Index(index, name=header["index_name"]), columns=header["columns"],
+                        copy=False)
+
+
+def __save_array(path: str, array: np.ndarray) -> None:
+    """
+    Saves an array as an `.npy` file at exactly `path` (`np.save` would append an extension).
+    :param path: Path of file to save.
+    :param array: Array to save.
+    """
+    with open(path, "wb") as file:
+        np.save(file, np.ascontiguousarray(array))
+
+
+def get_cached_dataframe(gen_func: Callable[[], pd.DataFrame], cache_name: str,
+                         manifest: Optional[Dict[str, Any]] = None,
+                         dtype: Optional[str] = None) -> pd.DataFrame:
     """
-    Generates a dataframe from primary data, or reads from cache if exists.
-    :param gen_func: A function which receives primary data and generates a dataframe.
-    :param cache_name: Name of cache file.
-    :param primary_data: Primary dataset.
+    Generates a dataframe from primary data, or reads from cache if exists and is up to date.
+    Each cache entry is stored with a manifest of everything it was generated from (e.g. dataset and predictor
+    fingerprints), if it doesn't match `manifest` the entry is regenerated.
+    :param gen_func: A function which generates the dataframe.
+    :param cache_name: Name of cache entry.
+    :param manifest: Description of everything the dataframe is generated from (JSON-serializable).
+    :param dtype: Array element type for numeric dataframes (e.g. "float64"), used when `CACHE_BACKEND` is "mmap"
+                  to store the dataframe as a memory-mapped array (regenerated if stored with another type). `None`
+                  to always store as pickle.
     :return: Generated dataframe.
     """
-    create_folder_if_missing("../cache") # create cache folder if missing
-    cache_path: str = f"../cache/{cache_name}.pkl"
-    if os.path.exists(cache_path):
-        return pd.read_pickle(cache_path)
-    df: pd.DataFrame = gen_func()
-    df.to_pickle(cache_path)
+    entry_name, manifest, read_func, write_func = __dataframe_entry(cache_name, manifest, dtype)
+    return get_cached_entry(gen_func, entry_name, manifest, read_func, write_func)
+
+
+def get_cached_entry(gen_func: Callable[[], T], cache_name: str, manifest: Optional[Dict[str, Any]],
+                     read_func: Callable[[], T],
+                     write_func: Callable[[T], None]) -> T:
+    """
+    Reads a cache entry if its manifest matches, otherwise generates and writes it.
+    :param gen_func: A function which generates the entry's data.
+    :param cache_name: Name of cache entry.
+    :param manifest: Description of everything the data is generated from (JSON-serializable).
+    :param read_func: A function which reads the entry's data.
+    :param write_func: A function which writes the entry's data.
+    :return: Read or generated data.
+    """
+    create_folder_if_missing(CACHE_ROOT) # create cache folder if missing
+    manifest = normalize_manifest(manifest)
+    if read_cache_manifest(cache_name) == manifest:
+        try:
+            with profiling.span("cache_read", entry=cache_name):
+                return read_func()
+        except Exception:
+            pass # missing or unreadable entry (e.g. written by an incompatible pandas version), regenerate it
+    data: T = gen_func()
+    __write_cache_entry(cache_name, manifest, data, write_func)
+    return data
+
+
+def get_incremental_cached_dataframe(gen_rows_func: Callable[[pd.Index], pd.DataFrame], cache_name: str,
+                                     keys: pd.Index,
+                                     manifest: Optional[Dict[str, Any]] = None,
+                                     dtype: Optional[str] = None) -> pd.DataFrame:
+    """
+    Gets a dataframe whose rows are generated independently of each other, keyed by a stable row key (e.g. a hash of
+    the row it's generated from), reading it from cache and only generating rows of new keys.
+    If the entry's manifest matches, rows of keys missing from cache are generated and appended, and rows of keys no
+    longer requested are dropped - so updating the entry costs as much as the change, not as the whole dataframe.
+    Otherwise, all rows are generated.
+    :param gen_rows_func: A function which receives unique row keys, and generates their rows (indexed by key).
+    :param cache_name: Name of cache entry.
+    :param keys: Keys of all rows the dataframe should have (may repeat).
+    :param manifest: Description of everything rows are generated from, other than their keys (JSON-serializable).
+    :param dtype: Array element type for numeric dataframes, see `get_cached_dataframe`.
+    :return: Dataframe indexed by unique row keys (cached rows first, then new ones, each in `keys` order).
+    """
+    create_folder_if_missing(CACHE_ROOT) # create cache folder if missing
+    entry_name, manifest, read_func, write_func = __dataframe_entry(cache_name, manifest, dtype)
+    unique_keys: pd.Index = keys.unique()
+    cached: Optional[pd.DataFrame] = None
+    if read_cache_manifest(entry_name) == manifest:
+        try:
+            with profiling.span("cache_read", entry=entry_name):
+                cached = read_func()
+        except Exception:
+            pass # missing or unreadable entry, regenerate it
+
+    if cached is None:
+        df: pd.DataFrame = gen_rows_func(unique_keys)
+    else:
+        kept: pd.DataFrame = cached[cached.index.isin(unique_keys)] # drop rows of removed keys
+        new_keys: pd.Index = unique_keys[~unique_keys.isin(cached.index)]
+        if 0 == len(new_keys) and len(kept) == len(cached):
+            return cached # up to date
+        df = pd.concat([kept, gen_rows_func(new_keys)]) if 0 < len(new_keys) else kept
+    __write_cache_entry(entry_name, manifest, df, write_func)
     return df
 
 
+def __dataframe_entry(cache_name: str, manifest: Optional[Dict[str, Any]],
+                      dtype: Optional[str]) -> Tuple[str, Dict[str, Any], Callable[[], pd.DataFrame],
+                                                     Callable[[pd.DataFrame], None]]:
+    """
+    Gets name, manifest and storage functions of a dataframe cache entry, by cache backend.
+    :param cache_name: Name of cache entry.
+    :param manifest: Description of everything the dataframe is generated from.
+    :param dtype: Array element type for numeric dataframes, see `get_cached_dataframe`.
+    :return: Name of entry (as stored), normalized manifest of entry (memory-mapped entries also depend on their
+             element type), a function reading the entry, a function writing the entry.
+    """
+    manifest = normalize_manifest(manifest)
+    if dtype is not None and "mmap" == CACHE_BACKEND:
+        mapped_name: str = f"{cache_name}.mmap"
+        return mapped_name, {**manifest, "dtype": dtype}, lambda: read_mapped_dataframe(mapped_name), \
+            lambda df: write_mapped_dataframe(df, mapped_name, dtype)
+    data_path: str = cache_path(cache_name, "pkl")
+    return cache_name, manifest, lambda: pd.read_pickle(data_path), lambda df: atomic_write(data_path, df.to_pickle)
+
+
+def __write_cache_entry(cache_name: str, manifest: Dict[str, Any], data: T, write_func: Callable[[T], None]) -> None:
+    """
+    Writes a cache entry and its manifest (the entry is invalid until both are fully written).
+    :param cache_name: Name of cache entry.
+    :param manifest: Normalized manifest of entry.
+    :param data: Data of entry.
+    :param write_func: A function which writes the entry's data.
+    """
+    with profiling.span("cache_write", entry=cache_name):
+        delete_file_if_exists(cache_path(cache_name, "manifest.json")) # entry is invalid until fully rewritten
+        write_func(data)
+        write_cache_manifest(cache_name, manifest)
+
+
 def calc_improve(org: float, new: float) -> float:
     """
     Calculates improve rate based on given success chances.
@@ -0,0 +1,64 @@
+"""
+Holds the what-if engine: stacks students with actions applied on them, and predicts the effect of each action with
+a single (batched) predictor call.
+Used by recommendation system (utility matrices) and its evaluation (verifying recommendations).
+"""
+
+
+from typing import Callable, Optional, Tuple, List, Dict
+from StudentAction import StudentAction
+import pandas as pd
+import numpy as np
+import ChancePredictor
+import utils
+
+
+def stack_variants(students: pd.DataFrame, pairs: List[Tuple[int, StudentAction]]) -> pd.DataFrame:
+    """
+    Stacks variants of students, each a (student, action) pair - the student with the action applied on it.
+    Variants are made from independent copies of students, and each action is applied on all of its students at once.
+    :param students: Students' dataframe (not modified).
+    :param pairs: Variants to make, each is position of a student in `students` and an action to apply on it.
+    :return: Dataframe of variants, ordered as `pairs` (with a default index).
+    """
+    positions_by_action: Dict[StudentAction, List[int]] = dict() # variants of each action (positions in `pairs`)
+    for i, (_, action) in enumerate(pairs):
+        positions_by_action.setdefault(action, list()).append(i)
+
+    student_positions: np.ndarray = np.array([position for position, _ in pairs], dtype=int)
+    variants: List[pd.DataFrame] = list()
+    for action, pair_positions in positions_by_action.items():
+        variants.append(action.transform(students.iloc[student_positions[pair_positions]]).set_axis(pair_positions))
+    if 0 == len(variants):
+        return students.iloc[:0].reset_index(drop=True)
+    return pd.concat(variants).sort_index()
+
+
+def improvements(students: pd.DataFrame, actions: List[StudentAction],
+                 chance_predictor: Callable[[pd.Series], float],
+                 org_chances: Optional[np.ndarray] = None) -> pd.DataFrame:
+    """
+    Predicts improvement rate of every action for every student. All (student, action) variants (and the students
+    themselves, unless their chances are given) are stacked into one dataframe, predicted in a single batched call.
+    :param students: Students' dataframe (not modified).
+    :param actions: Actions to apply.
+    :param chance_predictor: A function that receives a student, and predicts their chance of graduating.
+    :param org_chances: Predicted chances of `students` if already known, `None` to predict them too.
+    :return: Improvement rates dataframe - each row a student (indexed as `students`), each column an action (by ID).
+             Improvement is `utils.NO_IMPROVE` where an action doesn't change a student.
+    """
+    pairs: List[Tuple[int, StudentAction]] = [(position, action) for action in actions
+                                              for position in range(len(students))]
+    variants: pd.DataFrame = stack_variants(students, pairs)
+    if org_chances is None:
+        chances: np.ndarray = ChancePredictor.predict_batch(chance_predictor,
+                                                            pd.concat([students, variants], ignore_index=True))
+        org_chances, new_chances = chances[:len(students)], chances[len(students):]
+    else:
+        new_chances = ChancePredictor.predict_batch(chance_predictor, variants)
+
+    improvement: np.ndarray = utils.calc_improve(np.asarray(org_chances, dtype=float),
+                                                 new_chances.reshape(len(actions), len(students)))
+    for i, action in enumerate(actions):
+        improvement[i, ~action.applicable(students)] = utils.NO_IMPROVE # action doesn't change student
+    return pd.DataFrame(improvement.T, index=students.index, columns=[action.id for action in actions])